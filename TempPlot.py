@@ -1,10 +1,40 @@
 # 作者：Zack
 # 日期：2025/3/13
 
+import os
+import sqlite3
 import tkinter as tk
-from tkinter import ttk
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from tkinter import ttk, filedialog
+from figure_pool import FIGURE_POOL
+from recipe_chart import RecipeChart
+from recipe_compiler import export_setpoints
+from recipe_model import DEFAULT_ROOM_TEMP, RecipeModel, parse_value
+from stage_table import StageTable
+from recipe_store import PAGE_SIZE, RecipeStore
+
+# 配方库列表的列：(字段, 标题, 宽度)
+LIBRARY_COLUMNS = (("name", "名称", 160), ("product", "产品", 90), ("furnace", "炉号", 70), ("stages", "阶段数", 60),
+                   ("peak_temp", "最高温度 (°C)", 100), ("duration", "总时长 (分钟)", 100))
+LIBRARY_FILTERS = (("name", "名称（开头）"), ("product", "产品"), ("furnace", "炉号"),
+                   ("peak", "最高温度 (最小-最大)"), ("duration", "总时长 (最小-最大)"))
+LIBRARY_PREFETCH = 0.9  # 列表滚动超过该位置时读取下一页
+
+
+def parse_range(text):
+    # “1500-2000”、“1500-”、“-2000” 或单个数值（等于该值），返回 ((最小, 最大), 错误信息)
+    text = text.strip()
+    if not text:
+        return (None, None), None
+    lo, sep, hi = text.partition("-")
+    try:
+        lo = float(lo) if lo.strip() else None
+        if not sep:
+            return (lo, lo), None
+        hi = float(hi) if hi.strip() else None
+    except ValueError:
+        return None, "范围格式应为 最小-最大"
+    return (lo, hi), None
+
 
 class TemperatureCurveApp:
     def __init__(self, root):
@@ -14,6 +44,19 @@ class TemperatureCurveApp:
         # 设置字体
         self.default_font = ("Microsoft YaHei", 10)
 
+        # 配方数据：输入框修改时只读入该阶段，速率在空闲时刻合并计算
+        self.recipe = RecipeModel()
+        self.rate_update = None
+        self.chart = None
+
+        # 配方库（第一次保存或加载配方时才打开数据库）
+        self.store = None
+        self.library_window = None
+        self.save_window = None
+        self.recipe_name = ""
+        self.recipe_product = ""
+        self.recipe_furnace = ""
+
         # 创建表格输入区域
         self.create_input_table()
 
@@ -33,75 +76,52 @@ class TemperatureCurveApp:
         self.room_temp_entry = ttk.Entry(self.table_frame, width=10, font=self.default_font)
         self.room_temp_entry.grid(row=0, column=1, padx=5, pady=5)
         self.room_temp_entry.insert(0, "25")  # 默认室温为25度
+        self.room_temp_entry.bind("<KeyRelease>", self.room_temp_edited)
 
-        # 表头
-        headers = ["阶段", "温度 (°C)", "时间 (分钟)", "升温速率 (°C/分钟)"]
-        for col, header in enumerate(headers):
-            ttk.Label(self.table_frame, text=header, font=self.default_font).grid(row=1, column=col, padx=5, pady=5)
-
-        # 输入框
-        self.stage_labels = []
-        self.temp_entries = []
-        self.time_entries = []
-        self.rate_labels = []
+        # 阶段表格：只为可见的行创建输入框，阶段很多时滚动显示；修改某一阶段时只读入该阶段
+        self.stage_table = StageTable(self.table_frame, self.recipe, self.default_font, on_edit=self.schedule_rates)
+        self.stage_table.frame.grid(row=1, column=0, columnspan=4, sticky="nw")
         for _ in range(6):  # 默认6个阶段
             self.add_stage()
 
-        # 绑定事件以更新升温速率
-        self.room_temp_entry.bind("<KeyRelease>", self.update_rates)
-        for temp_entry, time_entry in zip(self.temp_entries, self.time_entries):
-            temp_entry.bind("<KeyRelease>", self.update_rates)
-            time_entry.bind("<KeyRelease>", self.update_rates)
-
     def add_stage(self):
-        row = len(self.temp_entries) + 2
-        stage_label = ttk.Label(self.table_frame, text=f"{row-1}", font=self.default_font)
-        stage_label.grid(row=row, column=0, padx=5, pady=5)
-        self.stage_labels.append(stage_label)
-        temp_entry = ttk.Entry(self.table_frame, width=10, font=self.default_font)
-        temp_entry.grid(row=row, column=1, padx=5, pady=5)
-        self.temp_entries.append(temp_entry)
-        time_entry = ttk.Entry(self.table_frame, width=10, font=self.default_font)
-        time_entry.grid(row=row, column=2, padx=5, pady=5)
-        self.time_entries.append(time_entry)
-        rate_label = ttk.Label(self.table_frame, text="", font=self.default_font)
-        rate_label.grid(row=row, column=3, padx=5, pady=5)
-        self.rate_labels.append(rate_label)
-
-        temp_entry.bind("<KeyRelease>", self.update_rates)
-        time_entry.bind("<KeyRelease>", self.update_rates)
+        self.stage_table.add_stage()
+        self.schedule_rates()
 
     def remove_stage(self):
-        if self.temp_entries:
-            self.stage_labels.pop().grid_forget()
-            self.temp_entries.pop().grid_forget()
-            self.time_entries.pop().grid_forget()
-            self.rate_labels.pop().grid_forget()
+        self.stage_table.remove_stage()
+        self.schedule_rates()
+
+    def read_room_temp(self):
+        room_temp = parse_value(self.room_temp_entry.get())
+        self.recipe.set_room_temp(DEFAULT_ROOM_TEMP if room_temp != room_temp else room_temp)  # 如果输入无效，默认室温为25度
+
+    def room_temp_edited(self, event=None):
+        self.read_room_temp()
+        self.schedule_rates()
+
+    def schedule_rates(self):
+        # 连续按键合并为一次计算：事件队列处理完之后才更新速率标签
+        if self.rate_update is None:
+            self.rate_update = self.root.after_idle(self.flush_rates)
+
+    def flush_rates(self):
+        self.rate_update = None
+        self.stage_table.show_rates(self.recipe.update())
+        self.preview()
+
+    def preview(self):
+        # 输入变化后原地更新预览曲线和标注
+        if self.chart is not None:
+            self.chart.set_recipe(self.recipe)
+            self.chart.refresh()
 
     def update_rates(self, event=None):
-        try:
-            room_temp = float(self.room_temp_entry.get())
-        except ValueError:
-            room_temp = 25  # 如果输入无效，默认室温为25度
-
-        previous_temp = room_temp
-        for temp_entry, time_entry, rate_label in zip(self.temp_entries, self.time_entries, self.rate_labels):
-            temp = temp_entry.get()
-            time = time_entry.get()
-            if temp and time:
-                try:
-                    temp_value = float(temp)
-                    time_value = float(time)
-                    if time_value != 0:  # 忽略时间为0的阶段
-                        rate = (temp_value - previous_temp) / time_value
-                        rate_label.config(text=f"{rate:.2f}")
-                        previous_temp = temp_value
-                    else:
-                        rate_label.config(text="")
-                except ValueError:
-                    rate_label.config(text="")
-            else:
-                rate_label.config(text="")
+        # 立即更新速率（阶段表格修改配方数据时已同步，这里只需重新读入室温）
+        if self.rate_update is not None:
+            self.root.after_cancel(self.rate_update)
+        self.read_room_temp()
+        self.flush_rates()
 
     def create_buttons(self):
         # 按钮区域
@@ -109,100 +129,241 @@ class TemperatureCurveApp:
         button_frame.grid(row=0, column=1, padx=10, pady=10, sticky="ne")
 
         ttk.Button(button_frame, text="生成曲线", command=self.plot_curve).grid(row=0, column=0, padx=5, pady=5)
-        # 删除保存配方按钮
-        # ttk.Button(button_frame, text="保存配方", command=self.save_recipe).grid(row=1, column=0, padx=5, pady=5)
+        ttk.Button(button_frame, text="保存配方", command=self.save_recipe).grid(row=1, column=0, padx=5, pady=5)
         ttk.Button(button_frame, text="加载配方", command=self.load_recipe).grid(row=2, column=0, padx=5, pady=5)
         ttk.Button(button_frame, text="重置", command=self.reset_entries).grid(row=3, column=0, padx=5, pady=5)
         ttk.Button(button_frame, text="增加阶段", command=self.add_stage).grid(row=4, column=0, padx=5, pady=5)
         ttk.Button(button_frame, text="删减阶段", command=self.remove_stage).grid(row=5, column=0, padx=5, pady=5)
+        ttk.Button(button_frame, text="导出设定值", command=self.export_setpoints).grid(row=6, column=0, padx=5, pady=5)
+        self.export_status = ttk.Label(button_frame, text="", font=self.default_font, wraplength=120)
+        self.export_status.grid(row=7, column=0, padx=5, pady=5)
 
     def create_plot_area(self):
         # 图表区域
         plot_frame = ttk.LabelFrame(self.root, text="升温曲线预览")
         plot_frame.grid(row=1, column=0, columnspan=2, padx=10, pady=10, sticky="se")
 
-        # 创建一个Figure和Axes
-        self.figure = plt.Figure(figsize=(8, 4), dpi=100)
-        self.ax = self.figure.add_subplot(111)
-        self.canvas = FigureCanvasTkAgg(self.figure, plot_frame)
+        # 预览图表：从图表池取出（重新打开窗口时沿用已有的 Figure），窗口销毁时放回池中
+        self.figure, self.canvas, self.chart = FIGURE_POOL.acquire("recipe", plot_frame, (8, 4), RecipeChart)
+        self.chart.attach(self.canvas)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.preview()
+        self.root.bind("<Destroy>", self.on_destroy, add="+")
+
+    def on_destroy(self, event):
+        # <Destroy> 会对所有子控件触发，只在窗口本身销毁时释放图表
+        if event.widget is not self.root or self.figure is None:
+            return
+        if self.rate_update is not None:
+            self.root.after_cancel(self.rate_update)
+            self.rate_update = None
+        FIGURE_POOL.release("recipe", self.figure, self.chart, RecipeChart.reset)
+        self.figure = self.canvas = self.chart = None
+        if self.store is not None:
+            self.store.close()
+            self.store = None
 
     def plot_curve(self):
-        # 更新升温速率
+        # 重新读入室温并立即更新速率和预览（输入时预览已在空闲时刻自动更新）
         self.update_rates()
-        
-        # 从输入框获取数据
-        temps = []
-        times = []
-        for temp_entry, time_entry in zip(self.temp_entries, self.time_entries):
-            temp = temp_entry.get()
-            time = time_entry.get()
-            if temp and time:
-                temp_value = float(temp)
-                time_value = float(time)
-                if temp_value != 0 or time_value != 0:  # 忽略温度和时间都为0的阶段
-                    temps.append(temp_value)
-                    times.append(time_value)
-
-        # 清空当前图表
-        self.ax.clear()
-
-        # 绘制曲线
-        cumulative_time = 0
-        try:
-            room_temp = float(self.room_temp_entry.get())
-        except ValueError:
-            room_temp = 25  # 如果输入无效，默认室温为25度
-
-        x = [0]
-        y = [room_temp]
-        for i in range(len(temps)):
-            if i < len(times):
-                cumulative_time += times[i]
-                x.append(cumulative_time)
-                y.append(temps[i])
-
-        self.ax.plot(x, y, marker='o', linestyle='-', color='r')
-
-        # 设置字体属性
-        plt.rcParams['font.sans-serif'] = ['Microsoft YaHei']  # 使用SimHei字体支持中文
-        plt.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
-
-        self.ax.set_ylim(0, 2000)
-
-        self.ax.set_title("工艺配方升温曲线")
-        self.ax.set_xlabel("时间 (分钟)")
-        self.ax.set_ylabel("温度 (°C)")
-
-        # 在对应的位置添加文字标注
-        previous_temp = None
-        for i, (temp, time) in enumerate(zip(temps, times)):
-            if temp != 0 and time != 0:
-                if temp != previous_temp:  # 只有当当前温度与前一个温度不同时才标注
-                    self.ax.text(x[i+1], y[i+1] + 20, f"{temp}°C", fontsize=10, ha='center', va='bottom')
-                previous_temp = temp
-
-        # 添加升温速率的标注
-        for i, rate_label in enumerate(self.rate_labels):
-            rate_text = rate_label.cget("text")
-            if rate_text:
-                rate = float(rate_text)
-                if rate > 0:
-                    # 调整va参数为'top'，并增加y轴偏移量
-                    self.ax.text(x[i+1], y[i+1] - 40, f"{rate:.1f}°C/min", fontsize=10, ha='center', va='top')
-
-        # 添加网格线
-        self.ax.grid(True, linestyle='--', alpha=0.7)
-
-        self.ax.grid(True)
-
-        # 更新图表
-        self.canvas.draw()
+
+    def export_setpoints(self):
+        # 当前配方编译为每秒一个的温度设定值，逐块写入 CSV（供温控器导入）
+        self.update_rates()
+        path = filedialog.asksaveasfilename(
+            title="导出温度设定值",
+            defaultextension=".csv",
+            filetypes=[("CSV 文件", "*.csv")]
+        )
+        if not path:
+            return
+        temps, times = self.recipe.curve_stages()
+        count, error_msg = export_setpoints(path, self.recipe.room_temp, temps, times)
+        if error_msg:
+            self.export_status.config(text=f"导出失败: {error_msg}", foreground="red")
+            return
+        self.export_status.config(text=f"已导出 {count} 个设定值到 {os.path.basename(path)}", foreground="black")
+
+    def open_store(self):
+        # 第一次使用时打开配方库，无法打开时返回 None
+        if self.store is None:
+            try:
+                self.store = RecipeStore()
+            except sqlite3.Error:
+                return None
+        return self.store
+
+    def set_recipe_info(self, name, product, furnace):
+        self.recipe_name, self.recipe_product, self.recipe_furnace = name, product, furnace
+        self.table_frame.config(text=f"工艺配方输入 - {name}" if name else "工艺配方输入")
+
+    def save_recipe(self):
+        # 当前配方保存到配方库（同名配方被覆盖）
+        if self.save_window is not None:
+            self.save_window.lift()
+            return
+        window = tk.Toplevel(self.root)
+        window.title("保存配方")
+        window.protocol("WM_DELETE_WINDOW", self.close_save_window)
+        self.save_window = window
+
+        entries = {}
+        for row, (key, text, value) in enumerate((("name", "名称", self.recipe_name),
+                                                  ("product", "产品", self.recipe_product),
+                                                  ("furnace", "炉号", self.recipe_furnace))):
+            ttk.Label(window, text=text, font=self.default_font).grid(row=row, column=0, padx=5, pady=5, sticky=tk.W)
+            entry = ttk.Entry(window, width=24, font=self.default_font)
+            entry.insert(0, value)
+            entry.grid(row=row, column=1, padx=5, pady=5)
+            entries[key] = entry
+        status = ttk.Label(window, text="", font=self.default_font)
+        status.grid(row=3, column=0, columnspan=2)
+
+        def save(event=None):
+            name = entries["name"].get().strip()
+            product = entries["product"].get().strip()
+            furnace = entries["furnace"].get().strip()
+            if not name:
+                status.config(text="请输入配方名称", foreground="red")
+                return
+            store = self.open_store()
+            if store is None:
+                status.config(text="无法打开配方库", foreground="red")
+                return
+            try:
+                store.save(name, self.stage_table.stages(), product, furnace, self.recipe.room_temp)
+            except sqlite3.Error as error:
+                status.config(text=f"保存失败: {error}", foreground="red")
+                return
+            self.set_recipe_info(name, product, furnace)
+            self.close_save_window()
+
+        ttk.Button(window, text="保存", command=save).grid(row=4, column=0, columnspan=2, pady=5)
+        window.bind("<Return>", save)
+        entries["name"].focus_set()
+
+    def close_save_window(self):
+        self.save_window.destroy()
+        self.save_window = None
 
     def load_recipe(self):
-        # 加载配方到输入框
-        # 这里可以添加从文件加载的逻辑
-        # 示例数据
+        # 配方库中有配方时打开配方库选择，否则加载示例配方
+        store = self.open_store()
+        if store is None or store.count() == 0:
+            self.load_sample_recipe()
+            return
+        self.open_library(store)
+
+    def open_library(self, store):
+        # 配方列表按名称排序，每次只读取一页摘要，滚动到接近末尾时再读取下一页；打开时才读取阶段数据
+        if self.library_window is not None:
+            self.library_window.lift()
+            return
+        window = tk.Toplevel(self.root)
+        window.title("配方库")
+        window.protocol("WM_DELETE_WINDOW", self.close_library)
+        self.library_window = window
+
+        filter_frame = ttk.Frame(window)
+        filter_frame.pack(padx=10, pady=5, fill=tk.X)
+        entries = {}
+        for col, (key, text) in enumerate(LIBRARY_FILTERS):
+            ttk.Label(filter_frame, text=text, font=self.default_font).grid(row=0, column=col, padx=3, sticky=tk.W)
+            entry = ttk.Entry(filter_frame, width=14, font=self.default_font)
+            entry.grid(row=1, column=col, padx=3)
+            entry.bind("<KeyRelease>", lambda event: schedule_search())
+            entries[key] = entry
+
+        list_frame = ttk.Frame(window)
+        list_frame.pack(padx=10, pady=5, fill=tk.BOTH, expand=True)
+        tree = ttk.Treeview(list_frame, columns=[c[0] for c in LIBRARY_COLUMNS], show="headings", height=15)
+        for column, text, width in LIBRARY_COLUMNS:
+            tree.heading(column, text=text)
+            tree.column(column, width=width, anchor=tk.CENTER)
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        status = ttk.Label(window, text="", font=self.default_font)
+        status.pack()
+        state = {"query": {}, "after": None, "more": False, "pending": None}
+
+        def load_page():
+            recipes = store.query(**state["query"], after=state["after"])
+            for recipe in recipes:
+                peak = "" if recipe["peak_temp"] is None else f"{recipe['peak_temp']:g}"
+                tree.insert("", tk.END, iid=recipe["name"], values=(
+                    recipe["name"], recipe["product"] or "", recipe["furnace"] or "", recipe["stages"], peak,
+                    f"{recipe['duration']:g}"))
+            state["more"] = len(recipes) == PAGE_SIZE
+            if recipes:
+                state["after"] = recipes[-1]["name"]
+
+        def search():
+            state["pending"] = None
+            if self.library_window is not window:
+                return
+            peak, error_msg = parse_range(entries["peak"].get())
+            duration, duration_error = parse_range(entries["duration"].get())
+            error_msg = error_msg or duration_error
+            if error_msg:
+                status.config(text=error_msg, foreground="red")
+                return
+            status.config(text="")
+            state["query"] = {"name": entries["name"].get().strip(), "product": entries["product"].get().strip(),
+                              "furnace": entries["furnace"].get().strip(), "peak": peak, "duration": duration}
+            state["after"] = None
+            tree.delete(*tree.get_children())
+            load_page()
+
+        def schedule_search():
+            # 连续输入合并为一次查询
+            if state["pending"] is None:
+                state["pending"] = self.root.after_idle(search)
+
+        def on_scroll(first, last):
+            scrollbar.set(first, last)
+            if state["more"] and float(last) > LIBRARY_PREFETCH:
+                load_page()
+
+        def open_selected(event=None):
+            selected = tree.selection()
+            if selected:
+                self.close_library()
+                self.open_recipe(store, selected[0])
+
+        def delete_selected():
+            for name in tree.selection():
+                store.delete(name)
+                tree.delete(name)
+
+        tree.configure(yscrollcommand=on_scroll)
+        tree.bind("<Double-1>", open_selected)
+        button_frame = ttk.Frame(window)
+        button_frame.pack(pady=5)
+        ttk.Button(button_frame, text="打开", command=open_selected).grid(row=0, column=0, padx=5)
+        ttk.Button(button_frame, text="删除", command=delete_selected).grid(row=0, column=1, padx=5)
+        ttk.Button(button_frame, text="示例配方", command=lambda: (self.close_library(), self.load_sample_recipe())
+                   ).grid(row=0, column=2, padx=5)
+        search()
+
+    def close_library(self):
+        self.library_window.destroy()
+        self.library_window = None
+
+    def open_recipe(self, store, name):
+        # 读取一个配方（按名称索引查找）填入阶段表格并生成曲线
+        recipe = store.load(name)
+        if recipe is None:
+            return
+        self.stage_table.load(recipe["stages"])
+        room_temp = DEFAULT_ROOM_TEMP if recipe["room_temp"] is None else recipe["room_temp"]
+        self.room_temp_entry.delete(0, tk.END)
+        self.room_temp_entry.insert(0, f"{room_temp:g}")
+        self.set_recipe_info(recipe["name"], recipe["product"] or "", recipe["furnace"] or "")
+        self.plot_curve()
+
+    def load_sample_recipe(self):
+        # 加载示例配方到输入框
         sample_recipe = {
             "段1": {"温度": 300, "时间": 30},
             "段2": {"温度": 600, "时间": 30},
@@ -212,21 +373,18 @@ class TemperatureCurveApp:
             "段6": {"温度": 1950, "时间": 30}
         }
 
-        for i, (temp_entry, time_entry) in enumerate(zip(self.temp_entries, self.time_entries)):
+        for i in range(len(self.stage_table)):
             segment = f"段{i+1}"
             if segment in sample_recipe:
-                temp_entry.delete(0, tk.END)
-                temp_entry.insert(0, str(sample_recipe[segment]["温度"]))
-                time_entry.delete(0, tk.END)
-                time_entry.insert(0, str(sample_recipe[segment]["时间"]))
+                self.stage_table.set_stage(i, str(sample_recipe[segment]["温度"]), str(sample_recipe[segment]["时间"]))
         
         # 加载配方后自动生成曲线
         self.plot_curve()
 
     def reset_entries(self):
         # 清空所有输入框
-        for entry in self.temp_entries + self.time_entries:
-            entry.delete(0, tk.END)
+        self.stage_table.clear_values()
+        self.update_rates()
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,98 @@
+# 作者：Zack
+# 日期：2026/10/18
+# 后台任务调度：把解析、拟合、绘图数据准备放到线程池/进程池中执行，Tk 主循环不再被阻塞
+# 同一个 key 的新任务会取代旧任务（未开始的取消，已开始的结果丢弃），结果通过 after() 轮询回到 Tk 线程
+
+import itertools
+import queue
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+
+POLL_MS = 30
+
+
+class JobScheduler:
+    def __init__(self, master, executor=None, poll_ms=POLL_MS):
+        # executor 可以是任意 concurrent.futures 执行器；使用进程池时任务函数必须定义在模块顶层
+        self.master = master
+        self.owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=1)
+        self.poll_ms = poll_ms
+        self.latest = {}  # key -> (任务编号, future)
+        self.finished = queue.SimpleQueue()
+        self.counter = itertools.count()
+        self.polling = False
+        self.closed = False
+        master.bind("<Destroy>", self.on_destroy, add="+")
+
+    def submit(self, key, func, *args, on_done=None, on_error=None):
+        # 提交任务，返回任务编号；on_done(result) / on_error(exc) 在 Tk 线程中调用
+        if self.closed:
+            return None
+        self.cancel(key)
+        job_id = next(self.counter)
+        future = self.executor.submit(func, *args)
+        self.latest[key] = (job_id, future)
+        # 完成回调在工作线程中执行，只往队列里放结果，不碰任何 Tk 对象
+        future.add_done_callback(lambda f: self.finished.put((key, job_id, f, on_done, on_error)))
+        if not self.polling:
+            self.polling = True
+            self.master.after(self.poll_ms, self.poll)
+        return job_id
+
+    def cancel(self, key):
+        job = self.latest.pop(key, None)
+        if job is not None:
+            job[1].cancel()
+
+    def busy(self, key=None):
+        if key is None:
+            return bool(self.latest)
+        return key in self.latest
+
+    def poll(self):
+        if self.closed:
+            return
+        while True:
+            try:
+                key, job_id, future, on_done, on_error = self.finished.get_nowait()
+            except queue.Empty:
+                break
+            # 已被新任务取代或取消的结果直接丢弃
+            current = self.latest.get(key)
+            if current is None or current[0] != job_id or future.cancelled():
+                continue
+            del self.latest[key]
+            error = future.exception()
+            if error is not None:
+                if on_error is not None:
+                    on_error(error)
+            elif on_done is not None:
+                on_done(future.result())
+
+        if self.latest:
+            self.master.after(self.poll_ms, self.poll)
+        else:
+            self.polling = False
+
+    def shutdown(self):
+        if self.closed:
+            return
+        self.closed = True
+        for key in list(self.latest):
+            self.cancel(key)
+        if self.owns_executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def on_destroy(self, event):
+        # <Destroy> 会对所有子控件触发，只在窗口本身销毁时关闭
+        if event.widget is self.master:
+            self.shutdown()
+
+
+def report_error(label, error):
+    # 常用的 on_error：把异常显示在结果标签上
+    try:
+        label.config(text=f"计算错误: {error}", foreground="red")
+    except tk.TclError:
+        pass
@@ -0,0 +1,100 @@
+# 作者：Zack
+# 日期：2026/10/18
+# 启动时间基准：每项在新的 Python 进程中测量（避免已导入模块的影响），取多次的中位数
+# 检查启动菜单不导入 NumPy/matplotlib 且在时间预算之内；超出预算时返回非零退出码
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+LAUNCHER_BUDGET = 1.0  # 从启动解释器到显示功能菜单的时间预算（秒）
+HEAVY_MODULES = ("numpy", "matplotlib")
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+LAUNCHER_CODE = """
+import json, sys, time
+start = time.perf_counter()
+import all_in_one
+shown = None
+try:
+    root = all_in_one.tk.Tk()
+except all_in_one.tk.TclError:
+    root = None  # 没有图形界面时只测导入
+if root is not None:
+    all_in_one.build_launcher(root)
+    root.update()
+    shown = time.perf_counter() - start
+    root.destroy()
+heavy = [name for name in {heavy} if name in sys.modules]
+print(json.dumps({{"import": time.perf_counter() - start if shown is None else shown, "shown": shown is not None,
+                  "heavy": heavy}}))
+"""
+
+IMPORT_CODE = """
+import json, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{"import": time.perf_counter() - start}}))
+"""
+
+FONT_CODE = """
+import json, time
+import matplotlib
+start = time.perf_counter()
+from chart_fonts import setup_fonts
+family = setup_fonts()
+print(json.dumps({"import": time.perf_counter() - start, "family": family}))
+"""
+
+
+def run(code, env=None):
+    # 在新进程中执行，返回 (进程总耗时, 进程输出的测量结果)
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure(code, repeat, env=None):
+    results = [run(code, env) for _ in range(repeat)]
+    wall = statistics.median(r[0] for r in results)
+    inner = statistics.median(r[1]["import"] for r in results)
+    return wall, inner, results[-1][1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="测量启动菜单和各工具的启动时间")
+    parser.add_argument("--repeat", type=int, default=5, help="每项测量的次数（取中位数）")
+    parser.add_argument("--budget", type=float, default=LAUNCHER_BUDGET, help="启动菜单的时间预算（秒）")
+    args = parser.parse_args(argv)
+
+    status = 0
+    wall, inner, info = measure(LAUNCHER_CODE.format(heavy=HEAVY_MODULES), args.repeat)
+    what = "显示菜单" if info["shown"] else "导入（无图形界面）"
+    print(f"启动菜单: 进程 {wall:.3f} s，{what} {inner:.3f} s，预算 {args.budget:.3f} s")
+    if info["heavy"]:
+        print(f"  错误: 启动菜单导入了 {', '.join(info['heavy'])}")
+        status = 1
+    if wall > args.budget:
+        print("  错误: 超出时间预算")
+        status = 1
+
+    for module, name in (("cooling_predictor2", "冷却时间预测"), ("TempPlot", "升温曲线生成")):
+        wall, inner, _ = measure(IMPORT_CODE.format(module=module), args.repeat)
+        print(f"打开{name}（导入）: 进程 {wall:.3f} s，导入 {inner:.3f} s")
+
+    # 字体：使用临时的 matplotlib 配置目录，第一次为冷启动（无缓存），之后读取缓存
+    with tempfile.TemporaryDirectory() as config_dir:
+        env = dict(os.environ, MPLCONFIGDIR=config_dir)
+        cold = run(FONT_CODE, env)[1]["import"]
+        _, warm, info = measure(FONT_CODE, args.repeat, env)
+    print(f"中文字体: 冷启动 {cold:.3f} s，有缓存 {warm:.3f} s，使用 {info['family'] or '（无中文字体）'}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+# 作者：Zack
+# 日期：2026/10/18
+# 冷却阶段检测：在 log(T - T_env) 上做分段线性回归，用 PELT 动态规划找分界点（开炉门、开风机、充气等）
+# 任意一段的加权残差平方和由前缀和 O(1) 得到；候选分界点数有上限，大数据量时也只需有限次迭代
+# 温度噪声在对数坐标下随 T - T_env 变小而放大，每个点按其对数噪声方差的倒数加权
+# 孤立的尖峰（一两个读数）先用滑动中位数替换，不会被当作一个新的阶段
+
+import numpy as np
+
+MIN_SEGMENT = 5  # 每个阶段至少包含的数据点数
+MAX_CANDIDATES = 2000  # 候选分界点数上限，数据点更多时按等间隔取候选位置
+PENALTY_SCALE = 3.0  # 每增加一个阶段的惩罚：PENALTY_SCALE * log(n)（以噪声方差为单位）
+MIN_NOISE = 0.1  # 温度噪声标准差的下限 (℃)
+MODEL_TOLERANCE = 0.02  # 相对模型误差：平滑的曲率（如高温段的辐射散热）在该范围内不算阶段变化
+SPIKE_WINDOW = 5  # 检测尖峰的滑动中位数窗口（点数，奇数）
+SPIKE_THRESHOLD = 6.0  # 偏离滑动中位数超过该倍数的噪声标准差时视为尖峰
+
+
+def prefix_sums(t, y, w):
+    # 加权的 1, t, y, t², t·y, y² 的前缀和，形状 (6, n + 1)；先中心化减小相减时的舍入误差
+    t = t - t.mean()
+    y = y - y.mean()
+    cols = np.vstack([w, w * t, w * y, w * t * t, w * t * y, w * y * y])
+    P = np.zeros((6, len(t) + 1))
+    np.cumsum(cols, axis=1, out=P[:, 1:])
+    return P
+
+
+def segment_cost(P, start, stop):
+    # 数据段 [start, stop) 的加权线性回归残差平方和，start 可为数组
+    n, St, Sy, Stt, Sty, Syy = P[:, np.atleast_1d(stop)] - P[:, np.atleast_1d(start)]
+    n = np.maximum(n, 1e-300)
+    Stt_c = Stt - St * St / n
+    Sty_c = Sty - St * Sy / n
+    Syy_c = Syy - Sy * Sy / n
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rss = np.where(Stt_c > 0, Syy_c - Sty_c * Sty_c / Stt_c, Syy_c)
+    return np.maximum(rss, 0)
+
+
+def noise_sigma(T):
+    # 由二阶差分的中位数绝对偏差稳健估计温度噪声（平滑趋势和少数阶段变化对其影响很小）
+    if len(T) < 3:
+        return MIN_NOISE
+    d2 = T[2:] - 2 * T[1:-1] + T[:-2]
+    sigma = 1.4826 * np.median(np.abs(d2 - np.median(d2))) / np.sqrt(6)
+    return max(sigma, MIN_NOISE)
+
+
+def spike_mask(T, window=SPIKE_WINDOW, threshold=SPIKE_THRESHOLD):
+    # 偏离滑动中位数过大的孤立读数，返回 (尖峰掩码, 滑动中位数)
+    # 单调的冷却曲线和持续的台阶（开炉门等）上中位数就是读数本身，只有持续不到半个窗口的跳变会被标出
+    if len(T) < window:
+        return np.zeros(len(T), dtype=bool), T
+    half = window // 2
+    padded = np.pad(T, half, mode="edge")
+    median = np.median(np.lib.stride_tricks.sliding_window_view(padded, window), axis=1)
+    return np.abs(T - median) > threshold * noise_sigma(T), median
+
+
+def short_runs(mask, min_size=MIN_SEGMENT):
+    # 掩码中连续长度小于 min_size 的 True 段（孤立的离群读数）；更长的连续偏离是阶段变化，不算离群
+    mask = np.asarray(mask, dtype=bool)
+    edges = np.diff(np.r_[0, mask.astype(np.int8), 0])
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    marks = np.zeros(len(mask) + 1)
+    marks[starts] += ends - starts
+    marks[ends] -= ends - starts
+    return mask & (np.cumsum(marks)[:-1] < min_size)
+
+
+def log_weights(T, T_env):
+    # log(T - T_env) 的噪声方差约为 σ²/(T - T_env)² + 相对模型误差²，权重取其倒数
+    dT = T - T_env
+    return 1.0 / ((noise_sigma(T) / dT) ** 2 + MODEL_TOLERANCE ** 2)
+
+
+def pelt(t, y, w=None, penalty=None, min_size=MIN_SEGMENT, max_candidates=MAX_CANDIDATES):
+    # 分段线性回归的 PELT（Pruned Exact Linear Time），返回各阶段起点的下标（不含 0）
+    # w 为各点噪声方差的倒数，代价以噪声方差为单位，惩罚项与数据的量级无关
+    t = np.asarray(t, dtype=float).ravel()
+    y = np.asarray(y, dtype=float).ravel()
+    n = len(t)
+    if n < 2 * min_size:
+        return []
+    if w is None:
+        w = np.ones(n)
+    if penalty is None:
+        penalty = PENALTY_SCALE * np.log(n)
+    P = prefix_sums(t, y, w)
+
+    # 候选分界位置（含首尾），数据点过多时等间隔抽取
+    step = max(1, -(-n // max_candidates))
+    grid = np.unique(np.r_[np.arange(0, n, step), n])
+    m = len(grid)
+
+    F = np.full(m, np.inf)
+    F[0] = -penalty
+    last = np.zeros(m, dtype=np.int64)
+    R = np.zeros(0, dtype=np.int64)  # 未被剪枝的候选起点（grid 下标）
+    pending = 0  # 下一个等待满足最短长度的候选
+    for j in range(1, m):
+        while pending < j and grid[j] - grid[pending] >= min_size:
+            if np.isfinite(F[pending]):
+                R = np.append(R, pending)
+            pending += 1
+        if len(R) == 0:
+            continue
+        total = F[R] + segment_cost(P, grid[R], grid[j]) + penalty
+        best = np.argmin(total)
+        F[j] = total[best]
+        last[j] = R[best]
+        # 剪枝：以后不可能成为最优起点的候选直接丢弃
+        R = R[total - penalty <= F[j]]
+
+    breaks = []
+    j = m - 1
+    while j > 0:
+        j = last[j]
+        if j > 0:
+            breaks.append(int(grid[j]))
+    return breaks[::-1]
+
+
+def detect_phases(t, T, T_env, penalty=None, min_size=MIN_SEGMENT):
+    # 返回各阶段起点下标（不含 0）和错误信息；最后一个阶段从 breaks[-1]（没有分界时为 0）开始
+    t = np.asarray(t, dtype=float).ravel()
+    T = np.asarray(T, dtype=float).ravel()
+    spikes, median = spike_mask(T)
+    T = np.where(spikes, median, T)
+    if np.any(T <= T_env):
+        return [], "所有温度必须高于环境温度"
+    return pelt(t, np.log(T - T_env), log_weights(T, T_env), penalty, min_size), None
@@ -0,0 +1,66 @@
+# 作者：Zack
+# 日期：2026/10/18
+# 图表中文字体：按候选列表找到本机实际安装的中文字体，结果缓存到 matplotlib 缓存目录，以后启动直接读取；
+# 只在第一次创建图表时设置一次 rcParams，避免每次绘图都按不存在的字体名回退查找
+
+import json
+import os
+import matplotlib
+from matplotlib import font_manager
+
+CANDIDATES = ("Microsoft YaHei", "SimHei", "PingFang SC", "Noto Sans CJK SC", "Source Han Sans SC",
+              "WenQuanYi Micro Hei", "WenQuanYi Zen Hei", "Arial Unicode MS")
+CACHE_NAME = "cooling_fonts.json"
+
+resolved = None  # 本进程中已解析的字体（"" 表示没有可用的中文字体）
+
+
+def cache_path():
+    return os.path.join(matplotlib.get_cachedir(), CACHE_NAME)
+
+
+def read_cache():
+    # 缓存的字体文件仍然存在时才使用，字体被卸载后重新查找；缓存内容不完整时也重新查找
+    try:
+        with open(cache_path(), encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cached, dict) or cached.get("matplotlib") != matplotlib.__version__:
+        return None
+    family, path = cached.get("family"), cached.get("path")
+    if not isinstance(family, str) or not family or not isinstance(path, str) or not os.path.exists(path):
+        return None
+    return cached
+
+
+def resolve_font():
+    # 只比较已登记字体的名称，不触发 findfont 的回退查找
+    installed = {font.name: font.fname for font in font_manager.fontManager.ttflist}
+    for family in CANDIDATES:
+        if family in installed:
+            return {"family": family, "path": installed[family], "matplotlib": matplotlib.__version__}
+    return {"family": "", "path": "", "matplotlib": matplotlib.__version__}
+
+
+def setup_fonts():
+    # 返回使用的中文字体名（没有时为 ""），每个进程只设置一次
+    global resolved
+    if resolved is not None:
+        return resolved
+    cached = read_cache()
+    if cached is None:
+        cached = resolve_font()
+        # 没有找到中文字体时不缓存，之后安装了中文字体下次启动即可使用
+        if cached["family"]:
+            try:
+                with open(cache_path(), "w", encoding="utf-8") as f:
+                    json.dump(cached, f, ensure_ascii=False)
+            except OSError:
+                pass
+    resolved = cached["family"]
+    if resolved:
+        matplotlib.rcParams['font.sans-serif'] = [resolved] + [
+            name for name in matplotlib.rcParams['font.sans-serif'] if name != resolved]
+    matplotlib.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
+    return resolved
@@ -0,0 +1,235 @@
+# 作者：Zack
+# 日期：2026/10/18
+# 冷却曲线图：坐标轴、图例、目标线等静态元素只创建一次，
+# 新读数和预测曲线通过 set_offsets/set_data 更新，并用 blit 只重绘这几个动态元素
+
+from datetime import timedelta
+import numpy as np
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.ticker import FuncFormatter, MaxNLocator
+from chart_fonts import setup_fonts
+from plot_lod import LodCache, LOD_MIN_POINTS, minmax_decimate
+from ring_history import RingHistory
+
+HEADROOM = 0.1  # 坐标范围预留的余量，数据超出当前范围时才整体重绘
+LOD_TAIL = 256  # 抽稀后新追加的原始点超过该数量时重新抽稀
+CHANNEL_BUCKETS = 1000  # 多通道曲线每个通道抽稀后的桶数（每桶保留最低点和最高点）
+
+
+class CoolingChart:
+    def __init__(self, figure, canvas):
+        self.figure = figure
+        self.canvas = canvas
+
+        setup_fonts()  # 中文字体（解析结果跨会话缓存）
+
+        self.ax = figure.add_subplot(111)
+        ax = self.ax
+
+        # 动态元素：测量点、预测曲线、目标温度线、预测时间线
+        self.points = ax.scatter([], [], color='red', zorder=5, label='测量数据', animated=True)
+        self.outliers = ax.scatter([], [], color='orange', marker='x', zorder=6, label='离群点', animated=True)
+        self.curve, = ax.plot([], [], label='预测曲线', animated=True)
+        self.target_line = ax.axhline(0, color='green', linestyle='--', label='目标温度', animated=True)
+        self.time_line = ax.axvline(0, color='blue', linestyle=':', label='预测时间', animated=True)
+        self.band = PolyCollection([], facecolor='C0', alpha=0.2, label='预测区间', animated=True)
+        ax.add_collection(self.band, autolim=False)
+        # 冷却阶段分界线：x 为数据坐标，y 占满整个坐标轴高度
+        self.breaks = LineCollection([], colors='gray', linestyles='-.', label='阶段分界', animated=True,
+                                     transform=ax.get_xaxis_transform())
+        ax.add_collection(self.breaks, autolim=False)
+        # 多个热电偶通道：所有通道放在同一个 LineCollection 中，一次绘制
+        self.channels = LineCollection([], linewidths=1, alpha=0.7, label='各通道', animated=True)
+        ax.add_collection(self.channels, autolim=False)
+        self.channel_extent = None
+        self.animated = [self.band, self.breaks, self.channels, self.points, self.outliers, self.curve, self.target_line, self.time_line]
+        for artist in self.animated:
+            artist.set_visible(False)
+
+        # X轴刻度按开始时间换算为具体的日期和时间
+        self.start_time = None
+        ax.xaxis.set_major_locator(MaxNLocator(10))
+        ax.xaxis.set_major_formatter(FuncFormatter(self.format_time))
+        ax.tick_params(axis='x', labelrotation=30)
+
+        ax.set_xlabel('时间')
+        ax.set_ylabel('温度 (℃)')
+        ax.set_title('温度曲线')
+        ax.grid(True)
+        ax.legend(loc='upper right')
+
+        # 测量数据保存在有界的环形历史中：最近一段为原始读数，更早的按分钟/小时聚合，长时间实时追加内存也不增长
+        self.history = RingHistory()
+        self.data_extent = None  # 测量数据的 (xmin, xmax, ymin, ymax)，追加时增量更新
+
+        # 点数很多时按像素抽稀后再画散点，抽稀结果按视图缓存；lod_count 之后的点是抽稀后新追加的原始点
+        self.lod = LodCache()
+        self.lod_count = 0  # 抽稀时的累计读数数
+        ax.callbacks.connect('xlim_changed', lambda ax: self.update_points())
+
+        self.background = None
+        self.needs_layout = True
+        canvas.mpl_connect('draw_event', self.on_draw)
+
+    def format_time(self, value, pos=None):
+        if self.start_time is None:
+            return f"{value:g}"
+        return (self.start_time + timedelta(minutes=float(value))).strftime('%m-%d %H:%M')
+
+    def set_data(self, t, T, start_time):
+        # 替换全部测量数据（完整计算之后调用）
+        n = len(t)
+        self.history.clear()
+        self.history.extend(t, T)
+        self.data_extent = (np.min(t), np.max(t), np.min(T), np.max(T)) if n else None
+        self.start_time = start_time
+        # 新的一批数据按其范围重新确定坐标轴，需要整体重绘一次
+        self.background = None
+        self.sync_lod()
+        self.points.set_visible(n > 0)
+
+    def append(self, t, T):
+        # 追加一个读数
+        self.history.append(t, T)
+        if self.data_extent is None:
+            self.data_extent = (t, t, T, T)
+        else:
+            xmin, xmax, ymin, ymax = self.data_extent
+            self.data_extent = (min(xmin, t), max(xmax, t), min(ymin, T), max(ymax, T))
+        if self.history.total - self.lod_count > LOD_TAIL:
+            self.sync_lod()
+        self.points.set_visible(True)
+
+    def sync_lod(self):
+        # 把当前全部数据交给抽稀缓存（旧的视图缓存失效）
+        self.lod_count = self.history.total
+        self.lod.set_data(*self.history.envelope())
+
+    def update_points(self):
+        # 按当前视图和像素宽度设置散点数据；视图未变时直接使用缓存的抽稀结果
+        if len(self.history) <= LOD_MIN_POINTS:
+            self.points.set_offsets(np.column_stack(self.history.envelope()))
+            return
+        x0, x1 = self.ax.get_xlim()
+        x, y = self.lod.reduce(x0, x1, self.ax.bbox.width)
+        # 抽稀之后追加的读数还在最近一段的原始读数中
+        t, T = self.history.recent()
+        new = min(self.history.total - self.lod_count, len(t))
+        self.points.set_offsets(np.column_stack([np.r_[x, t[len(t) - new:]], np.r_[y, T[len(T) - new:]]]))
+
+    def set_prediction(self, t_curve, T_curve, T_target, t_cool):
+        self.curve.set_data(t_curve, T_curve)
+        self.target_line.set_ydata([T_target, T_target])
+        self.time_line.set_xdata([t_cool, t_cool])
+        for artist in (self.curve, self.target_line, self.time_line):
+            artist.set_visible(True)
+
+    def set_band(self, t_curve, lower=None, upper=None):
+        # 预测曲线的置信区间阴影；t_curve 为 None 时隐藏
+        if t_curve is None:
+            self.band.set_visible(False)
+            return
+        t_curve = np.asarray(t_curve)
+        verts = np.concatenate([np.column_stack([t_curve, lower]), np.column_stack([t_curve[::-1], upper[::-1]])])
+        self.band.set_verts([verts])
+        self.band.set_visible(True)
+
+    def set_outliers(self, t, T):
+        # 稳健拟合剔除的读数，以不同颜色叠加在测量点上
+        self.outliers.set_offsets(np.column_stack([t, T]) if len(t) else np.zeros((0, 2)))
+        self.outliers.set_visible(len(t) > 0)
+
+    def set_channels(self, t, T=None):
+        # 各通道的温度曲线 T (数据点数, 通道数)，T 为 None 时隐藏；每个通道按最小/最大值抽稀后再画
+        if T is None:
+            self.channel_extent = None
+            self.channels.set_visible(False)
+            return
+        t = np.asarray(t, dtype=float)
+        segments = [np.column_stack(minmax_decimate(t, T[:, i], CHANNEL_BUCKETS)) for i in range(T.shape[1])]
+        self.channels.set_segments(segments)
+        self.channels.set_colors([f"C{i % 10}" for i in range(T.shape[1])])
+        self.channel_extent = (np.min(t), np.max(t), np.nanmin(T), np.nanmax(T))
+        self.channels.set_visible(True)
+
+    def set_breakpoints(self, times):
+        # 阶段分界时间（分钟），为空时隐藏
+        self.breaks.set_segments([[(x, 0), (x, 1)] for x in times])
+        self.breaks.set_visible(len(times) > 0)
+
+    def reset(self):
+        # 清除全部数据（不重绘），图表放回图表池时调用
+        self.history.clear()
+        self.data_extent = None
+        self.channel_extent = None
+        self.sync_lod()
+        for artist in self.animated:
+            artist.set_visible(False)
+        self.background = None
+
+    def clear(self):
+        self.reset()
+        self.refresh()
+
+    def attach(self, canvas):
+        # 从图表池取出后接到新窗口的画布上（draw_event 回调保存在 Figure 上，不需要重新连接）
+        self.canvas = canvas
+        self.background = None
+        self.needs_layout = True
+
+    def visible_extent(self):
+        # 所有动态元素的数据范围 (xmin, xmax, ymin, ymax)
+        xs, ys = [], []
+        for extent in (self.data_extent, self.channel_extent):
+            if extent is not None:
+                xs.append(extent[:2])
+                ys.append(extent[2:])
+        if self.curve.get_visible():
+            t_curve, T_curve = self.curve.get_data()
+            xs += [np.asarray(t_curve), self.time_line.get_xdata()]
+            ys += [np.asarray(T_curve), self.target_line.get_ydata()]
+        if not xs:
+            return None
+        x = np.concatenate([np.ravel(v) for v in xs]).astype(float)
+        y = np.concatenate([np.ravel(v) for v in ys]).astype(float)
+        return x.min(), x.max(), y.min(), y.max()
+
+    def rescale(self):
+        # 数据超出当前坐标范围时扩大范围并预留余量（需要整体重绘）
+        extent = self.visible_extent()
+        if extent is None:
+            return
+        xmin, xmax, ymin, ymax = extent
+        (x0, x1), (y0, y1) = self.ax.get_xlim(), self.ax.get_ylim()
+        if self.background is not None and x0 <= xmin and xmax <= x1 and y0 <= ymin and ymax <= y1:
+            return
+        dx = (xmax - xmin) * HEADROOM or 1.0
+        dy = (ymax - ymin) * HEADROOM or 1.0
+        self.ax.set_xlim(xmin - dx, xmax + dx)
+        self.ax.set_ylim(ymin - dy, ymax + dy)
+        self.background = None
+
+    def refresh(self):
+        # 坐标范围或开始时间变化时整体重绘（draw_event 中重新缓存背景），否则只 blit 动态元素
+        self.rescale()
+        self.update_points()
+        if self.background is None:
+            if self.needs_layout:
+                self.figure.tight_layout()
+                self.needs_layout = False
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        self.draw_animated()
+        self.canvas.blit(self.figure.bbox)
+
+    def on_draw(self, event):
+        # 每次完整重绘（包括窗口缩放）后缓存不含动态元素的背景，再画上动态元素
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.update_points()
+        self.draw_animated()
+
+    def draw_animated(self):
+        for artist in self.animated:
+            if artist.get_visible():
+                self.ax.draw_artist(artist)
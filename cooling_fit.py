@@ -0,0 +1,621 @@
+# 作者：Zack
+# 日期：2026/10/18
+# 冷却拟合引擎：不依赖Tk，可单独拟合一条冷却记录，也可一次性批量拟合多条记录
+# 模型：T(t) = T_env + (T0 - T_env) * exp(-k * t)，即 log(T - T_env) = log(T0 - T_env) - k * t
+# 环境温度未知时可用三参数拟合（fit_cooling_ambient）由数据一并估计；fit_cooling_robust 可剔除离群读数
+
+import argparse
+import csv
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+import numpy as np
+from log_import import load_log
+from timestamps import elapsed_minutes
+
+LOG_EXTENSIONS = (".txt", ".csv", ".log")
+FIT_CACHE_SIZE = 64
+AMBIENT_MAX_ITER = 50  # 三参数拟合的最大迭代次数
+AMBIENT_TOL = 1e-10
+ROBUST_MAX_ITER = 20  # 迭代加权最小二乘的最大迭代次数
+ROBUST_TOL = 1e-8
+HUBER_C = 1.345
+OUTLIER_THRESHOLD = 4.0  # 残差超过该倍数的稳健尺度即判为离群点
+ROBUST_MIN_SCALE = 1.0  # 残差尺度的下限 (℃)，数据点很少或读数取整时避免把正常点判为离群
+ROBUST_MODEL_TOLERANCE = 0.005  # 相对模型误差：温差的该比例以内的偏离（如辐射造成的曲率）不算离群
+RANSAC_TRIALS = 500
+RANSAC_SCORE_POINTS = 20000  # 数据点更多时只在随机抽取的这些点上给候选直线打分
+ROBUST_BATCH_ELEMENTS = 4_000_000  # RANSAC 每批 (候选数 × 数据点数) 的上限
+
+
+def predict_cooling_time(k, T0, T_env, T_target):
+    # 由拟合参数计算冷却到目标温度所需时间，支持数组广播，无法到达时返回nan
+    k = np.asarray(k, dtype=float)
+    ratio = (np.asarray(T_target, dtype=float) - T_env) / (np.asarray(T0, dtype=float) - T_env)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_cool = np.where((ratio > 0) & (k > 0), -np.log(np.where(ratio > 0, ratio, 1.0)) / k, np.nan)
+    return t_cool
+
+
+def fit_cooling_batch(t_runs, T_runs, T_env, T_target=None):
+    # 批量拟合：t_runs/T_runs 为长度不一的多条记录，T_env/T_target 可为标量或每条记录一个值
+    # 所有回归通过分段求和一次性求解（中心化后的正规方程），不逐条调用 polyfit
+    n_runs = len(t_runs)
+    lengths = np.array([len(t) for t in t_runs], dtype=np.int64)
+    if n_runs == 0:
+        empty = np.zeros(0)
+        return {"k": empty, "T0": empty, "t_cool": empty, "rss": empty, "rmse": empty,
+                "n": lengths, "residuals": [], "errors": []}
+
+    t_all = np.concatenate([np.asarray(t, dtype=float).ravel() for t in t_runs])
+    T_all = np.concatenate([np.asarray(T, dtype=float).ravel() for T in T_runs])
+    if len(t_all) != len(T_all):
+        raise ValueError("时间与温度数据长度不一致")
+    run_idx = np.repeat(np.arange(n_runs), lengths)
+    env = np.broadcast_to(np.asarray(T_env, dtype=float), (n_runs,))
+
+    # 数据验证
+    dT = T_all - env[run_idx]
+    below_env = np.bincount(run_idx, weights=(dT <= 0), minlength=n_runs) > 0
+    too_short = lengths < 2
+
+    # 分段中心化求和
+    n = np.maximum(lengths, 1)
+    y_all = np.log(np.where(dT > 0, dT, 1.0))
+    t_mean = np.bincount(run_idx, weights=t_all, minlength=n_runs) / n
+    y_mean = np.bincount(run_idx, weights=y_all, minlength=n_runs) / n
+    tc = t_all - t_mean[run_idx]
+    yc = y_all - y_mean[run_idx]
+    Stt = np.bincount(run_idx, weights=tc * tc, minlength=n_runs)
+    Sty = np.bincount(run_idx, weights=tc * yc, minlength=n_runs)
+    degenerate = Stt <= 0
+
+    slope = Sty / np.where(degenerate, 1.0, Stt)
+    intercept = y_mean - slope * t_mean
+    resid = yc - slope[run_idx] * tc
+    rss = np.bincount(run_idx, weights=resid * resid, minlength=n_runs)
+
+    k = -slope
+    T0 = np.exp(intercept) + env
+    bad_k = k <= 0
+
+    errors = [None] * n_runs
+    for i in np.flatnonzero(too_short | below_env | degenerate | bad_k):
+        if too_short[i]:
+            errors[i] = "至少需要两个数据点"
+        elif below_env[i]:
+            errors[i] = "所有温度必须高于环境温度"
+        elif degenerate[i]:
+            errors[i] = "计算错误: 时间数据没有变化"
+        else:
+            errors[i] = "无效的冷却常数，请检查数据"
+    failed = np.array([e is not None for e in errors])
+    k = np.where(failed, np.nan, k)
+    T0 = np.where(failed, np.nan, T0)
+    rss = np.where(failed, np.nan, rss)
+
+    if T_target is None:
+        t_cool = np.full(n_runs, np.nan)
+    else:
+        target = np.broadcast_to(np.asarray(T_target, dtype=float), (n_runs,))
+        t_cool = predict_cooling_time(k, T0, env, target)
+        for i in np.flatnonzero(~failed & (target <= env)):
+            errors[i] = "目标温度必须高于环境温度"
+        for i in np.flatnonzero(~failed & (target > env) & np.isnan(t_cool)):
+            errors[i] = "无法达到目标温度"
+
+    return {
+        "k": k,
+        "T0": T0,
+        "t_cool": t_cool,
+        "rss": rss,
+        "rmse": np.sqrt(rss / n),
+        "n": lengths,
+        "residuals": np.split(resid, np.cumsum(lengths)[:-1]),
+        "errors": errors,
+    }
+
+
+def fit_cooling_envs(t, T, envs):
+    # 同一组数据在多个环境温度下的拟合：设计矩阵相同，各环境温度作为多列右端项一次矩阵乘法求解
+    # 返回 k, T0 数组（长度同 envs）和每个环境温度的错误信息列表
+    t = np.asarray(t, dtype=float).ravel()
+    T = np.asarray(T, dtype=float).ravel()
+    envs = np.atleast_1d(np.asarray(envs, dtype=float))
+    errors = [None] * len(envs)
+    if len(t) < 2:
+        return np.full(len(envs), np.nan), np.full(len(envs), np.nan), ["至少需要两个数据点"] * len(envs)
+
+    dT = T[:, None] - envs[None, :]
+    below_env = np.any(dT <= 0, axis=0)
+    Y = np.log(np.where(dT > 0, dT, 1.0))
+    tc = t - t.mean()
+    Stt = tc @ tc
+    if Stt <= 0:
+        return np.full(len(envs), np.nan), np.full(len(envs), np.nan), ["计算错误: 时间数据没有变化"] * len(envs)
+    y_mean = Y.mean(axis=0)
+    slope = tc @ (Y - y_mean) / Stt
+    k = -slope
+    T0 = np.exp(y_mean - slope * t.mean()) + envs
+
+    for i in range(len(envs)):
+        if below_env[i]:
+            errors[i] = "所有温度必须高于环境温度"
+        elif k[i] <= 0:
+            errors[i] = "无效的冷却常数，请检查数据"
+    failed = np.array([e is not None for e in errors])
+    return np.where(failed, np.nan, k), np.where(failed, np.nan, T0), errors
+
+
+def fit_cooling_channels(t, T, T_env, T_target=None):
+    # 多通道拟合：同一时间列上的多个热电偶 T (数据点数, 通道数)，设计矩阵相同，
+    # 各通道作为多列右端项一次矩阵乘法求解；返回 k, T0, t_cool 数组（长度为通道数）和每个通道的错误信息
+    t = np.asarray(t, dtype=float).ravel()
+    T = np.asarray(T, dtype=float).reshape(len(t), -1)
+    m = T.shape[1]
+    k, T0 = np.full(m, np.nan), np.full(m, np.nan)
+    t_cool = np.full(m, np.nan)
+    if len(t) < 2:
+        return k, T0, t_cool, ["至少需要两个数据点"] * m
+    tc = t - t.mean()
+    Stt = tc @ tc
+    if Stt <= 0:
+        return k, T0, t_cool, ["计算错误: 时间数据没有变化"] * m
+
+    dT = T - T_env
+    below_env = np.any(dT <= 0, axis=0)
+    Y = np.log(np.where(dT > 0, dT, 1.0))
+    y_mean = Y.mean(axis=0)
+    slope = tc @ (Y - y_mean) / Stt
+    k = -slope
+    T0 = np.exp(y_mean - slope * t.mean()) + T_env
+
+    errors = [None] * m
+    for i in range(m):
+        if below_env[i]:
+            errors[i] = "所有温度必须高于环境温度"
+        elif k[i] <= 0:
+            errors[i] = "无效的冷却常数，请检查数据"
+    failed = np.array([e is not None for e in errors])
+    k = np.where(failed, np.nan, k)
+    T0 = np.where(failed, np.nan, T0)
+    if T_target is not None:
+        t_cool = predict_cooling_time(k, T0, T_env, T_target)
+        for i in np.flatnonzero(~failed):
+            if T_target <= T_env:
+                errors[i] = "目标温度必须高于环境温度"
+            elif np.isnan(t_cool[i]):
+                errors[i] = "无法达到目标温度"
+    return k, T0, t_cool, errors
+
+
+def segment_solve(A, b):
+    # 每条记录一个小线性方程组 A[i] x = b[i]，奇异的记录返回 nan
+    x = np.full(b.shape, np.nan)
+    ok = np.abs(np.linalg.det(A)) > 1e-300
+    if np.any(ok):
+        x[ok] = np.linalg.solve(A[ok], b[ok][..., None])[..., 0]
+    return x
+
+
+def ambient_initial_guess(tau, T_all, run_idx, starts, n_runs):
+    # 线性化初值：dT/dt = -k (T - T_env) 积分得 T = c - k ∫T dt + k T_env τ
+    # 对任意采样间隔都成立，每条记录一次 3×3 最小二乘；返回 k、T_env 的初值
+    inc = np.zeros(len(T_all))
+    inc[1:] = np.diff(tau) * (T_all[1:] + T_all[:-1]) / 2
+    inc[starts] = 0
+    cum = np.cumsum(inc)
+    I = cum - cum[starts][run_idx]
+
+    cols = (np.ones(len(T_all)), I, tau)
+    A = np.empty((n_runs, 3, 3))
+    b = np.empty((n_runs, 3))
+    for i in range(3):
+        b[:, i] = np.bincount(run_idx, weights=cols[i] * T_all, minlength=n_runs)
+        for j in range(i, 3):
+            A[:, i, j] = A[:, j, i] = np.bincount(run_idx, weights=cols[i] * cols[j], minlength=n_runs)
+    coef = segment_solve(A, b)
+    k = -coef[:, 1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        T_env = coef[:, 2] / k
+    return k, T_env
+
+
+def ambient_projection(k, tau, T_all, run_idx, n_runs):
+    # k 固定时 T_env 和幅值 A 是线性参数，每条记录一个 2×2 最小二乘
+    e = np.exp(-k[run_idx] * tau)
+    n = np.bincount(run_idx, minlength=n_runs).astype(float)
+    Se = np.bincount(run_idx, weights=e, minlength=n_runs)
+    See = np.bincount(run_idx, weights=e * e, minlength=n_runs)
+    ST = np.bincount(run_idx, weights=T_all, minlength=n_runs)
+    SeT = np.bincount(run_idx, weights=e * T_all, minlength=n_runs)
+    det = n * See - Se * Se
+    with np.errstate(divide="ignore", invalid="ignore"):
+        T_env = (See * ST - Se * SeT) / det
+        amp = (n * SeT - Se * ST) / det
+    return T_env, amp
+
+
+def fit_cooling_ambient_batch(t_runs, T_runs, T_target=None, init=None, max_iter=AMBIENT_MAX_ITER):
+    # 三参数批量拟合：T(t) = T_env + (T0 - T_env) * exp(-k * t)，环境温度也由数据估计
+    # 线性化给出初值（init=(k, T0, T_env) 时用上一次的拟合结果热启动），再做 Levenberg-Marquardt 迭代，
+    # 解析雅可比；所有记录同时迭代，每一步的 3×3 正规方程由分段求和得到
+    n_runs = len(t_runs)
+    lengths = np.array([len(t) for t in t_runs], dtype=np.int64)
+    if n_runs == 0:
+        empty = np.zeros(0)
+        return {"k": empty, "T0": empty, "T_env": empty, "t_cool": empty, "rss": empty, "rmse": empty,
+                "n": lengths, "iterations": 0, "errors": []}
+
+    t_all = np.concatenate([np.asarray(t, dtype=float).ravel() for t in t_runs])
+    T_all = np.concatenate([np.asarray(T, dtype=float).ravel() for T in T_runs])
+    if len(t_all) != len(T_all):
+        raise ValueError("时间与温度数据长度不一致")
+    too_short = lengths < 3
+    if np.any(too_short):
+        # 数据点不足的记录（包括空记录）不参加拟合，只对其余记录拟合后按原顺序填回
+        ok = np.flatnonzero(~too_short)
+        if T_target is not None:
+            T_target = np.broadcast_to(np.asarray(T_target, dtype=float), (n_runs,))[ok]
+        if init is not None:
+            init = tuple(np.broadcast_to(np.asarray(p, dtype=float), (n_runs,))[ok] for p in init)
+        sub = fit_cooling_ambient_batch([t_runs[i] for i in ok], [T_runs[i] for i in ok], T_target, init, max_iter)
+        result = {"n": lengths, "iterations": sub["iterations"], "errors": ["至少需要三个数据点"] * n_runs}
+        for key in ("k", "T0", "T_env", "t_cool", "rss", "rmse"):
+            result[key] = np.full(n_runs, np.nan)
+            result[key][ok] = sub[key]
+        for i, msg in zip(ok, sub["errors"]):
+            result["errors"][i] = msg
+        return result
+    run_idx = np.repeat(np.arange(n_runs), lengths)
+    starts = np.r_[0, np.cumsum(lengths)[:-1]]
+    valid = ~too_short
+    # 每条记录的时间从自己的第一个点算起，指数项不会因时间原点过大而溢出
+    t_start = np.zeros(n_runs)
+    t_start[valid] = t_all[starts[valid]]
+    tau = t_all - t_start[run_idx]
+    span = np.bincount(run_idx, weights=tau * tau, minlength=n_runs)
+    degenerate = valid & (span <= 0)
+
+    if init is None:
+        k, _ = ambient_initial_guess(tau, T_all, run_idx, np.minimum(starts, len(t_all) - 1), n_runs)
+    else:
+        k = np.broadcast_to(np.asarray(init[0], dtype=float), (n_runs,)).copy()
+    # 线性化失败（数据接近直线或噪声较大）时按记录时长取一个保守的初值
+    duration = np.maximum(np.sqrt(span / np.maximum(lengths, 1)), 1e-9)
+    bad_init = ~np.isfinite(k) | (k <= 0)
+    k[bad_init] = 1.0 / duration[bad_init]
+    T_env, amp = ambient_projection(k, tau, T_all, run_idx, n_runs)
+    if init is not None:
+        T_env = np.broadcast_to(np.asarray(init[2], dtype=float), (n_runs,)).copy()
+        amp = (np.broadcast_to(np.asarray(init[1], dtype=float), (n_runs,)) - T_env) * np.exp(-k * t_start)
+
+    def residuals(k, T_env, amp):
+        e = np.exp(-k[run_idx] * tau)
+        r = T_all - T_env[run_idx] - amp[run_idx] * e
+        return e, r, np.bincount(run_idx, weights=r * r, minlength=n_runs)
+
+    e, r, rss = residuals(k, T_env, amp)
+    lam = np.full(n_runs, 1e-3)
+    active = valid & ~degenerate & np.isfinite(rss)
+    iterations = 0
+    for iterations in range(1, max_iter + 1):
+        if not np.any(active):
+            break
+        # 雅可比列：∂/∂T_env = 1，∂/∂A = e，∂/∂k = -A τ e
+        cols = (np.ones(len(T_all)), e, -amp[run_idx] * tau * e)
+        JtJ = np.empty((n_runs, 3, 3))
+        Jtr = np.empty((n_runs, 3))
+        for i in range(3):
+            Jtr[:, i] = np.bincount(run_idx, weights=cols[i] * r, minlength=n_runs)
+            for j in range(i, 3):
+                JtJ[:, i, j] = JtJ[:, j, i] = np.bincount(run_idx, weights=cols[i] * cols[j], minlength=n_runs)
+        damped = JtJ + lam[:, None, None] * JtJ * np.eye(3)
+        step = segment_solve(damped, Jtr)
+        step[~active] = 0
+        step = np.nan_to_num(step)
+
+        k_new = k + step[:, 2]
+        trial_T_env = T_env + step[:, 0]
+        trial_amp = amp + step[:, 1]
+        e_new, r_new, rss_new = residuals(np.where(k_new > 0, k_new, k), trial_T_env, trial_amp)
+        accept = active & (k_new > 0) & np.isfinite(rss_new) & (rss_new <= rss)
+
+        # 收敛判据：相对残差变化或相对步长足够小
+        small = (np.abs(rss - rss_new) <= AMBIENT_TOL * np.maximum(rss, 1e-300)) | \
+                (np.abs(step[:, 2]) <= AMBIENT_TOL * np.abs(k))
+        k = np.where(accept, k_new, k)
+        T_env = np.where(accept, trial_T_env, T_env)
+        amp = np.where(accept, trial_amp, amp)
+        rss = np.where(accept, rss_new, rss)
+        keep = accept[run_idx]
+        e = np.where(keep, e_new, e)
+        r = np.where(keep, r_new, r)
+        lam = np.where(accept, lam / 10, np.minimum(lam * 10, 1e12))
+        active &= ~(accept & small) & (lam < 1e12)
+
+    T0 = T_env + amp * np.exp(k * t_start)
+
+    errors = [None] * n_runs
+    bad = ~np.isfinite(k) | (k <= 0) | ~np.isfinite(T_env) | (amp <= 0)
+    for i in np.flatnonzero(too_short | degenerate | bad):
+        if too_short[i]:
+            errors[i] = "至少需要三个数据点"
+        elif degenerate[i]:
+            errors[i] = "计算错误: 时间数据没有变化"
+        else:
+            errors[i] = "无效的冷却常数，请检查数据"
+    failed = np.array([msg is not None for msg in errors])
+    k = np.where(failed, np.nan, k)
+    T0 = np.where(failed, np.nan, T0)
+    T_env = np.where(failed, np.nan, T_env)
+    rss = np.where(failed, np.nan, rss)
+
+    if T_target is None:
+        t_cool = np.full(n_runs, np.nan)
+    else:
+        target = np.broadcast_to(np.asarray(T_target, dtype=float), (n_runs,))
+        t_cool = predict_cooling_time(k, T0, T_env, target)
+        for i in np.flatnonzero(~failed & np.isnan(t_cool)):
+            if target[i] <= T_env[i]:
+                errors[i] = f"目标温度低于估计的环境温度 ({T_env[i]:.1f} ℃)"
+            else:
+                errors[i] = "无法达到目标温度"
+
+    return {
+        "k": k,
+        "T0": T0,
+        "T_env": T_env,
+        "t_cool": t_cool,
+        "rss": rss,
+        "rmse": np.sqrt(rss / np.maximum(lengths, 1)),
+        "n": lengths,
+        "iterations": iterations,
+        "errors": errors,
+    }
+
+
+def fit_cooling_ambient(t, T, T_target, init=None):
+    # 单条记录的三参数拟合，返回 k, T0, T_env, t_cool, 错误信息；init 为上一次的 (k, T0, T_env)
+    result = fit_cooling_ambient_batch([t], [T], T_target, init)
+    if result["errors"][0]:
+        return None, None, None, None, result["errors"][0]
+    return (float(result["k"][0]), float(result["T0"][0]), float(result["T_env"][0]),
+            float(result["t_cool"][0]), None)
+
+
+def weighted_line(t, y, w):
+    # 加权最小二乘直线 y = a + b * t（中心化正规方程），返回 b, a
+    sw = w.sum()
+    t_mean = (w * t).sum() / sw
+    y_mean = (w * y).sum() / sw
+    tc = t - t_mean
+    Stt = (w * tc * tc).sum()
+    b = (w * tc * (y - y_mean)).sum() / Stt if Stt > 0 else np.nan
+    return b, y_mean - b * t_mean
+
+
+def robust_scale(r):
+    # 残差的稳健尺度（中位数绝对偏差），不小于 ROBUST_MIN_SCALE
+    return max(1.4826 * np.median(np.abs(r - np.median(r))), ROBUST_MIN_SCALE)
+
+
+def point_scale(s, dT):
+    # 每个点的残差尺度 (℃)：测量噪声与相对模型误差合成
+    return np.sqrt(s * s + (ROBUST_MODEL_TOLERANCE * dT) ** 2)
+
+
+def huber_line(t, y, dT, max_iter=ROBUST_MAX_ITER):
+    # 迭代加权最小二乘（Huber 权重），迭代次数有上限；返回 b, a, 残差尺度 (℃)
+    # 温度噪声在对数坐标下按 1/(T - T_env) 放大，残差换算回温度 (dT·r) 再判断，基础权重为 dT²
+    base = dT * dT / np.mean(dT * dT)
+    b, a = weighted_line(t, y, base)
+    for _ in range(max_iter):
+        r = dT * (y - a - b * t)
+        s = robust_scale(r)
+        u = np.abs(r) / (HUBER_C * point_scale(s, dT))
+        w = base * np.where(u > 1, 1 / np.maximum(u, 1e-300), 1.0)
+        b_new, a_new = weighted_line(t, y, w)
+        done = abs(b_new - b) <= ROBUST_TOL * max(abs(b), 1e-12) and abs(a_new - a) <= ROBUST_TOL * max(abs(a), 1.0)
+        b, a = b_new, a_new
+        if done:
+            break
+    return b, a, robust_scale(dT * (y - a - b * t))
+
+
+def ransac_line(t, y, dT, trials=RANSAC_TRIALS, seed=None):
+    # 向量化 RANSAC：随机取点对得到候选直线，全部候选的残差在一个 (候选数 × 点数) 的数组中一次算出，
+    # 以温度残差平方的中位数（LMedS）打分，不需要事先知道噪声大小；再用最优候选的内点做加权最小二乘
+    # 返回 b, a, 残差尺度 (℃)
+    n = len(t)
+    rng = np.random.default_rng(seed)
+    if n * (n - 1) // 2 <= trials:
+        i, j = np.triu_indices(n, 1)
+    else:
+        i = rng.integers(0, n, trials)
+        j = (i + rng.integers(1, n, trials)) % n
+    keep = t[i] != t[j]
+    i, j = i[keep], j[keep]
+    if len(i) == 0:
+        return np.nan, np.nan, np.nan
+    b = (y[j] - y[i]) / (t[j] - t[i])
+    a = y[i] - b * t[i]
+
+    sample = np.arange(n) if n <= RANSAC_SCORE_POINTS else rng.choice(n, RANSAC_SCORE_POINTS, replace=False)
+    ts, ys, dTs = t[sample], y[sample], dT[sample]
+    score = np.empty(len(b))
+    batch = max(1, ROBUST_BATCH_ELEMENTS // len(sample))
+    for start in range(0, len(b), batch):
+        stop = start + batch
+        r = dTs[None, :] * (ys[None, :] - a[start:stop, None] - b[start:stop, None] * ts[None, :])
+        score[start:stop] = np.median(r * r, axis=1)
+    best = np.argmin(score)
+
+    # LMedS 的尺度估计（含小样本修正），内点为残差不超过 OUTLIER_THRESHOLD 倍尺度的点
+    s = max(1.4826 * (1 + 5 / max(n - 2, 1)) * np.sqrt(score[best]), ROBUST_MIN_SCALE)
+    inliers = np.abs(dT * (y - a[best] - b[best] * t)) <= OUTLIER_THRESHOLD * point_scale(s, dT)
+    if inliers.sum() < 2:
+        return b[best], a[best], s
+    b_fit, a_fit = weighted_line(t, y, inliers * dT * dT / np.mean(dT * dT))
+    return b_fit, a_fit, s
+
+
+def fit_cooling_robust(t, T, T_env, method="huber", seed=None):
+    # 抗离群点的对数线性拟合：method="huber" 为迭代加权最小二乘，"ransac" 为向量化 RANSAC
+    # 低于环境温度的读数（如热电偶掉线）直接视为离群点；返回 k, T0, 离群点掩码, 错误信息
+    if method not in ("huber", "ransac"):
+        raise ValueError(f"不支持的稳健拟合方法: {method}")
+    t = np.asarray(t, dtype=float).ravel()
+    T = np.asarray(T, dtype=float).ravel()
+    valid = T > T_env
+    if valid.sum() < 2:
+        return None, None, ~valid, "至少需要两个高于环境温度的数据点"
+    tv = t[valid]
+    dT = T[valid] - T_env
+    y = np.log(dT)
+    if np.ptp(tv) <= 0:
+        return None, None, ~valid, "计算错误: 时间数据没有变化"
+
+    if method == "huber":
+        b, a, s = huber_line(tv, y, dT)
+    else:
+        b, a, s = ransac_line(tv, y, dT, seed=seed)
+    if not np.isfinite(b) or -b <= 0:
+        return None, None, ~valid, "无效的冷却常数，请检查数据"
+
+    # 离群判断在温度上进行：|T - 拟合值| 超过 OUTLIER_THRESHOLD 倍的该点残差尺度
+    outliers = ~valid
+    outliers[valid] = np.abs(dT - np.exp(a + b * tv)) > OUTLIER_THRESHOLD * point_scale(s, dT)
+    return -b, np.exp(a) + T_env, outliers, None
+
+
+def data_key(t, T):
+    # 数据内容的哈希，用作拟合缓存的键
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(t, dtype=float).tobytes())
+    digest.update(np.ascontiguousarray(T, dtype=float).tobytes())
+    return digest.hexdigest()
+
+
+class FitCache:
+    # 拟合结果缓存：键为 (数据哈希, 环境温度)，只修改目标温度时无需重新拟合，LRU 淘汰
+    def __init__(self, max_entries=FIT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def fit(self, t, T, T_env, key=None):
+        # 返回 k, T0, 错误信息
+        k, T0, errors = self.fit_many(t, T, [T_env], key)
+        if errors[0]:
+            return None, None, errors[0]
+        return float(k[0]), float(T0[0]), None
+
+    def fit_many(self, t, T, envs, key=None):
+        # 多个环境温度：已缓存的直接返回，其余一次批量求解
+        if key is None:
+            key = data_key(t, T)
+        envs = np.atleast_1d(np.asarray(envs, dtype=float))
+        k = np.full(len(envs), np.nan)
+        T0 = np.full(len(envs), np.nan)
+        errors = [None] * len(envs)
+        missing = []
+        with self.lock:
+            for i, env in enumerate(envs):
+                entry = self.entries.get((key, float(env)))
+                if entry is None:
+                    missing.append(i)
+                else:
+                    self.entries.move_to_end((key, float(env)))
+                    k[i], T0[i], errors[i] = entry
+        if missing:
+            k_new, T0_new, errors_new = fit_cooling_envs(t, T, envs[missing])
+            with self.lock:
+                for j, i in enumerate(missing):
+                    k[i], T0[i], errors[i] = k_new[j], T0_new[j], errors_new[j]
+                    self.entries[(key, float(envs[i]))] = (k[i], T0[i], errors[i])
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return k, T0, errors
+
+
+FIT_CACHE = FitCache()
+
+
+def predict_cooling_grid(k, T0, envs, targets):
+    # 各环境温度的拟合参数 × 多个目标温度 -> 冷却时间矩阵 (len(envs), len(targets))
+    k = np.atleast_1d(np.asarray(k, dtype=float))[:, None]
+    T0 = np.atleast_1d(np.asarray(T0, dtype=float))[:, None]
+    envs = np.atleast_1d(np.asarray(envs, dtype=float))[:, None]
+    targets = np.atleast_1d(np.asarray(targets, dtype=float))[None, :]
+    t_cool = predict_cooling_time(k, T0, envs, targets)
+    return np.where(targets > envs, t_cool, np.nan)
+
+
+def fit_and_predict(t, T, T_env, T_target, cache=FIT_CACHE):
+    # 单条记录的拟合+预测，返回 k, T0, t_cool, 错误信息（与界面提示一致）
+    # 拟合结果按数据和环境温度缓存，只修改目标温度时直接复用
+    if cache is None:
+        k, T0, errors = fit_cooling_envs(t, T, [T_env])
+        k, T0, error_msg = float(k[0]), float(T0[0]), errors[0]
+    else:
+        k, T0, error_msg = cache.fit(t, T, T_env)
+    if error_msg:
+        return None, None, None, error_msg
+    if T_target <= T_env:
+        return None, None, None, "目标温度必须高于环境温度"
+    t_cool = float(predict_cooling_time(k, T0, T_env, T_target))
+    if np.isnan(t_cool):
+        return None, None, None, "无法达到目标温度"
+    return k, T0, t_cool, None
+
+
+def read_log(path):
+    # 读取一个日志文件，每行“时间 温度”，返回相对首个数据点的分钟数
+    # 时间可以是分钟数、时:分(:秒)、ISO 日期时间或 Unix 时间戳
+    t, T, error_msg = load_log(path)
+    if error_msg:
+        return None, None, error_msg
+    if len(t) == 0:
+        return None, None, "至少需要两个数据点"
+    if np.issubdtype(t.dtype, np.datetime64):
+        return elapsed_minutes(t), T, None
+    return t - t[0], T, None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量拟合目录中的炉子冷却日志")
+    parser.add_argument("directory", help="日志目录，每个文件一条冷却记录")
+    parser.add_argument("--env", type=float, default=8, help="环境温度 (℃)")
+    parser.add_argument("--target", type=float, default=80, help="目标温度 (℃)")
+    parser.add_argument("--auto-env", action="store_true", help="由数据估计环境温度（三参数拟合），忽略 --env")
+    args = parser.parse_args(argv)
+
+    names = sorted(name for name in os.listdir(args.directory) if name.lower().endswith(LOG_EXTENSIONS))
+    t_runs, T_runs, read_errors = [], [], []
+    for name in names:
+        t, T, error_msg = read_log(os.path.join(args.directory, name))
+        t_runs.append(t if t is not None else np.zeros(0))
+        T_runs.append(T if T is not None else np.zeros(0))
+        read_errors.append(error_msg)
+
+    if args.auto_env:
+        result = fit_cooling_ambient_batch(t_runs, T_runs, args.target)
+    else:
+        result = fit_cooling_batch(t_runs, T_runs, args.env, args.target)
+        result["T_env"] = np.full(len(names), args.env)
+
+    writer = csv.writer(sys.stdout)
+    writer.writerow(["file", "n", "k", "T0", "T_env", "t_cool", "rmse", "error"])
+    for i, name in enumerate(names):
+        error_msg = read_errors[i] or result["errors"][i] or ""
+        writer.writerow([name, result["n"][i], f"{result['k'][i]:.6g}", f"{result['T0'][i]:.6g}",
+                         f"{result['T_env'][i]:.6g}", f"{result['t_cool'][i]:.6g}", f"{result['rmse'][i]:.6g}",
+                         error_msg])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
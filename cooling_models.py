@@ -0,0 +1,194 @@
+# 作者：Zack
+# 日期：2026/10/18
+# 辐射+对流冷却模型：dT/dt = -r·T_REF·(θ⁴ - θ_env⁴) - h·(T - T_env)，θ 为以 T_REF 为单位的开尔文温度
+# 高温段以辐射为主、低温段以对流为主；与牛顿冷却模型（对数线性拟合）提供相同的拟合/预测接口
+
+import numpy as np
+from cooling_fit import fit_and_predict, fit_cooling_envs
+
+MODEL_NEWTON = "newton"
+MODEL_RADIATION = "radiation"
+MODEL_NAMES = {MODEL_NEWTON: "牛顿冷却", MODEL_RADIATION: "辐射+对流"}
+
+KELVIN = 273.15
+T_REF = 1000.0  # 辐射项的温度单位 (K)，使 r 和 h 的量级相近
+GRID_POINTS = 400  # 每组参数的积分网格点数
+TAIL_DEPTH = 1e-4  # 积分网格一直算到 T - T_env 降到初始温差的该比例，之后按指数尾部外推
+RADIATION_SHARE = 0.8  # 无热启动时，初值中辐射所占的比例
+MAX_ITER = 30
+TOL = 1e-9
+
+
+def cooling_rate(T, T_env, r, h):
+    # 降温速度 -dT/dt（℃/分钟）
+    theta = (T + KELVIN) / T_REF
+    theta_env = (T_env + KELVIN) / T_REF
+    return r * T_REF * (theta ** 4 - theta_env ** 4) + h * (T - T_env)
+
+
+def time_grid(params, T_env, n=GRID_POINTS):
+    # 方程不显含时间，冷却到温度 T 的时间 t(T) 是一个一维积分；在 u = ln(T - T_env) 上积分时被积函数
+    # (T - T_env) / 降温速度 有界且光滑，所有参数组在同一批数组运算中用梯形公式逐步累加
+    # 返回 u 网格和对应时间，形状均为 (参数组数, n)
+    T0, r, h = params[:, 0], params[:, 1], params[:, 2]
+    u0 = np.log(T0 - T_env)
+    # 网格按 s² 分布，温度变化最快的开始阶段更密
+    s = np.linspace(0, 1, n) ** 2
+    u = u0[:, None] + s[None, :] * np.log(TAIL_DEPTH)
+    T = T_env + np.exp(u)
+    g = np.exp(u) / cooling_rate(T, T_env, r[:, None], h[:, None])
+    dt = (g[:, 1:] + g[:, :-1]) / 2 * (u[:, :-1] - u[:, 1:])
+    t = np.zeros(u.shape)
+    np.cumsum(dt, axis=1, out=t[:, 1:])
+    return u, t
+
+
+def simulate(params, T_env, t):
+    # 多组参数 (T0, r, h) 在同一组时间点上的温度，形状 (参数组数, len(t))
+    params = np.atleast_2d(np.asarray(params, dtype=float))
+    t = np.asarray(t, dtype=float).ravel()
+    u, t_grid = time_grid(params, T_env)
+    m = len(params)
+
+    # 各行的时间网格都是递增的，加上行偏移后拼成一个递增序列，一次 np.interp 完成全部插值
+    t_end = t_grid[:, -1]
+    offset = np.zeros(m)
+    np.cumsum(t_end[:-1] + 1, out=offset[1:])
+    query = np.minimum(t[None, :], t_end[:, None]) + offset[:, None]
+    u_t = np.interp(query.ravel(), (t_grid + offset[:, None]).ravel(), u.ravel()).reshape(m, len(t))
+
+    # 网格之后按末端的线性化衰减率外推
+    T_end = T_env + np.exp(u[:, -1])
+    rate_end = cooling_rate(T_end, T_env, params[:, 1], params[:, 2]) / np.exp(u[:, -1])
+    beyond = np.maximum(t[None, :] - t_end[:, None], 0)
+    return T_env + np.exp(u_t - rate_end[:, None] * beyond)
+
+
+def time_to_target(params, T_env, T_target, n=GRID_POINTS):
+    # 冷却到目标温度所需时间（分钟），目标温度可为数组；无法到达时返回 nan
+    params = np.atleast_2d(np.asarray(params, dtype=float))
+    T_target = np.atleast_1d(np.asarray(T_target, dtype=float))
+    T0, r, h = params[:, 0:1], params[:, 1:2], params[:, 2:3]
+    reachable = T_target[None, :] > T_env
+    u_target = np.log(np.where(reachable, T_target[None, :] - T_env, 1.0))
+    u0 = np.log(T0 - T_env)
+    s = np.linspace(0, 1, n)
+    # (参数组, 目标温度, 网格点)
+    u = u_target[:, :, None] + (u0 - u_target)[:, :, None] * s
+    T = T_env + np.exp(u)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        g = np.exp(u) / cooling_rate(T, T_env, r[:, :, None], h[:, :, None])
+    t_cool = np.trapezoid(g, u, axis=2) if hasattr(np, "trapezoid") else np.trapz(g, u, axis=2)
+    return np.where(reachable & np.isfinite(t_cool), t_cool, np.nan)
+
+
+def initial_params(t, T, T_env):
+    # 用对数线性拟合的 k、T0 作初值，按数据平均温度处的等效衰减率把 k 分给辐射和对流两项
+    k, T0, errors = fit_cooling_envs(t, T, [T_env])
+    if errors[0]:
+        return None, errors[0]
+    k, T0 = float(k[0]), float(T0[0])
+    T_mean = float(np.mean(T))
+    radiation = cooling_rate(T_mean, T_env, 1.0, 0.0) / (T_mean - T_env)
+    return np.array([T0, RADIATION_SHARE * k / radiation, (1 - RADIATION_SHARE) * k]), None
+
+
+def fit_radiative(t, T, T_env, init=None, max_iter=MAX_ITER):
+    # 有界非线性最小二乘（r、h ≥ 0）：Levenberg-Marquardt，每次迭代把基准参数和三组扰动参数一起积分，
+    # 差分得到雅可比；init 为上一次的 (T0, r, h)，实时追加读数时从上次结果热启动，通常几步即收敛
+    # 返回 params (T0, r, h)、残差平方和、错误信息
+    t = np.asarray(t, dtype=float).ravel()
+    T = np.asarray(T, dtype=float).ravel()
+    if len(t) < 3:
+        return None, None, "至少需要三个数据点"
+    if np.any(T <= T_env):
+        return None, None, "所有温度必须高于环境温度"
+    if np.ptp(t) <= 0:
+        return None, None, "计算错误: 时间数据没有变化"
+
+    if init is None:
+        p, error_msg = initial_params(t, T, T_env)
+        if error_msg:
+            return None, None, error_msg
+    else:
+        p = np.array(init, dtype=float)
+        p[0] = max(p[0], np.max(T) + 1e-6)  # 热启动的初始温度不低于观测到的最高温度（冷却曲线从最高点开始）
+        p[1:] = np.maximum(p[1:], 0)
+
+    scale = np.array([max(abs(p[0] - T_env), 1.0), max(p[1], 1e-9), max(p[2], 1e-9)]) * 1e-6
+    scale[1:] = max(scale[1], scale[2])
+    rss = np.sum((T - simulate(p, T_env, t)[0]) ** 2)
+    lam = 1e-3
+    for _ in range(max_iter):
+        # 一次积分：基准参数 + 三组扰动参数
+        trial_sets = p + np.vstack([np.zeros(3), np.diag(scale)])
+        model = simulate(trial_sets, T_env, t)
+        resid = T - model[0]
+        J = (model[1:] - model[0]).T / scale
+        JtJ = J.T @ J
+        Jtr = J.T @ resid
+        try:
+            step = np.linalg.solve(JtJ + lam * np.diag(np.diag(JtJ)), Jtr)
+        except np.linalg.LinAlgError:
+            break
+        # 投影到边界：辐射、对流系数非负，初始温度高于环境温度
+        p_new = p + step
+        p_new[1:] = np.maximum(p_new[1:], 0)
+        p_new[0] = max(p_new[0], T_env + 1e-6)
+        if p_new[1] == 0 and p_new[2] == 0:
+            lam *= 10
+            continue
+        rss_new = np.sum((T - simulate(p_new, T_env, t)[0]) ** 2)
+        if np.isfinite(rss_new) and rss_new <= rss:
+            converged = rss - rss_new <= TOL * max(rss, 1e-300)
+            p, rss = p_new, rss_new
+            lam /= 10
+            if converged:
+                break
+        else:
+            lam *= 10
+            if lam > 1e12:
+                break
+
+    if not np.all(np.isfinite(p)) or (p[1] <= 0 and p[2] <= 0):
+        return None, None, "无效的冷却常数，请检查数据"
+    return p, rss, None
+
+
+def fit_and_predict_model(model, t, T, T_env, T_target, init=None):
+    # 统一的拟合+预测接口，返回 params, t_cool, 错误信息
+    # 牛顿冷却：params = (k, T0)；辐射+对流：params = (T0, r, h)
+    if model == MODEL_NEWTON:
+        k, T0, t_cool, error_msg = fit_and_predict(t, T, T_env, T_target)
+        if error_msg:
+            return None, None, error_msg
+        return np.array([k, T0]), t_cool, None
+    if model != MODEL_RADIATION:
+        raise ValueError(f"不支持的冷却模型: {model}")
+
+    params, _, error_msg = fit_radiative(t, T, T_env, init)
+    if error_msg:
+        return None, None, error_msg
+    if T_target <= T_env:
+        return None, None, "目标温度必须高于环境温度"
+    t_cool = float(time_to_target(params, T_env, T_target)[0, 0])
+    if np.isnan(t_cool):
+        return None, None, "无法达到目标温度"
+    return params, t_cool, None
+
+
+def predict_curve(model, params, T_env, t):
+    # 给定时间点上的预测温度
+    if model == MODEL_NEWTON:
+        k, T0 = params
+        return T_env + (T0 - T_env) * np.exp(-k * np.asarray(t, dtype=float))
+    return simulate(params, T_env, t)[0]
+
+
+def predict_grid(params_list, envs, targets):
+    # 辐射+对流模型：各环境温度的拟合参数 × 多个目标温度 -> 冷却时间矩阵 (len(envs), len(targets))
+    grid = np.full((len(envs), len(targets)), np.nan)
+    for i, (params, env) in enumerate(zip(params_list, envs)):
+        if params is not None:
+            grid[i] = time_to_target(params, env, targets)[0]
+    return grid
@@ -0,0 +1,308 @@
+# 作者：Zack
+# 日期：2026/10/18
+# 在线冷却估计器：每追加一个读数只更新几个累加量，O(1) 时间和内存得到新的 k、T0 和预测冷却时间
+# 可选指数遗忘因子 forgetting (0~1]，越小越看重最近的读数；等价于带遗忘的递推最小二乘
+# 也可只用最近一段数据：按时间/点数的滑动窗口或按时间的指数衰减，窗口大小可按留出预测误差自动选择
+# 传入历史先验（cooling_prior.history_prior）时，系数取共轭后验的均值，一个读数即可给出预测
+
+from collections import deque
+import numpy as np
+from cooling_fit import predict_cooling_time
+from cooling_prior import posterior
+
+WINDOW_MINUTES = "minutes"
+WINDOW_POINTS = "points"
+WINDOW_DECAY = "decay"
+WINDOW_NAMES = {None: "全部数据", WINDOW_MINUTES: "最近N分钟", WINDOW_POINTS: "最近N个读数", WINDOW_DECAY: "指数衰减(半衰期分钟)"}
+WINDOW_CANDIDATES = {
+    WINDOW_MINUTES: (30, 60, 120, 240, 480, 960, 1920),
+    WINDOW_POINTS: (10, 20, 50, 100, 200, 500, 1000, 5000),
+    WINDOW_DECAY: (30, 60, 120, 240, 480, 960, 1920),
+}
+WINDOW_RECOMPUTE = 1024  # 移出窗口的读数累计超过窗口长度（且不少于该值）时重算累加量
+WINDOW_MAX_CUTS = 40  # 自动选择窗口时的截止点数
+WINDOW_BATCH_ELEMENTS = 4_000_000
+
+
+class OnlineCoolingEstimator:
+    def __init__(self, T_env, forgetting=1.0, origin=None, prior=None):
+        if not 0 < forgetting <= 1:
+            raise ValueError("遗忘因子必须在 (0, 1] 范围内")
+        # 环境温度参与 log(T - T_env)，修改环境温度需要新建估计器
+        self.T_env = float(T_env)
+        self.forgetting = float(forgetting)
+        self.origin = origin
+        self.prior = prior
+        self.reset()
+
+    def reset(self):
+        # 时间原点默认取第一个读数，避免大时间值带来的精度损失；只用部分数据时可指定 origin，
+        # 使 T0 和冷却时间仍以整条记录的开始时间为原点
+        self.t_ref = None if self.origin is None else float(self.origin)
+        self.count = 0
+        self.S0 = self.St = self.Sy = self.Stt = self.Sty = self.Syy = 0.0
+
+    def update(self, t, T):
+        # 追加一个读数，返回错误信息（无错误时为 None）
+        dT = float(T) - self.T_env
+        if dT <= 0:
+            return "所有温度必须高于环境温度"
+        if self.t_ref is None:
+            self.t_ref = float(t)
+        x = float(t) - self.t_ref
+        y = np.log(dT)
+        lam = self.forgetting
+        self.S0 = lam * self.S0 + 1.0
+        self.St = lam * self.St + x
+        self.Sy = lam * self.Sy + y
+        self.Stt = lam * self.Stt + x * x
+        self.Sty = lam * self.Sty + x * y
+        self.Syy = lam * self.Syy + y * y
+        self.count += 1
+        return None
+
+    def update_many(self, t, T):
+        # 一次追加一批读数（向量化），用于从已有数据初始化
+        t = np.asarray(t, dtype=float).ravel()
+        T = np.asarray(T, dtype=float).ravel()
+        if len(t) == 0:
+            return None
+        dT = T - self.T_env
+        if np.any(dT <= 0):
+            return "所有温度必须高于环境温度"
+        if self.t_ref is None:
+            self.t_ref = float(t[0])
+        x = t - self.t_ref
+        y = np.log(dT)
+        n = len(t)
+        # 第 i 个读数在批末的权重为 lam^(n-1-i)，原有累加量整体衰减 lam^n
+        w = self.forgetting ** np.arange(n - 1, -1, -1, dtype=float)
+        decay = self.forgetting ** n
+        self.S0 = decay * self.S0 + w.sum()
+        self.St = decay * self.St + w @ x
+        self.Sy = decay * self.Sy + w @ y
+        self.Stt = decay * self.Stt + w @ (x * x)
+        self.Sty = decay * self.Sty + w @ (x * y)
+        self.Syy = decay * self.Syy + w @ (y * y)
+        self.count += n
+        return None
+
+    def posterior(self):
+        # 有先验时的后验 (均值, 协方差尺度, an, bn)，见 cooling_prior.posterior
+        return posterior(self.prior, self.S0, self.St, self.Sy, self.Stt, self.Sty, self.Syy)
+
+    def coefficients(self):
+        # 返回 log(T - T_env) = a + b * (t - t_ref) 的 (a, b)，数据不足时返回 None
+        if self.prior is not None and self.count >= 1:
+            a, b = self.posterior()[0]
+            return float(a), float(b)
+        if self.count < 2:
+            return None
+        var_t = self.Stt - self.St * self.St / self.S0
+        if var_t <= 0:
+            return None
+        b = (self.Sty - self.St * self.Sy / self.S0) / var_t
+        a = (self.Sy - b * self.St) / self.S0
+        return a, b
+
+    def rmse(self):
+        # 加权残差均方根（对数空间）
+        coeffs = self.coefficients()
+        if coeffs is None:
+            return None
+        a, b = coeffs
+        rss = (self.Syy - 2 * a * self.Sy - 2 * b * self.Sty
+               + a * a * self.S0 + 2 * a * b * self.St + b * b * self.Stt)
+        return float(np.sqrt(max(rss, 0.0) / self.S0))
+
+    def result(self, T_target):
+        # 返回 k, T0, t_cool, 错误信息；T0 和 t_cool 以时间原点为准（与 fit_and_predict 一致）
+        if self.count < (1 if self.prior is not None else 2):
+            return None, None, None, "至少需要两个数据点"
+        coeffs = self.coefficients()
+        if coeffs is None:
+            return None, None, None, "计算错误: 时间数据没有变化"
+        a, b = coeffs
+        k = -b
+        if k <= 0:
+            return None, None, None, "无效的冷却常数，请检查数据"
+        if T_target <= self.T_env:
+            return None, None, None, "目标温度必须高于环境温度"
+        T0 = float(np.exp(a) + self.T_env)
+        t_cool = float(predict_cooling_time(k, T0, self.T_env, T_target))
+        if np.isnan(t_cool):
+            return None, None, None, "无法达到目标温度"
+        return float(k), T0, t_cool, None
+
+
+class WindowedCoolingEstimator(OnlineCoolingEstimator):
+    # 窗口估计器：mode 为 WINDOW_MINUTES（最近 size 分钟）、WINDOW_POINTS（最近 size 个读数）
+    # 或 WINDOW_DECAY（按时间指数衰减，半衰期 size 分钟）
+    # 滑动窗口时新读数加入累加量、移出窗口的读数从累加量中减去，每个读数均摊 O(1)；
+    # 减法累积的舍入误差通过定期按窗口内数据重算累加量消除
+    def __init__(self, T_env, mode, size, origin=None, prior=None):
+        if mode not in (WINDOW_MINUTES, WINDOW_POINTS, WINDOW_DECAY):
+            raise ValueError(f"不支持的窗口类型: {mode}")
+        if not size > 0:
+            raise ValueError("窗口大小必须大于 0")
+        self.mode = mode
+        self.size = float(size)
+        super().__init__(T_env, origin=origin, prior=prior)
+
+    def reset(self):
+        super().reset()
+        self.window = deque()
+        self.evicted = 0
+        self.t_last = None
+
+    def accumulate(self, x, y, sign):
+        self.S0 += sign
+        self.St += sign * x
+        self.Sy += sign * y
+        self.Stt += sign * x * x
+        self.Sty += sign * x * y
+        self.Syy += sign * y * y
+
+    def decay_to(self, t):
+        # 指数衰减：把已有累加量衰减到时间 t（乱序的旧读数不会放大已有权重）
+        if self.t_last is not None:
+            factor = 0.5 ** (max(t - self.t_last, 0.0) / self.size)
+            self.S0 *= factor
+            self.St *= factor
+            self.Sy *= factor
+            self.Stt *= factor
+            self.Sty *= factor
+            self.Syy *= factor
+        self.t_last = t if self.t_last is None else max(t, self.t_last)
+
+    def expired(self, x):
+        if self.mode == WINDOW_POINTS:
+            return len(self.window) > self.size
+        return x - self.window[0][0] > self.size
+
+    def update(self, t, T):
+        dT = float(T) - self.T_env
+        if dT <= 0:
+            return "所有温度必须高于环境温度"
+        if self.t_ref is None:
+            self.t_ref = float(t)
+        x = float(t) - self.t_ref
+        y = float(np.log(dT))
+        if self.mode == WINDOW_DECAY:
+            self.decay_to(x)
+            self.accumulate(x, y, 1.0)
+            self.count += 1
+            return None
+
+        self.window.append((x, y))
+        self.accumulate(x, y, 1.0)
+        while len(self.window) > 1 and self.expired(x):
+            x0, y0 = self.window.popleft()
+            self.accumulate(x0, y0, -1.0)
+            self.evicted += 1
+        self.count = len(self.window)
+        if self.evicted > max(len(self.window), WINDOW_RECOMPUTE):
+            self.recompute()
+        return None
+
+    def recompute(self):
+        # 按窗口内的数据重新求累加量
+        x, y = np.array(self.window).T
+        self.S0 = float(len(x))
+        self.St, self.Sy = float(x.sum()), float(y.sum())
+        self.Stt, self.Sty, self.Syy = float(x @ x), float(x @ y), float(y @ y)
+        self.evicted = 0
+
+    def update_many(self, t, T):
+        # 一批读数（向量化）：只有最后一个窗口内的读数会留下
+        t = np.asarray(t, dtype=float).ravel()
+        T = np.asarray(T, dtype=float).ravel()
+        if len(t) == 0:
+            return None
+        dT = T - self.T_env
+        if np.any(dT <= 0):
+            return "所有温度必须高于环境温度"
+        if self.t_ref is None:
+            self.t_ref = float(t[0])
+        x = t - self.t_ref
+        y = np.log(dT)
+        if self.mode == WINDOW_DECAY:
+            x_last = float(np.max(x))
+            self.decay_to(x_last)
+            w = 0.5 ** ((x_last - x) / self.size)
+            self.S0 += w.sum()
+            self.St += w @ x
+            self.Sy += w @ y
+            self.Stt += w @ (x * x)
+            self.Sty += w @ (x * y)
+            self.Syy += w @ (y * y)
+            self.count += len(x)
+            return None
+
+        self.window.extend(zip(x.tolist(), y.tolist()))
+        while len(self.window) > 1 and self.expired(self.window[-1][0]):
+            self.window.popleft()
+        self.count = len(self.window)
+        self.recompute()
+        return None
+
+
+def window_sums(x, y, cuts, mode, size):
+    # 以每个截止点 cuts[i]（含）结束的窗口内的 (S0, St, Sy, Stt, Sty)，形状 (5, len(cuts))
+    # 固定窗口用前缀和 O(1) 求得；指数衰减直接按权重矩阵分批求和
+    if mode == WINDOW_DECAY and size is not None:
+        sums = np.zeros((5, len(cuts)))
+        cols = np.vstack([np.ones_like(x), x, y, x * x, x * y])
+        batch = max(1, WINDOW_BATCH_ELEMENTS // len(x))
+        for start in range(0, len(cuts), batch):
+            c = cuts[start:start + batch]
+            age = x[c][:, None] - x[None, :]
+            w = np.where(age >= 0, 0.5 ** (np.maximum(age, 0) / size), 0.0)
+            sums[:, start:start + batch] = cols @ w.T
+        return sums
+
+    P = np.zeros((5, len(x) + 1))
+    np.cumsum(np.vstack([np.ones_like(x), x, y, x * x, x * y]), axis=1, out=P[:, 1:])
+    if size is None:
+        starts = np.zeros(len(cuts), dtype=np.int64)
+    elif mode == WINDOW_POINTS:
+        starts = np.maximum(cuts + 1 - int(size), 0)
+    else:
+        starts = np.searchsorted(x, x[cuts] - size, side="left")
+    return P[:, cuts + 1] - P[:, starts]
+
+
+def select_window(t, T, T_env, mode, candidates=None, horizon=None, max_cuts=WINDOW_MAX_CUTS):
+    # 自动选择窗口大小：在数据后半段取若干截止点，用每个候选窗口拟合截止点之前的数据，
+    # 预测其后 horizon 个读数，选温度预测误差（均方）最小的候选；候选 None 表示使用全部数据
+    # 返回 (最优窗口大小, {候选: 均方根误差})，数据太少时返回 (None, {})
+    t = np.asarray(t, dtype=float).ravel()
+    T = np.asarray(T, dtype=float).ravel()
+    order = np.argsort(t, kind="stable")
+    t, T = t[order], T[order]
+    n = len(t)
+    if candidates is None:
+        candidates = WINDOW_CANDIDATES[mode]
+    if horizon is None:
+        horizon = max(3, n // 20)
+    if n < 2 * horizon + 4 or np.any(T <= T_env):
+        return None, {}
+
+    x = t - t[0]
+    y = np.log(T - T_env)
+    cuts = np.unique(np.linspace(n // 2, n - horizon - 1, max_cuts).astype(np.int64))
+    future = cuts[:, None] + np.arange(1, horizon + 1)[None, :]
+
+    errors = {}
+    for size in [None] + [c for c in candidates if c is not None]:
+        S0, St, Sy, Stt, Sty = window_sums(x, y, cuts, mode, size)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            var_t = Stt - St * St / S0
+            b = (Sty - St * Sy / S0) / var_t
+            a = (Sy - b * St) / S0
+            pred = T_env + np.exp(a[:, None] + b[:, None] * x[future])
+        err = (pred - T[future]) ** 2
+        ok = (S0 >= 2) & (var_t > 1e-12 * np.maximum(Stt, 1e-300)) & (b < 0)
+        errors[size] = float(np.sqrt(err[ok].mean())) if np.all(ok) else np.inf
+    best = min(errors, key=errors.get)
+    return best, errors
@@ -6,6 +6,7 @@ from tkinter import ttk
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from cooling_fit import fit_and_predict
 
 class CoolingPredictorApp:
     def __init__(self, master):
@@ -87,41 +88,10 @@ class CoolingPredictorApp:
         except ValueError:
             return
 
-        # 数据验证
-        valid_temperatures = all(T > T_env for T in T_list)
-        if not valid_temperatures:
-            self.label_result.config(text="所有温度必须高于环境温度", foreground="red")
-            return
-
-        if T_target <= T_env:
-            self.label_result.config(text="目标温度必须高于环境温度", foreground="red")
-            return
-
-        # 执行线性回归
-        try:
-            y = np.log(np.array(T_list) - T_env)
-            t_array = np.array(t_list)
-            coeffs = np.polyfit(t_array, y, 1)
-        except Exception as e:
-            self.label_result.config(text=f"计算错误: {str(e)}", foreground="red")
-            return
-
-        k = -coeffs[0]
-        T0 = np.exp(coeffs[1]) + T_env
-
-        if k <= 0:
-            self.label_result.config(text="无效的冷却常数，请检查数据", foreground="red")
-            return
-
-        # 计算冷却时间
-        try:
-            ratio = (T_target - T_env) / (T0 - T_env)
-            if ratio <= 0:
-                self.label_result.config(text="无法达到目标温度", foreground="red")
-                return
-            t_cool = -np.log(ratio) / k
-        except:
-            self.label_result.config(text="无法计算冷却时间", foreground="red")
+        # 拟合并计算冷却时间
+        k, T0, t_cool, error_msg = fit_and_predict(t_list, T_list, T_env, T_target)
+        if error_msg:
+            self.label_result.config(text=error_msg, foreground="red")
             return
 
         # 更新结果
@@ -1,15 +1,312 @@
 # 作者：Zack
 # 日期：2025/3/13
 
+import os
+import sqlite3
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, filedialog
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from cooling_fit import (fit_and_predict, fit_cooling_ambient, fit_cooling_channels, fit_cooling_robust,
+                         predict_cooling_grid, FIT_CACHE)
+from cooling_online import (OnlineCoolingEstimator, WindowedCoolingEstimator, WINDOW_NAMES, WINDOW_MINUTES,
+                            WINDOW_POINTS, WINDOW_DECAY, select_window)
+from log_import import parse_text, load_log, file_preview
+from timestamps import elapsed_minutes
+from background_jobs import JobScheduler, report_error
+from cooling_chart import CoolingChart
+from figure_pool import FIGURE_POOL
+from cooling_uncertainty import cooling_interval
+from cooling_prior import PRIOR_RUNS, history_prior, posterior_interval, log_rmse
+from run_store import RunStore
+from run_archive import ARCHIVE_EXT, RunArchive, append_run
+from ring_history import RingHistory
+from changepoint import detect_phases, short_runs
+from cooling_models import (MODEL_NEWTON, MODEL_RADIATION, MODEL_NAMES, fit_and_predict_model, fit_radiative,
+                            predict_curve, predict_grid)
 from datetime import datetime, timedelta
 
+ROBUST_METHODS = {None: "不使用", "huber": "Huber (IRLS)", "ransac": "RANSAC"}
+RECORD_DELAY = 5000  # 追加读数时运行记录最多每隔该时间（毫秒）写一次数据库
+
+
+def parse_input_data(text, imported_data, base_date, live=None):
+    # 文本框中“#”开头的行是导入文件的摘要，其余行是手动输入的读数
+    # 时间可以是 时:分(:秒)、ISO 日期时间或 Unix 时间戳，时:分 跨零点时自动进入下一天
+    # 每行可以有多个温度列（多个热电偶），此时温度为 (数据点数, 通道数) 数组
+    # live 为计算之后追加的实时读数 (起点时间, 相对起点的分钟数, 温度)，见 live_series
+    stamps, temps, error_msg = input_stamps(text, imported_data, base_date, live)
+    if error_msg:
+        return None, None, None, None, error_msg
+    if len(stamps) < 2:
+        return None, None, None, None, "至少需要两个数据点"
+    start_time = stamps[0].astype(datetime)
+    return elapsed_minutes(stamps), temps, start_time, stamps[-1], None
+
+
+def input_stamps(text, imported_data, base_date, live=None):
+    # 导入的数据、文本框中的读数和追加的实时读数按顺序拼接，返回 (时间戳, 温度, 错误信息)
+    after = None
+    if imported_data is not None:
+        after = imported_data[0][-1]
+    stamps, temps, error_msg = parse_text(text, "timestamp", base_date, after, ncol=None)
+    if error_msg:
+        return None, None, error_msg
+    if imported_data is not None and len(stamps):
+        if np.shape(imported_data[1])[1:] != temps.shape[1:]:
+            return None, None, "追加读数的温度列数必须与导入文件相同"
+        stamps = np.concatenate([imported_data[0], stamps])
+        temps = np.concatenate([imported_data[1], temps])
+    elif imported_data is not None:
+        stamps, temps = imported_data
+    temps = np.asarray(temps, dtype=float)  # 归档中的 float32 温度（内存映射视图）在这里才转换
+
+    if live is not None and len(live[1]):
+        origin, t_live, T_live = live
+        live_stamps = np.datetime64(origin, "ms") + np.round(t_live * 60000).astype("timedelta64[ms]")
+        if len(stamps) == 0:
+            stamps, temps = live_stamps, T_live
+        elif temps.ndim != 1:
+            return None, None, "追加读数的温度列数必须与导入文件相同"
+        else:
+            stamps = np.concatenate([stamps, live_stamps])
+            temps = np.concatenate([temps, T_live])
+    return stamps, temps, None
+
+
+def prediction_curve(k, T0, T_env, t_max, t_cool, model=MODEL_NEWTON, params=None, t_start=0):
+    # 生成预测曲线（从当前阶段的起点 t_start 开始）；辐射+对流模型使用 params = (T0, r, h)
+    t_curve = np.linspace(t_start, max(t_max, t_cool) + 1, 100)
+    if model == MODEL_NEWTON:
+        T_curve = T_env + (T0 - T_env) * np.exp(-k * t_curve)
+    else:
+        T_curve = predict_curve(model, params, T_env, t_curve)
+    return t_curve, T_curve
+
+
+def prepare_calculation(text, imported_data, base_date, T_env, T_target, uncertainty=False, auto_env=False, init=None,
+                        model=MODEL_NEWTON, segment=False, robust=None, window=None, window_size=None, history=None,
+                        load=None, live=None):
+    # 后台执行：解析、拟合并准备绘图数据，不访问任何 Tk 控件；live 为追加的实时读数（见 parse_input_data）
+    # auto_env 时由数据估计环境温度（三参数拟合），init 为上一次的拟合参数，用于热启动
+    # model 为辐射+对流时使用输入的环境温度，params = (T0, r, h)
+    # segment 时先检测冷却阶段（开炉门、开风机等），只用最后一个阶段的数据拟合
+    # robust 为 "huber"/"ransac" 时先用稳健的对数线性拟合找出离群读数，剔除后再按所选模型拟合
+    # window 为拟合窗口（最近N分钟/最近N个读数/指数衰减），window_size 为 None 时按留出预测误差自动选择
+    # history 为同一炉子的历史运行记录：牛顿冷却模型（输入环境温度）以其冷却常数作先验，load 为本次装炉量
+    # 多个温度通道时先一次矩阵求解得到各通道的冷却时间，最慢的通道决定冷却完成时间，以下计算只针对该通道
+    t_list, T_list, start_time, last_stamp, error_msg = parse_input_data(text, imported_data, base_date, live)
+    if error_msg:
+        return {"error": error_msg}
+    channels = None
+    if T_list.ndim == 2:
+        channels, error_msg = fit_channels(t_list, T_list, T_env, T_target)
+        if error_msg:
+            return {"error": error_msg}
+        T_list = T_list[:, channels["governing"]]
+
+    # 离群读数（使用输入的环境温度判断）：先在整段数据上判断，孤立的离群读数不参加阶段检测，
+    # 单个尖峰不会被当作新的阶段；连续很多个点偏离整段拟合是阶段变化，仍参加阶段检测
+    outliers = np.zeros(len(t_list), dtype=bool)
+    if robust:
+        _, _, outliers, error_msg = fit_cooling_robust(t_list, T_list, T_env, robust)
+        if error_msg:
+            return {"error": error_msg}
+    inliers = np.flatnonzero(~short_runs(outliers))
+
+    # 阶段检测使用输入的环境温度；分界点换算为原始数据中的下标
+    breaks = []
+    if segment:
+        breaks, error_msg = detect_phases(t_list[inliers], T_list[inliers], T_env)
+        if error_msg:
+            return {"error": error_msg}
+        breaks = [int(inliers[i]) for i in breaks]
+    phase_start = breaks[-1] if breaks else 0
+    if robust and breaks:
+        # 整段数据跨越多个阶段，一条指数曲线拟合不好；最后一个阶段再单独判断一次离群读数，
+        # 前面的阶段不参加拟合，整段判断时在其中标出的点也不显示、不计数
+        _, _, phase_outliers, error_msg = fit_cooling_robust(t_list[phase_start:], T_list[phase_start:], T_env, robust)
+        if error_msg:
+            return {"error": error_msg}
+        outliers[:phase_start] = False
+        outliers[phase_start:] = phase_outliers
+    t_out, T_out = t_list[outliers], T_list[outliers]
+    fit = ~outliers[phase_start:]
+    t_fit, T_fit = t_list[phase_start:][fit], T_list[phase_start:][fit]
+
+    # 拟合窗口：只用最近一段数据
+    if window == WINDOW_DECAY and (model != MODEL_NEWTON or auto_env):
+        return {"error": "指数衰减窗口只适用于牛顿冷却模型（输入环境温度）"}
+    if window and window_size is None:
+        window_size, _ = select_window(t_fit, T_fit, T_env, window)
+    if window is None or window_size is None:
+        window = window_size = None
+    elif window == WINDOW_POINTS:
+        t_fit, T_fit = t_fit[-int(window_size):], T_fit[-int(window_size):]
+    elif window == WINDOW_MINUTES:
+        recent = t_fit >= np.max(t_fit) - window_size
+        t_fit, T_fit = t_fit[recent], T_fit[recent]
+
+    # 历史先验（不包含本次运行自身的记录）
+    prior = None
+    if history and model == MODEL_NEWTON and not auto_env:
+        prior = history_prior(history, load, exclude=start_time)
+
+    # 拟合并计算冷却时间
+    params = fitter = None
+    if model == MODEL_RADIATION:
+        auto_env = False
+        params, t_cool, error_msg = fit_and_predict_model(model, t_fit, T_fit, T_env, T_target, init)
+        k, T0 = None, (params[0] if params is not None else None)
+    elif auto_env:
+        k, T0, T_env, t_cool, error_msg = fit_cooling_ambient(t_fit, T_fit, T_target, init)
+    elif window == WINDOW_DECAY or prior is not None:
+        # 指数衰减和历史先验都由估计器的累加量直接求解
+        fitter = new_estimator(T_env, window, window_size, prior)
+        error_msg = fitter.update_many(t_fit, T_fit)
+        if not error_msg:
+            k, T0, t_cool, error_msg = fitter.result(T_target)
+    else:
+        k, T0, t_cool, error_msg = fit_and_predict(t_fit, T_fit, T_env, T_target)
+    if error_msg:
+        return {"error": error_msg}
+
+    # 用同一批数据初始化在线估计器，之后追加的读数只做增量更新
+    # 估计环境温度、使用辐射+对流模型或稳健拟合时，追加读数改为完整重新拟合（毫秒级），新读数同样经过离群判断
+    # 使用拟合窗口时估计器只保留窗口内的读数，追加读数时窗口以 O(1) 滑动
+    # 多通道时追加读数改为完整重新计算（所有通道仍是一次矩阵求解）
+    estimator = None
+    if model == MODEL_NEWTON and not auto_env and not robust and channels is None:
+        estimator = fitter
+        if estimator is None:
+            estimator = new_estimator(T_env, window, window_size, prior)
+            estimator.update_many(t_fit, T_fit)
+
+    t_phase = float(t_list[phase_start])
+    t_curve, T_curve = prediction_curve(k, T0, T_env, np.max(t_list), t_cool, model, params, t_phase)
+
+    # 不确定度：自助法重采样得到冷却时间和预测曲线的 95% 区间（基于等权的对数线性拟合，仅用于牛顿冷却模型）
+    # 有历史先验时从后验抽样，读数很少时区间也有意义
+    interval = None
+    if uncertainty and prior is not None:
+        interval = posterior_interval(fitter.posterior(), T_env, T_target, t_curve)
+    elif uncertainty and model == MODEL_NEWTON and window != WINDOW_DECAY:
+        interval = cooling_interval(t_fit, T_fit, T_env, T_target, t_curve)
+
+    if channels is not None:
+        channels["t_cool"][channels["governing"]] = t_cool
+
+    return {
+        "error": None,
+        "t_list": t_list,
+        "T_list": T_list,
+        "start_time": start_time,
+        "last_stamp": last_stamp,
+        "T_env": T_env,
+        "auto_env": auto_env,
+        "model": model,
+        "params": params,
+        "breaks": [float(t_list[i]) for i in breaks],
+        "t_phase": t_phase,
+        "outliers": (t_out, T_out),
+        "window": (window, window_size),
+        "prior": prior,
+        "channels": channels,
+        "load": load,
+        "log_rmse": log_rmse(t_fit, T_fit, T_env, k, T0) if k is not None else None,
+        "T_target": T_target,
+        "k": k,
+        "T0": T0,
+        "t_cool": t_cool,
+        "estimator": estimator,
+        "t_curve": t_curve,
+        "T_curve": T_curve,
+        "interval": interval,
+        "t_fit": t_fit,  # 实际参加拟合的数据（最后一个阶段、剔除离群读数、拟合窗口之后），冷却方案表使用
+        "T_fit": T_fit,
+    }
+
+
+def fit_channels(t_list, T_matrix, T_env, T_target):
+    # 各通道一次矩阵求解（牛顿冷却，输入的环境温度），冷却时间最长的通道为决定通道
+    k, T0, t_cool, errors = fit_cooling_channels(t_list, T_matrix, T_env, T_target)
+    valid = np.array([e is None for e in errors])
+    if not valid.any():
+        return None, f"通道1: {errors[0]}"
+    governing = int(np.flatnonzero(valid)[np.argmax(t_cool[valid])])
+    return {"T": T_matrix, "k": k, "T0": T0, "t_cool": t_cool, "errors": errors, "governing": governing}, None
+
+
+def new_estimator(T_env, window, window_size, prior=None):
+    # 时间原点取整条记录的开始时间，只用部分数据（阶段、窗口）时 T0 和冷却时间仍以记录开始为准
+    if window:
+        return WindowedCoolingEstimator(T_env, window, window_size, origin=0.0, prior=prior)
+    return OnlineCoolingEstimator(T_env, origin=0.0, prior=prior)
+
+
+def prepare_plan(t_fit, T_fit, envs, targets, model=MODEL_NEWTON, init=None, prior=None, window=None,
+                 window_size=None):
+    # 后台执行：多个环境温度一次批量拟合（已缓存的直接复用），再向量化计算 环境温度 × 目标温度 的冷却时间
+    # t_fit/T_fit 为主结果实际拟合的数据，有历史先验或指数衰减窗口时与主结果一样用估计器求解
+    if model == MODEL_RADIATION:
+        # 辐射+对流模型逐个环境温度拟合，都从当前结果热启动
+        params_list, errors = [], []
+        for env in envs:
+            params, _, error_msg = fit_radiative(t_fit, T_fit, env, init)
+            params_list.append(params)
+            errors.append(error_msg)
+        return predict_grid(params_list, envs, targets), errors
+    if prior is not None or window == WINDOW_DECAY:
+        k, T0 = np.full(len(envs), np.nan), np.full(len(envs), np.nan)
+        errors = []
+        for i, env in enumerate(envs):
+            fitter = new_estimator(env, window, window_size, prior)
+            error_msg = fitter.update_many(t_fit, T_fit)
+            coeffs = None if error_msg else fitter.coefficients()
+            if not error_msg and (coeffs is None or coeffs[1] >= 0):
+                error_msg = "无效的冷却常数，请检查数据"
+            if not error_msg:
+                k[i], T0[i] = -coeffs[1], np.exp(coeffs[0]) + env
+            errors.append(error_msg)
+        return predict_cooling_grid(k, T0, np.asarray(envs, dtype=float), targets), errors
+    k, T0, errors = FIT_CACHE.fit_many(t_fit, T_fit, envs)
+    return predict_cooling_grid(k, T0, envs, targets), errors
+
+
+def result_notes(result):
+    # 结果标签中附加的说明：各通道的冷却时间、估计的环境温度、冷却阶段、离群读数、拟合窗口、历史先验
+    notes = []
+    channels = result["channels"]
+    if channels is not None:
+        for i, (t_cool, error_msg) in enumerate(zip(channels["t_cool"], channels["errors"])):
+            if error_msg:
+                notes.append(f"通道{i + 1}: {error_msg}")
+                continue
+            end_time = result["start_time"] + timedelta(minutes=float(t_cool))
+            mark = "（最慢，决定完成时间）" if i == channels["governing"] else ""
+            notes.append(f"通道{i + 1}: {t_cool/60:.1f} 小时 / {end_time.strftime('%m-%d %H:%M')}{mark}")
+    if result["auto_env"]:
+        notes.append(f"估计环境温度: {result['T_env']:.1f} ℃")
+    if result["breaks"]:
+        phase_time = result["start_time"] + timedelta(minutes=result["breaks"][-1])
+        notes.append(f"检测到 {len(result['breaks']) + 1} 个冷却阶段，按 {phase_time.strftime('%m-%d %H:%M')} 起的最后阶段预测")
+    if len(result["outliers"][0]):
+        notes.append(f"已剔除 {len(result['outliers'][0])} 个离群读数")
+    window, window_size = result["window"]
+    if window:
+        notes.append(f"拟合窗口: {WINDOW_NAMES[window]} = {window_size:g}")
+    prior = result["prior"]
+    if prior is not None:
+        notes.append(f"历史先验: {prior['runs']} 次运行，k = {prior['k']:.5f} ± {prior['k_sd']:.5f} /分钟")
+    return notes
+
+
+def parse_number_list(text):
+    # “50, 80 100” -> [50.0, 80.0, 100.0]
+    return [float(v) for v in text.replace("，", ",").replace(",", " ").split()]
+
+
 class CoolingPredictorApp:
-    def __init__(self, master):
+    def __init__(self, master, executor=None):
         self.master = master
         master.title("冷却时间预测")
 
@@ -52,136 +349,571 @@ class CoolingPredictorApp:
         self.entry_start_date.insert(0, "03-13")
         self.entry_start_date.grid(row=0, column=3, sticky=tk.W)
 
-        # 绘图区域
-        self.figure = plt.figure(figsize=(6, 4))
-        self.canvas = FigureCanvasTkAgg(self.figure, master=master)
+        # 追加单个读数（在线更新，不重新拟合全部数据）
+        ttk.Label(self.frame_input, text="新读数 (时间 温度):").grid(row=1, column=2, sticky=tk.W)
+        self.entry_new_reading = ttk.Entry(self.frame_input)
+        self.entry_new_reading.grid(row=1, column=3, sticky=tk.W)
+        self.entry_new_reading.bind("<Return>", self.append_reading)
+        self.btn_append = ttk.Button(self.frame_input, text="追加读数", command=self.append_reading)
+        self.btn_append.grid(row=2, column=2, columnspan=2, pady=5)
+        self.estimator = None
+        self.start_time = None
+        self.base_date = None
+        self.last_stamp = None
+
+        # 计算之后追加的实时读数：不写入文本框，保存在有界的测量历史中（最近的读数保留原始分辨率，
+        # 更早的按分钟/小时聚合），完整重新计算时由其拼接出的序列参加拟合，数据量不随运行时间无限增长
+        self.live = RingHistory()
+        self.live_origin = None  # 实时读数时间的起点
+        self.live_fitted = 0
+
+        # 从文件导入大数据量日志
+        self.btn_import = ttk.Button(self.frame_input, text="导入文件", command=self.import_file)
+        self.btn_import.grid(row=3, column=2, sticky=tk.N, pady=5)
+        self.btn_clear_import = ttk.Button(self.frame_input, text="清除导入", command=self.clear_import)
+        self.btn_clear_import.grid(row=3, column=3, sticky=tk.N, pady=5)
+        self.imported_data = None
+
+        # 当前数据追加保存到二进制归档（导入文件时可直接打开归档中的记录）
+        self.btn_save_archive = ttk.Button(self.frame_input, text="保存到归档", command=self.save_archive)
+        self.btn_save_archive.grid(row=6, column=0, columnspan=2, pady=5)
+        self.archive_window = None
+
+        # 冷却方案表：不同环境温度和目标温度下的预测完成时间
+        self.btn_plan = ttk.Button(self.frame_input, text="冷却方案表", command=self.open_plan_table)
+        self.btn_plan.grid(row=4, column=2, columnspan=2, pady=5)
+        self.plan_window = None
+        self.last_result = None
+
+        # 不确定度（自助法区间）
+        self.var_uncertainty = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.frame_input, text="显示不确定度", variable=self.var_uncertainty).grid(row=5, column=2, columnspan=2, sticky=tk.N)
+
+        # 由数据估计环境温度（忽略输入的环境温度）
+        self.var_auto_env = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.frame_input, text="自动估计环境温度", variable=self.var_auto_env).grid(row=6, column=2, columnspan=2, sticky=tk.N)
+
+        # 冷却模型：牛顿冷却（对数线性拟合）或 辐射+对流
+        ttk.Label(self.frame_input, text="冷却模型:").grid(row=7, column=2, sticky=tk.W)
+        self.combo_model = ttk.Combobox(self.frame_input, values=list(MODEL_NAMES.values()), state="readonly", width=10)
+        self.combo_model.current(0)
+        self.combo_model.grid(row=7, column=3, sticky=tk.W)
+
+        # 冷却阶段检测：只用最后一个阶段的数据预测
+        self.var_segment = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.frame_input, text="分阶段（只用当前阶段）", variable=self.var_segment).grid(row=8, column=2, columnspan=2, sticky=tk.N)
+
+        # 稳健拟合：剔除热电偶尖峰等离群读数
+        ttk.Label(self.frame_input, text="稳健拟合:").grid(row=9, column=2, sticky=tk.W)
+        self.combo_robust = ttk.Combobox(self.frame_input, values=list(ROBUST_METHODS.values()), state="readonly", width=10)
+        self.combo_robust.current(0)
+        self.combo_robust.grid(row=9, column=3, sticky=tk.W)
+
+        # 拟合窗口：只用最近一段数据，窗口大小填“自动”时按留出预测误差选择
+        ttk.Label(self.frame_input, text="拟合窗口:").grid(row=10, column=2, sticky=tk.W)
+        self.combo_window = ttk.Combobox(self.frame_input, values=list(WINDOW_NAMES.values()), state="readonly", width=18)
+        self.combo_window.current(0)
+        self.combo_window.grid(row=10, column=3, sticky=tk.W)
+        ttk.Label(self.frame_input, text="窗口大小:").grid(row=11, column=2, sticky=tk.W)
+        self.entry_window_size = ttk.Entry(self.frame_input)
+        self.entry_window_size.insert(0, "自动")
+        self.entry_window_size.grid(row=11, column=3, sticky=tk.W)
+
+        # 历史运行记录：填写炉号时每次计算的结果都保存下来，并以同一炉子的历史作为先验
+        ttk.Label(self.frame_input, text="炉号:").grid(row=12, column=2, sticky=tk.W)
+        self.entry_furnace = ttk.Entry(self.frame_input)
+        self.entry_furnace.grid(row=12, column=3, sticky=tk.W)
+        ttk.Label(self.frame_input, text="装炉量 (kg):").grid(row=13, column=2, sticky=tk.W)
+        self.entry_load = ttk.Entry(self.frame_input)
+        self.entry_load.grid(row=13, column=3, sticky=tk.W)
+        self.var_prior = tk.BooleanVar(value=True)
+        ttk.Checkbutton(self.frame_input, text="使用历史先验", variable=self.var_prior).grid(row=14, column=2, columnspan=2, sticky=tk.N)
+        try:
+            self.run_store = RunStore()
+        except sqlite3.Error:
+            self.run_store = None
+        self.furnace = None
+        self.pending_record = None  # 追加读数后尚未写入数据库的拟合结果
+        self.record_job = None
+
+        # 后台任务（可传入进程池 executor）
+        self.jobs = JobScheduler(master, executor)
+
+        # 绘图区域：Figure 从图表池取出（不经过 pyplot），窗口销毁时放回池中
+        self.figure, self.canvas, self.chart = FIGURE_POOL.acquire("cooling", master, (6, 4), CoolingChart)
+        self.chart.attach(self.canvas)
         self.canvas.get_tk_widget().pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+        master.bind("<Destroy>", self.on_destroy, add="+")
+
+    def on_destroy(self, event):
+        # <Destroy> 会对所有子控件触发，只在窗口本身销毁时释放资源
+        if event.widget is self.master:
+            self.close()
+
+    def close(self):
+        # 释放窗口持有的资源：后台任务、图表（放回图表池）、历史记录数据库连接和导入的数据
+        if self.figure is None:
+            return
+        self.jobs.shutdown()
+        if self.record_job is not None:
+            self.master.after_cancel(self.record_job)
+        self.flush_record()
+        FIGURE_POOL.release("cooling", self.figure, self.chart, CoolingChart.reset)
+        self.figure = self.canvas = self.chart = None
+        if self.run_store is not None:
+            self.run_store.close()
+            self.run_store = None
+        self.imported_data = self.estimator = self.last_result = None
+
+    def parse_start_date(self):
+        # 开始日期只用于只有 时:分 的数据，年份取当前年份
+        start_month, start_day = map(int, self.entry_start_date.get().split('-'))
+        return np.datetime64(datetime.now().replace(month=start_month, day=start_day).date())
 
-    def parse_input_data(self):
+    def read_inputs(self):
+        # 在 Tk 线程中读取控件内容，解析和拟合交给后台任务
         try:
             T_env = float(self.entry_env_temp.get())
             T_target = float(self.entry_target_temp.get())
-            start_date_str = self.entry_start_date.get()
-            start_month, start_day = map(int, start_date_str.split('-'))
+            self.base_date = self.parse_start_date()
         except ValueError:
-            return None, None, None, "环境温度、目标温度和开始日期必须为数字"
-
-        data_lines = self.text_data.get("1.0", tk.END).strip().split('\n')
-        t_list, T_list = [], []
-        start_time = None
-        
-        for line in data_lines:
-            parts = line.strip().split()
-            if len(parts) != 2:
-                return None, None, None, "每行必须包含两个数字（时间 温度）"
+            return None, "环境温度、目标温度和开始日期必须为数字"
+        window = self.selected_window()
+        window_size = self.entry_window_size.get().strip()
+        if window_size in ("", "自动"):
+            window_size = None
+        else:
             try:
-                time_str = parts[0]
-                hours, minutes = map(int, time_str.split(':'))
-                total_minutes = hours * 60 + minutes
-                if start_time is None:
-                    start_time = datetime.now().replace(month=start_month,day=start_day,hour=hours, minute=minutes, second=0, microsecond=0)
-                t_list.append(total_minutes-start_time.hour*60-start_time.minute)
-                T_list.append(float(parts[1]))
+                window_size = float(window_size)
             except ValueError:
-                return None, None, None, "无效的数字格式"
+                return None, "窗口大小必须为数字或“自动”"
+            if window_size <= 0 or (window == WINDOW_POINTS and window_size < 2):
+                return None, "窗口大小必须大于 0（按读数时至少为 2）"
+        load = self.entry_load.get().strip()
+        try:
+            load = float(load) if load else None
+        except ValueError:
+            return None, "装炉量必须为数字"
+        # 同一炉子的历史记录按索引查询（毫秒以内），先验在后台任务中构造
+        self.furnace = self.entry_furnace.get().strip() or None
+        history = None
+        if self.furnace and self.var_prior.get() and self.run_store is not None:
+            history = self.run_store.query(self.furnace, limit=PRIOR_RUNS + 1)
+        # 上一次使用同一种非线性拟合时，用其结果热启动迭代
+        auto_env = self.var_auto_env.get()
+        model = self.selected_model()
+        last = self.last_result
+        init = None
+        if last is not None and last["model"] == model:
+            if model == MODEL_RADIATION and last["T_env"] == T_env:
+                init = last["params"]
+            elif model == MODEL_NEWTON and auto_env and last["auto_env"]:
+                init = (last["k"], last["T0"], last["T_env"])
+        return (self.text_data.get("1.0", tk.END), self.imported_data, self.base_date, T_env, T_target,
+                self.var_uncertainty.get(), auto_env, init, model, self.var_segment.get(), self.selected_robust(),
+                window, window_size, history, load, self.live_series()), None
 
-        if len(t_list) < 2:
-            return None, None, None, "至少需要两个数据点"
-        return t_list, T_list, start_time, None
+    def live_series(self):
+        # 追加的实时读数 (起点时间, 分钟数, 温度)，没有时为 None；数组是副本，可交给后台任务
+        if self.live.total == 0:
+            return None
+        return (self.live_origin, *self.live.series())
 
-    def calculate(self):
-        t_list, T_list, start_time, error_msg = self.parse_input_data()
+    def clear_live(self):
+        # 导入新的数据时丢弃之前追加的实时读数
+        self.live.clear()
+        self.live_origin = None
+        self.live_fitted = 0
+
+    def selected_window(self):
+        name = self.combo_window.get()
+        for mode, mode_name in WINDOW_NAMES.items():
+            if mode_name == name:
+                return mode
+        return None
+
+    def selected_robust(self):
+        name = self.combo_robust.get()
+        for method, method_name in ROBUST_METHODS.items():
+            if method_name == name:
+                return method
+        return None
+
+    def selected_model(self):
+        name = self.combo_model.get()
+        for model, model_name in MODEL_NAMES.items():
+            if model_name == name:
+                return model
+        return MODEL_NEWTON
+
+    def import_file(self):
+        path = filedialog.askopenfilename(
+            title="导入温度日志",
+            filetypes=[("日志文件", "*.txt *.csv *.log"), ("冷却归档", "*" + ARCHIVE_EXT), ("所有文件", "*.*")]
+        )
+        if not path:
+            return
+        if path.lower().endswith(ARCHIVE_EXT):
+            self.open_archive(path)
+            return
+
+        try:
+            self.base_date = self.parse_start_date()
+        except ValueError:
+            self.label_result.config(text="开始日期必须为数字", foreground="red")
+            return
+        stamps, temps, error_msg = load_log(path, "timestamp", self.base_date, ncol=None)
         if error_msg:
-            self.label_result.config(text=error_msg, foreground="red")
+            self.label_result.config(text=f"导入失败: {error_msg}", foreground="red")
             return
+        if len(stamps) == 0:
+            self.label_result.config(text="导入失败: 至少需要两个数据点", foreground="red")
+            return
+        self.imported_data = (stamps, temps)
+        self.estimator = None
+        self.clear_live()
+
+        # 文本框只显示摘要和首尾几行，完整数据保存在数组中
+        head, tail = file_preview(path)
+        preview = [f"# 已导入 {os.path.basename(path)}：{len(stamps)} 行"]
+        preview += [f"# {line}" for line in head]
+        if len(stamps) > len(head):
+            preview.append("# ...")
+            preview += [f"# {line}" for line in tail]
+        self.text_data.delete("1.0", tk.END)
+        self.text_data.insert(tk.END, "\n".join(preview) + "\n")
+        self.calculate()
+
+    def open_archive(self, path):
+        # 只读取索引并建立内存映射；有多条记录时列出供选择
+        try:
+            archive = RunArchive(path)
+        except (OSError, ValueError) as error:
+            self.label_result.config(text=f"导入失败: {error}", foreground="red")
+            return
+        if len(archive) == 0:
+            self.label_result.config(text="导入失败: 归档中没有记录", foreground="red")
+            return
+        if len(archive) == 1:
+            self.load_archive_run(archive, 0)
+            return
+
+        if self.archive_window is not None:
+            self.archive_window.destroy()
+        window = tk.Toplevel(self.master)
+        window.title(f"选择记录 - {os.path.basename(path)}")
+        self.archive_window = window
+        tree = ttk.Treeview(window, columns=("furnace", "start", "n", "channels"), show="headings", height=12)
+        for column, text, width in (("furnace", "炉号", 100), ("start", "开始时间", 160), ("n", "读数", 90),
+                                    ("channels", "通道", 60)):
+            tree.heading(column, text=text)
+            tree.column(column, width=width, anchor=tk.CENTER)
+        # 最近的记录在前
+        for i in reversed(range(len(archive))):
+            run = archive.runs[i]
+            tree.insert("", tk.END, iid=str(i), values=(run["furnace"] or "", run["start"].replace("T", " "),
+                                                        run["n"], run["channels"]))
+        tree.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+
+        def load_selected(event=None):
+            selected = tree.selection()
+            if selected:
+                window.destroy()
+                self.archive_window = None
+                self.load_archive_run(archive, int(selected[0]))
 
+        tree.bind("<Double-1>", load_selected)
+        ttk.Button(window, text="打开", command=load_selected).pack(pady=5)
+
+    def load_archive_run(self, archive, i):
+        # 温度是归档内存映射上的视图，只有这一条记录的数据会被读入
+        stamps, temps = archive.run(i)
+        run = archive.runs[i]
+        self.imported_data = (stamps, temps)
+        self.estimator = None
+        self.clear_live()
+        if run["furnace"]:
+            self.entry_furnace.delete(0, tk.END)
+            self.entry_furnace.insert(0, run["furnace"])
+
+        preview = [f"# 已打开归档 {os.path.basename(archive.path)} 第 {i + 1} 条记录：{run['n']} 行，{run['channels']} 个通道",
+                   f"# 开始时间 {run['start'].replace('T', ' ')}"]
+        self.text_data.delete("1.0", tk.END)
+        self.text_data.insert(tk.END, "\n".join(preview) + "\n")
+        self.calculate()
+
+    def save_archive(self):
+        result = self.last_result
+        if result is None:
+            self.label_result.config(text="请先计算冷却时间", foreground="red")
+            return
+        path = filedialog.asksaveasfilename(
+            title="保存到冷却归档（已有归档时追加记录）",
+            defaultextension=ARCHIVE_EXT,
+            filetypes=[("冷却归档", "*" + ARCHIVE_EXT)]
+        )
+        if not path:
+            return
+        # 保存当前的全部数据（导入的数据、文本框中的读数和之后追加的实时读数，所有通道），
+        # 不用上一次完整计算的结果：增量更新时追加的读数不在其中
+        stamps, temps, error_msg = input_stamps(self.text_data.get("1.0", tk.END), self.imported_data, self.base_date,
+                                                self.live_series())
+        if error_msg:
+            self.label_result.config(text=f"保存失败: {error_msg}", foreground="red")
+            return
+        try:
+            _, error_msg = append_run(path, stamps, temps, self.furnace, load=result["load"], T_env=result["T_env"])
+        except OSError as error:
+            error_msg = str(error)
+        if error_msg:
+            self.label_result.config(text=f"保存失败: {error_msg}", foreground="red")
+            return
+        self.label_result.config(text=f"已保存到 {os.path.basename(path)}", foreground="black")
+
+    def clear_import(self):
+        self.imported_data = None
+        self.estimator = None
+        self.clear_live()
+        self.start_time = self.last_stamp = None
+        self.text_data.delete("1.0", tk.END)
+        self.label_result.config(text="")
+        self.chart.clear()
+
+    def show_result(self, t_cool, start_time, interval=None, notes=()):
+        # 计算冷却完成的具体时间
+        cool_time = timedelta(minutes=t_cool)
+        end_time = start_time + cool_time
+
+        # 更新结果
+        text = (f"预测冷却时间: {round(t_cool)} 分钟 = {t_cool/60:.1f} 小时\n"
+                f"冷却完成时间: {end_time.strftime('%Y-%m-%d %H:%M:%S')}")
+        if interval is not None:
+            low, _, high = interval["t_cool"]
+            low_time = start_time + timedelta(minutes=float(low))
+            high_time = start_time + timedelta(minutes=float(high))
+            text += (f"\n95%区间: {low/60:.1f} ~ {high/60:.1f} 小时\n"
+                     f"完成时间区间: {low_time.strftime('%m-%d %H:%M')} ~ {high_time.strftime('%m-%d %H:%M')}")
+        for note in notes:
+            text += f"\n{note}"
+        self.label_result.config(text=text, foreground="black")
+
+    def append_reading(self, event=None):
         try:
             T_env = float(self.entry_env_temp.get())
             T_target = float(self.entry_target_temp.get())
         except ValueError:
+            self.label_result.config(text="环境温度和目标温度必须为数字", foreground="red")
             return
 
-        # 数据验证
-        valid_temperatures = all(T > T_env for T in T_list)
-        if not valid_temperatures:
-            self.label_result.config(text="所有温度必须高于环境温度", foreground="red")
+        reading = self.entry_new_reading.get().strip()
+        if not reading:
             return
 
-        if T_target <= T_env:
-            self.label_result.config(text="目标温度必须高于环境温度", foreground="red")
+        # 尚未计算过或读数有多个温度列时，读数加入文本框后完整拟合一次
+        stamps = None
+        if self.start_time is not None:
+            # 只有 时:分 时紧接上一个读数判断是否跨过零点
+            stamps, temps, error_msg = parse_text(reading, "timestamp", self.base_date, after=self.last_stamp, ncol=None)
+            if not error_msg and len(stamps) != 1:
+                error_msg = "每行必须包含时间和温度"
+            if error_msg:
+                self.label_result.config(text=error_msg, foreground="red")
+                return
+        if stamps is None or temps.ndim != 1:
+            self.text_data.insert(tk.END, f"\n{reading}")
+            self.entry_new_reading.delete(0, tk.END)
+            self.calculate()
             return
+        t = elapsed_minutes(stamps, origin=self.start_time)[0]
 
-        # 执行线性回归
-        try:
-            y = np.log(np.array(T_list) - T_env)
-            t_array = np.array(t_list)
-            coeffs = np.polyfit(t_array, y, 1)
-        except Exception as e:
-            self.label_result.config(text=f"计算错误: {str(e)}", foreground="red")
+        # 环境温度已修改、仍有计算在进行或当前设置不能增量更新时，读数加入实时历史后完整拟合一次
+        incremental = self.estimator is not None and self.estimator.T_env == T_env and not self.jobs.busy("calculate")
+        if incremental:
+            error_msg = self.estimator.update(t, temps[0])
+            if error_msg:
+                self.label_result.config(text=error_msg, foreground="red")
+                return
+        if self.live.total == 0:
+            self.live_origin = np.datetime64(self.start_time, "ms")
+        self.live.append(elapsed_minutes(stamps, origin=self.live_origin)[0], temps[0])
+        self.last_stamp = stamps[0]
+        self.entry_new_reading.delete(0, tk.END)
+        if not incremental:
+            self.calculate()
+            return
+
+        k, T0, t_cool, error_msg = self.estimator.result(T_target)
+        if error_msg:
+            self.label_result.config(text=error_msg, foreground="red")
             return
+        self.show_result(t_cool, self.start_time, notes=result_notes(self.last_result))
+        self.schedule_record(k, T0, self.estimator.count, self.estimator.rmse())
 
-        k = -coeffs[0]
-        T0 = np.exp(coeffs[1]) + T_env
+        # 新读数和预测曲线通过 blit 增量刷新
+        self.chart.append(t, temps[0])
+        t_curve, T_curve = prediction_curve(k, T0, T_env, self.chart.data_extent[1], t_cool,
+                                            t_start=self.last_result["t_phase"])
+        self.chart.set_prediction(t_curve, T_curve, T_target, t_cool)
+        self.chart.set_band(None)  # 区间基于完整计算时的数据，追加读数后隐藏
+        self.chart.refresh()
 
-        if k <= 0:
-            self.label_result.config(text="无效的冷却常数，请检查数据", foreground="red")
+    def calculate(self):
+        inputs, error_msg = self.read_inputs()
+        if error_msg:
+            self.label_result.config(text=error_msg, foreground="red")
             return
 
-        # 计算冷却时间
+        # 新的计算会取代尚未完成的旧计算
+        self.label_result.config(text="正在计算...", foreground="gray")
+        live_total = self.live.total
+        self.jobs.submit("calculate", prepare_calculation, *inputs,
+                         on_done=lambda result: self.show_calculation(result, live_total),
+                         on_error=lambda error: report_error(self.label_result, error))
+
+    def show_calculation(self, result, live_total=0):
+        if result["error"]:
+            self.label_result.config(text=result["error"], foreground="red")
+            return
+
+        self.last_result = result
+        self.live_fitted = live_total  # 这次计算包含的实时读数数
+        self.estimator = result["estimator"]
+        self.start_time = result["start_time"]
+        self.last_stamp = result["last_stamp"]
+        self.show_result(result["t_cool"], self.start_time, result["interval"], result_notes(result))
+        self.pending_record = None  # 完整计算的结果取代追加读数时尚未写入的结果
+        if result["k"] is not None:
+            self.record_run(result["k"], result["T0"], len(result["t_list"]), result["log_rmse"])
+
+        # 只更新图中的动态元素，坐标轴等静态元素不重建
+        self.chart.set_data(result["t_list"], result["T_list"], self.start_time)
+        self.chart.set_prediction(result["t_curve"], result["T_curve"], result["T_target"], result["t_cool"])
+        self.chart.set_breakpoints(result["breaks"])
+        self.chart.set_outliers(*result["outliers"])
+        channels = result["channels"]
+        self.chart.set_channels(result["t_list"], None if channels is None else channels["T"])
+        interval = result["interval"]
+        if interval is not None and interval["curve"] is not None:
+            self.chart.set_band(result["t_curve"], interval["curve"][0], interval["curve"][-1])
+        else:
+            self.chart.set_band(None)
+        self.chart.refresh()
+
+        if self.plan_window is not None:
+            self.refresh_plan_table()
+
+    def record_run(self, k, T0, points, rmse):
+        # 保存（或覆盖）本次运行的拟合结果；数据库不可写时忽略，不影响预测
+        if self.furnace is None or self.run_store is None:
+            return
+        result = self.last_result
         try:
-            ratio = (T_target - T_env) / (T0 - T_env)
-            if ratio <= 0:
-                self.label_result.config(text="无法达到目标温度", foreground="red")
-                return
-            t_cool = -np.log(ratio) / k
-        except:
-            self.label_result.config(text="无法计算冷却时间", foreground="red")
+            self.run_store.record(self.furnace, result["start_time"], result["load"], float(result["T_list"][0]),
+                                  result["T_env"], k, T0, points, rmse)
+        except sqlite3.Error:
+            pass
+
+    def schedule_record(self, k, T0, points, rmse):
+        # 追加读数时不逐个写数据库（每次提交都要同步到磁盘），合并为每隔 RECORD_DELAY 写一次最新的结果
+        self.pending_record = (k, T0, points, rmse)
+        if self.record_job is None:
+            self.record_job = self.master.after(RECORD_DELAY, self.flush_record)
+
+    def flush_record(self):
+        self.record_job = None
+        if self.pending_record is not None:
+            pending, self.pending_record = self.pending_record, None
+            self.record_run(*pending)
+
+    def open_plan_table(self):
+        if self.plan_window is not None:
+            self.plan_window.lift()
             return
+        try:
+            T_env = float(self.entry_env_temp.get())
+        except ValueError:
+            T_env = 8
 
-        # 计算冷却完成的具体时间
-        cool_time = timedelta(minutes=t_cool)
-        end_time = start_time + cool_time
+        window = tk.Toplevel(self.master)
+        window.title("冷却方案表")
+        window.protocol("WM_DELETE_WINDOW", self.close_plan_table)
+        self.plan_window = window
 
-        # 更新结果
-        self.label_result.config(
-            text=f"预测冷却时间: {round(t_cool)} 分钟 = {t_cool/60:.1f} 小时\n"
-                 f"冷却完成时间: {end_time.strftime('%Y-%m-%d %H:%M:%S')}",
-            foreground="black"
-        )
+        frame = ttk.Frame(window)
+        frame.pack(padx=10, pady=10, fill=tk.X)
+        ttk.Label(frame, text="环境温度 (℃):").grid(row=0, column=0, sticky=tk.W)
+        self.entry_plan_envs = ttk.Entry(frame, width=30)
+        self.entry_plan_envs.insert(0, ", ".join(f"{T_env + d:g}" for d in (-10, -5, 0, 5, 10)))
+        self.entry_plan_envs.grid(row=0, column=1, sticky=tk.W)
+        ttk.Label(frame, text="目标温度 (℃):").grid(row=1, column=0, sticky=tk.W)
+        self.entry_plan_targets = ttk.Entry(frame, width=30)
+        self.entry_plan_targets.insert(0, "50, 80, 100, 150, 200")
+        self.entry_plan_targets.grid(row=1, column=1, sticky=tk.W)
+        ttk.Button(frame, text="刷新", command=self.refresh_plan_table).grid(row=0, column=2, rowspan=2, padx=5)
+        self.label_plan = ttk.Label(frame, text="")
+        self.label_plan.grid(row=2, column=0, columnspan=3, sticky=tk.W)
 
-        # 绘制图形
-        self.figure.clf()
-        ax = self.figure.add_subplot(111)
+        self.plan_tree = ttk.Treeview(window, show="headings", height=8)
+        self.plan_tree.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+        self.refresh_plan_table()
 
-        plt.rcParams['font.sans-serif'] = ['Microsoft YaHei']  # 使用SimHei字体支持中文
-        plt.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
+    def close_plan_table(self):
+        self.jobs.cancel("plan")
+        self.plan_window.destroy()
+        self.plan_window = None
 
-        # 绘制数据点
-        ax.scatter(t_list, T_list, color='red', zorder=5, label='测量数据')
-        
-        # 生成预测曲线
-        t_curve = np.linspace(0, max(max(t_list), t_cool) + 1, 100)
-        T_curve = T_env + (T0 - T_env) * np.exp(-k * t_curve)
-        ax.plot(t_curve, T_curve, label='预测曲线')
-        
-        # 绘制目标线
-        ax.axhline(T_target, color='green', linestyle='--', label='目标温度')
-        ax.axvline(t_cool, color='blue', linestyle=':', label='预测时间')
-        
-        # 将X轴时间转换为具体的日期和时间格式
-        time_labels = [start_time + timedelta(minutes=tm) for tm in t_curve]
-        ax.set_xticks(t_curve[::10])
-        ax.set_xticklabels([t.strftime('%m-%d %H:%M') for t in time_labels[::10]], rotation=45, ha='right')
-
-        ax.set_xlabel('时间')
-        ax.set_ylabel('温度 (℃)')
-        ax.set_title('温度曲线')
-        ax.grid(True)
-        ax.legend()
-
-        plt.tight_layout()
-        
-        self.canvas.draw()
+    def refresh_plan_table(self):
+        if self.last_result is None or self.last_result["error"]:
+            self.label_plan.config(text="请先计算冷却时间", foreground="red")
+            return
+        try:
+            envs = parse_number_list(self.entry_plan_envs.get())
+            targets = parse_number_list(self.entry_plan_targets.get())
+        except ValueError:
+            self.label_plan.config(text="温度列表必须为数字", foreground="red")
+            return
+        if not envs or not targets:
+            self.label_plan.config(text="温度列表不能为空", foreground="red")
+            return
+
+        self.label_plan.config(text="正在计算...", foreground="gray")
+        if self.live.total > self.live_fitted:
+            # 上次完整计算之后又追加了读数（增量更新不保存拟合数据），先完整计算，完成后自动刷新方案表
+            self.calculate()
+            return
+        result = self.last_result
+        self.jobs.submit("plan", prepare_plan, result["t_fit"], result["T_fit"], envs, targets, result["model"],
+                         result["params"], result["prior"], *result["window"],
+                         on_done=lambda plan: self.show_plan_table(envs, targets, *plan),
+                         on_error=lambda error: report_error(self.label_plan, error))
+
+    def show_plan_table(self, envs, targets, grid, errors):
+        if self.plan_window is None:
+            return
+        self.label_plan.config(text="单元格：冷却时间(小时) / 冷却完成时间", foreground="black")
+
+        tree = self.plan_tree
+        columns = ["env"] + [f"target{j}" for j in range(len(targets))]
+        tree.delete(*tree.get_children())
+        tree.config(columns=columns)
+        tree.heading("env", text="环境温度 \\ 目标温度")
+        tree.column("env", width=120, anchor=tk.CENTER)
+        for j, target in enumerate(targets):
+            tree.heading(f"target{j}", text=f"{target:g} ℃")
+            tree.column(f"target{j}", width=130, anchor=tk.CENTER)
+
+        for i, env in enumerate(envs):
+            row = [f"{env:g} ℃"]
+            for j in range(len(targets)):
+                t_cool = grid[i, j]
+                if errors[i]:
+                    row.append(errors[i])
+                elif np.isnan(t_cool):
+                    row.append("无法达到")
+                else:
+                    end_time = self.start_time + timedelta(minutes=float(t_cool))
+                    row.append(f"{t_cool/60:.1f} / {end_time.strftime('%m-%d %H:%M')}")
+            tree.insert("", tk.END, values=row)
 
 if __name__ == "__main__":
     root = tk.Tk()
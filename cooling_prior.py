@@ -0,0 +1,101 @@
+# 作者：Zack
+# 日期：2026/10/18
+# 历史先验：把同一炉子以往运行的冷却常数作为对数线性回归 log(T - T_env) = a + b·t 的共轭（正态-逆伽马）先验，
+# 只有一两个读数时也能给出合理的预测，读数越多数据所占的权重越大；后验只依赖几个累加量，可随读数 O(1) 更新
+
+from datetime import datetime
+import numpy as np
+from cooling_fit import predict_cooling_time
+
+PRIOR_RUNS = 50  # 构造先验时最多使用的历史运行数（最近的）
+MIN_PRIOR_RUNS = 2  # 少于该数量的历史运行不构造先验
+LOAD_TOLERANCE = 0.3  # 装炉量相差在该比例以内的运行视为同类；同类运行足够多时只用同类运行
+MIN_K_SPREAD = 0.05  # 冷却常数先验标准差的下限（相对于均值）
+MIN_LOG_NOISE = 1e-3  # 对数空间噪声标准差的下限
+PRIOR_NOISE_DOF = 4.0  # 噪声方差先验的等效自由度
+INTERCEPT_PRECISION = 1e-8  # 截距几乎无信息：由本次运行的读数决定
+POSTERIOR_SAMPLES = 2000
+LEVELS = (2.5, 50, 97.5)
+
+
+def history_prior(runs, load=None, exclude=None):
+    # runs 为 RunStore.query 返回的记录（字典），load 为本次装炉量，exclude 为本次运行的开始时间（不用自身作先验）
+    # 返回 {"runs", "k", "k_sd", "noise"}，历史运行不足时返回 None
+    if exclude is not None:
+        exclude = exclude.isoformat(timespec="seconds") if isinstance(exclude, datetime) else str(exclude)
+        runs = [r for r in runs if r["started"] != exclude]
+    runs = [r for r in runs if r["k"] is not None and r["k"] > 0][:PRIOR_RUNS]
+    if load is not None:
+        similar = [r for r in runs if r["load"] is not None and abs(r["load"] - load) <= LOAD_TOLERANCE * abs(load)]
+        if len(similar) >= MIN_PRIOR_RUNS:
+            runs = similar
+    if len(runs) < MIN_PRIOR_RUNS:
+        return None
+
+    k = np.array([r["k"] for r in runs], dtype=float)
+    noise = np.array([r["log_rmse"] for r in runs if r["log_rmse"] is not None], dtype=float)
+    k_mean = float(k.mean())
+    return {
+        "runs": len(runs),
+        "k": k_mean,
+        "k_sd": max(float(k.std(ddof=1)), MIN_K_SPREAD * k_mean),
+        "noise": max(float(np.median(noise)) if len(noise) else MIN_LOG_NOISE, MIN_LOG_NOISE),
+    }
+
+
+def prior_parameters(prior):
+    # 正态-逆伽马先验：(a, b) | σ² ~ N(m0, σ²·Λ0⁻¹)，σ² ~ IG(a0, b0)
+    # 先验噪声方差取历史残差的中位数，斜率的先验方差 σ²/λ_b 等于历史冷却常数的方差
+    s2 = prior["noise"] ** 2
+    m0 = np.array([0.0, -prior["k"]])
+    L0 = np.diag([INTERCEPT_PRECISION, s2 / prior["k_sd"] ** 2])
+    a0 = PRIOR_NOISE_DOF / 2
+    return m0, L0, a0, a0 * s2
+
+
+def posterior(prior, S0, St, Sy, Stt, Sty, Syy):
+    # 由读数的累加量求后验，返回 (后验均值 (a, b), 协方差尺度 Λn⁻¹, an, bn)
+    m0, L0, a0, b0 = prior_parameters(prior)
+    Ln = L0 + np.array([[S0, St], [St, Stt]])
+    rhs = L0 @ m0 + np.array([Sy, Sty])
+    mn = np.linalg.solve(Ln, rhs)
+    an = a0 + S0 / 2
+    bn = b0 + max(0.5 * (Syy + m0 @ L0 @ m0 - mn @ rhs), 0.0)
+    return mn, np.linalg.inv(Ln), an, bn
+
+
+def posterior_interval(post, T_env, T_target, t_curve=None, n_samples=POSTERIOR_SAMPLES, levels=LEVELS, seed=None):
+    # 从后验（多元 t 分布）抽样得到冷却时间和预测曲线的百分位区间，格式与 cooling_interval 相同
+    mn, V, an, bn = post
+    rng = np.random.default_rng(seed)
+    scale = np.sqrt(2 * bn / rng.chisquare(2 * an, n_samples))  # σ ~ 逆伽马(an, bn) 的平方根
+    z = rng.standard_normal((n_samples, 2)) @ np.linalg.cholesky(V).T
+    a = mn[0] + scale * z[:, 0]
+    k = -(mn[1] + scale * z[:, 1])
+    valid = k > 0
+    a, k = a[valid], k[valid]
+    if len(k) == 0:
+        return None
+    T0 = np.exp(a) + T_env
+    result = {
+        "levels": levels,
+        "samples": len(k),
+        "t_cool": np.nanpercentile(predict_cooling_time(k, T0, T_env, T_target), levels),
+        "k": np.percentile(k, levels),
+        "T0": np.percentile(T0, levels),
+        "curve": None,
+    }
+    if t_curve is not None:
+        curves = T_env + (T0[:, None] - T_env) * np.exp(-k[:, None] * np.asarray(t_curve)[None, :])
+        result["curve"] = np.percentile(curves, levels, axis=0)
+    return result
+
+
+def log_rmse(t, T, T_env, k, T0):
+    # 拟合结果在对数空间的残差均方根，记录到历史中作为以后的先验噪声
+    t = np.asarray(t, dtype=float).ravel()
+    T = np.asarray(T, dtype=float).ravel()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        resid = np.log(T - T_env) - (np.log(T0 - T_env) - k * t)
+    resid = resid[np.isfinite(resid)]
+    return float(np.sqrt(np.mean(resid ** 2))) if len(resid) else None
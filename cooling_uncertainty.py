@@ -0,0 +1,96 @@
+# 作者：Zack
+# 日期：2026/10/18
+# 冷却时间的不确定度：在对数线性拟合的基础上做自助法（bootstrap）重采样，
+# 每一批重采样作为一个批量最小二乘问题一次求解，可选分块交给进程池并行
+
+import numpy as np
+from cooling_fit import predict_cooling_time
+
+BOOTSTRAP_SAMPLES = 2000
+MAX_BATCH_ELEMENTS = 4_000_000  # 每批 (样本数 × 数据点数) 的上限，控制内存
+LEVELS = (2.5, 50, 97.5)
+
+
+def resample_coefficients(t, y, n_boot, method, seed):
+    # 返回 n_boot 组 (斜率, 截距)；method="residual" 重采样残差，"pairs" 重采样数据点
+    rng = np.random.default_rng(seed)
+    n = len(t)
+    t_mean = t.mean()
+    tc = t - t_mean
+    Stt = tc @ tc
+    slope = tc @ (y - y.mean()) / Stt
+    intercept = y.mean() - slope * t_mean
+    fitted = intercept + slope * t
+    resid = y - fitted
+
+    slopes = np.empty(n_boot)
+    intercepts = np.empty(n_boot)
+    batch = max(1, MAX_BATCH_ELEMENTS // n)
+    for start in range(0, n_boot, batch):
+        stop = min(start + batch, n_boot)
+        idx = rng.integers(0, n, size=(stop - start, n))
+        if method == "residual":
+            # 设计矩阵不变，所有样本的斜率是一次矩阵乘法
+            Y = fitted + resid[idx]
+            Y_mean = Y.mean(axis=1)
+            b = (Y - Y_mean[:, None]) @ tc / Stt
+            a = Y_mean - b * t_mean
+        else:
+            # 每个样本的时间点不同，按行求中心化和
+            tb = t[idx]
+            yb = y[idx]
+            tb_mean = tb.mean(axis=1)
+            yb_mean = yb.mean(axis=1)
+            tcb = tb - tb_mean[:, None]
+            Sttb = np.einsum("ij,ij->i", tcb, tcb)
+            Styb = np.einsum("ij,ij->i", tcb, yb - yb_mean[:, None])
+            with np.errstate(divide="ignore", invalid="ignore"):
+                b = np.where(Sttb > 0, Styb / Sttb, np.nan)
+            a = yb_mean - b * tb_mean
+        slopes[start:stop] = b
+        intercepts[start:stop] = a
+    return slopes, intercepts
+
+
+def bootstrap_fit(t, T, T_env, n_boot=BOOTSTRAP_SAMPLES, method="residual", seed=None, executor=None, chunks=4):
+    # 返回 n_boot 组 k、T0；传入 executor（如 ProcessPoolExecutor）时分 chunks 块并行，各块使用独立随机种子
+    if method not in ("residual", "pairs"):
+        raise ValueError(f"不支持的重采样方法: {method}")
+    t = np.asarray(t, dtype=float).ravel()
+    y = np.log(np.asarray(T, dtype=float).ravel() - T_env)
+
+    if executor is None:
+        slopes, intercepts = resample_coefficients(t, y, n_boot, method, seed)
+    else:
+        seeds = np.random.SeedSequence(seed).spawn(chunks)
+        sizes = np.diff(np.linspace(0, n_boot, chunks + 1).astype(int))
+        futures = [executor.submit(resample_coefficients, t, y, int(size), method, s)
+                   for size, s in zip(sizes, seeds) if size > 0]
+        parts = [f.result() for f in futures]
+        slopes = np.concatenate([p[0] for p in parts])
+        intercepts = np.concatenate([p[1] for p in parts])
+    return -slopes, np.exp(intercepts) + T_env
+
+
+def cooling_interval(t, T, T_env, T_target, t_curve=None, n_boot=BOOTSTRAP_SAMPLES, method="residual",
+                     levels=LEVELS, seed=None, executor=None):
+    # 冷却时间和预测曲线的百分位区间
+    # 返回 {"t_cool": 各百分位的冷却时间, "k": ..., "T0": ..., "curve": (len(levels), len(t_curve)) 或 None}
+    k, T0 = bootstrap_fit(t, T, T_env, n_boot, method, seed, executor)
+    valid = np.isfinite(k) & (k > 0)
+    k, T0 = k[valid], T0[valid]
+    if len(k) == 0:
+        return None
+    t_cool = predict_cooling_time(k, T0, T_env, T_target)
+    result = {
+        "levels": levels,
+        "samples": len(k),
+        "t_cool": np.nanpercentile(t_cool, levels),
+        "k": np.percentile(k, levels),
+        "T0": np.percentile(T0, levels),
+        "curve": None,
+    }
+    if t_curve is not None:
+        curves = T_env + (T0[:, None] - T_env) * np.exp(-k[:, None] * np.asarray(t_curve)[None, :])
+        result["curve"] = np.percentile(curves, levels, axis=0)
+    return result
@@ -0,0 +1,52 @@
+# 作者：Zack
+# 日期：2026/10/18
+# 图表的生命周期：Figure 直接创建（不经过 pyplot，不进入全局图表管理器），归所在窗口所有；窗口销毁时断开已销毁的
+# Tk 画布并放回池中。再次打开工具时取出已建好坐标轴和静态元素的 Figure，只新建 Tk 画布；池的大小有上限，内存保持平稳
+
+from matplotlib.backend_bases import FigureCanvasBase
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+
+POOL_SIZE = 2  # 每种图表最多保留的空闲 Figure 数
+
+
+class FigurePool:
+    def __init__(self, size=POOL_SIZE):
+        self.size = size
+        self.idle = {}  # 图表种类 -> [(figure, owner), ...]
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, kind, master, figsize, build=None):
+        # 返回 (figure, canvas, owner)；新建时 owner = build(figure, canvas)（坐标轴或图表对象），
+        # 从池中取出时沿用原来的 owner，调用方负责把它接到新的画布上
+        idle = self.idle.get(kind)
+        if idle:
+            figure, owner = idle.pop()
+            self.reused += 1
+            return figure, FigureCanvasTkAgg(figure, master=master), owner
+        figure = Figure(figsize=figsize)
+        canvas = FigureCanvasTkAgg(figure, master=master)
+        self.created += 1
+        owner = build(figure, canvas) if build is not None else None
+        return figure, canvas, owner
+
+    def release(self, kind, figure, owner=None, reset=None):
+        # 窗口销毁后调用：换上不绑定窗口的画布（释放 Tk 图像缓冲），reset(owner) 清除数据；池满时丢弃
+        FigureCanvasBase(figure)
+        idle = self.idle.setdefault(kind, [])
+        if len(idle) >= self.size:
+            return False
+        if reset is not None:
+            reset(owner)
+        idle.append((figure, owner))
+        return True
+
+    def clear(self):
+        self.idle.clear()
+
+    def __len__(self):
+        return sum(len(idle) for idle in self.idle.values())
+
+
+FIGURE_POOL = FigurePool()
@@ -0,0 +1,176 @@
+# 作者：Zack
+# 日期：2026/10/18
+# 大文件日志导入：通过 mmap 分块读取热电偶日志，整块向量化解析成 NumPy 数组，不经过 tk.Text
+# 支持空格/逗号/制表符/分号分隔，“#”开头的行视为注释，第一行为非数字表头时自动跳过
+# 时间列可以是分钟数、时:分(:秒)、ISO 日期时间或 Unix 时间戳，见 timestamps.py
+# ncol=None 时按第一条数据行确定列数，支持 时间 + 多个温度列（多个热电偶），温度返回 (行数, 通道数) 数组
+
+import mmap
+import os
+import numpy as np
+from timestamps import KIND_ISO, KIND_NUMBER, detect_kind, parse_timestamps
+
+CHUNK_BYTES = 4 * 1024 * 1024
+PREVIEW_LINES = 5
+
+
+def iter_blocks(path, chunk_bytes=CHUNK_BYTES):
+    # 按行边界切分文件，每次产出一个约 chunk_bytes 大小的字节块
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = 3 if mm[:3] == b"\xef\xbb\xbf" else 0
+            while start < size:
+                end = min(start + chunk_bytes, size)
+                if end < size:
+                    newline = mm.rfind(b"\n", start, end)
+                    if newline < 0:
+                        newline = mm.find(b"\n", end)
+                    end = size if newline < 0 else newline + 1
+                yield mm[start:end]
+                start = end
+
+
+def is_header(line):
+    # 第一行无法按数字解析时视为表头
+    parts = line.replace(b",", b" ").replace(b";", b" ").split()
+    try:
+        float(parts[-1])
+    except ValueError:
+        return True
+    return False
+
+
+def clean_block(block, skip_header=False):
+    # 注释行和表头替换为空行（保留行号），统一分隔符为空白
+    if b"#" in block:
+        block = b"\n".join(b"" if line.lstrip().startswith(b"#") else line for line in block.split(b"\n"))
+    if skip_header:
+        stripped = block.lstrip()
+        first_line = stripped.split(b"\n", 1)[0]
+        if first_line and is_header(first_line):
+            block = block[:len(block) - len(stripped)] + stripped[len(first_line):]
+    return block.replace(b",", b" ").replace(b";", b" ")
+
+
+def detect_layout(block, time_format, ncol=2):
+    # 由第一条数据行确定时间格式、每行字段数（日期和时间分成两列时多一列）和列数（时间 + 温度列）
+    # time_format: "auto" 自动判断（小数字视为分钟数），"timestamp" 只接受时间戳，或直接指定 timestamps 中的格式
+    parts = block.lstrip().split(b"\n", 1)[0].split()
+    if time_format in ("auto", "timestamp"):
+        kind = detect_kind(parts[0], allow_number=time_format == "auto")
+    else:
+        kind = time_format
+    split_date = kind == KIND_ISO and len(parts) >= 3 and b":" in parts[1] and b":" not in parts[0]
+    if ncol is None:
+        ncol = max(len(parts) - split_date, 2)
+    width = ncol
+    if split_date and len(parts) == ncol + 1:
+        width = ncol + 1
+    return kind, width, ncol
+
+
+def line_fields(block):
+    # 每行的字段数（空白分隔），向量化地数每行中非空白字符段的开头
+    chars = np.frombuffer(block, dtype=np.uint8)
+    space = (chars == 32) | ((chars >= 9) & (chars <= 13))
+    starts = ~space & np.r_[True, space[:-1]]
+    counts = np.r_[0, np.cumsum(starts)]
+    newlines = np.flatnonzero(chars == 10)
+    return counts[np.r_[newlines, len(chars)]] - counts[np.r_[0, newlines + 1]]
+
+
+def split_table(block, width, ncol=2, line=1):
+    # 整块切分为 (行数, width) 的字节串表格；逐行检查字段数，空行跳过，line 为块中第一行的行号
+    fields = line_fields(block)
+    bad = np.flatnonzero((fields != 0) & (fields != width))
+    if len(bad):
+        where = f"第 {line + int(bad[0])} 行: "
+        if ncol == 2:
+            return None, where + "每行必须包含两个数字（时间 温度）"
+        return None, where + f"每行必须包含 {ncol} 个数字（时间 和 {ncol - 1} 个温度）"
+    return np.array(block.split()).reshape(-1, width), None
+
+
+def convert_table(table, kind, width, ncol, base_date, after):
+    # 时间列转换为 datetime64[ms]（数字格式为分钟数），温度列转换为 float（多个温度列时为二维数组）
+    if width > ncol:
+        column = np.char.add(np.char.add(table[:, 0], b"T"), table[:, 1])
+    else:
+        column = table[:, 0]
+    if kind == KIND_NUMBER:
+        times = column.astype(float)
+    else:
+        times = parse_timestamps(column, base_date, kind, after)
+    if ncol == 2:
+        return times, table[:, -1].astype(float)
+    return times, table[:, width - ncol + 1:].astype(float)
+
+
+def parse_block(block, time_format="auto", ncol=2, skip_header=False, base_date=None, after=None, layout=None,
+                line=1):
+    # 解析一个字节块，返回 (时间, 温度, 错误信息)；line 为块中第一行在文件中的行号（用于错误信息）
+    # 时间为 datetime64[ms] 数组；time_format 为 "number" 或自动判断为相对分钟数时为 float 分钟数
+    block = clean_block(block, skip_header)
+    if not block.strip():
+        return np.zeros(0), np.zeros(0), None
+    if base_date is None:
+        base_date = np.datetime64("today")
+    kind, width, ncol = layout or detect_layout(block, time_format, ncol)
+    table, error_msg = split_table(block, width, ncol, line)
+    if error_msg:
+        return None, None, error_msg
+    try:
+        times, temps = convert_table(table, kind, width, ncol, base_date, after)
+    except ValueError:
+        return None, None, "无效的数字格式"
+    return times, temps, None
+
+
+def parse_text(text, time_format="auto", base_date=None, after=None, ncol=2):
+    # 解析文本框中的内容（与文件使用同一套向量化解析）
+    return parse_block(text.encode("utf-8"), time_format, ncol, base_date=base_date, after=after)
+
+
+def load_log(path, time_format="auto", base_date=None, chunk_bytes=CHUNK_BYTES, ncol=2):
+    # 分块读取整个日志文件，返回 (时间, 温度, 错误信息)
+    # 各块沿用第一块判断出的格式，只有 时:分 的数据跨块时也能正确处理跨零点
+    time_chunks, temp_chunks = [], []
+    layout = None
+    after = None
+    line = 1
+    for block in iter_blocks(path, chunk_bytes):
+        block_line = line
+        line += block.count(b"\n")
+        if layout is None:
+            block = clean_block(block, skip_header=True)
+            if not block.strip():
+                continue
+            layout = detect_layout(block, time_format, ncol)
+        times, temps, error_msg = parse_block(block, time_format, base_date=base_date, after=after, layout=layout,
+                                              line=block_line)
+        if error_msg:
+            return None, None, error_msg
+        if len(times):
+            after = times[-1] if layout[0] != KIND_NUMBER else None
+            time_chunks.append(times)
+            temp_chunks.append(temps)
+    if not time_chunks:
+        return np.zeros(0), np.zeros(0), None
+    return np.concatenate(time_chunks), np.concatenate(temp_chunks), None
+
+
+def file_preview(path, n=PREVIEW_LINES):
+    # 返回文件开头和结尾各 n 行文本，用于在文本框中显示摘要
+    head, tail = [], []
+    with open(path, "rb") as f:
+        for line in f:
+            if len(head) >= n:
+                break
+            head.append(line.decode("utf-8", "replace").strip())
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(0, size - 4096))
+        tail = [line.decode("utf-8", "replace").strip() for line in f.read().splitlines()[-n:]]
+    return head, tail
@@ -0,0 +1,61 @@
+# 作者：Zack
+# 日期：2026/10/18
+# 绘图细节层次（LOD）：长时间的测量序列按屏幕像素数抽稀后再绘制
+# 按像素分桶，每个桶保留最低点和最高点（曲线的尖峰和包络不丢失），结果按视图范围缓存
+
+from collections import OrderedDict
+import numpy as np
+
+LOD_MIN_POINTS = 2000  # 点数少于该值时不抽稀
+CACHE_ENTRIES = 16
+
+
+def minmax_decimate(x, y, n_buckets, x_range=None):
+    # 把视图范围按像素等分为 n_buckets 个桶，每个桶只保留最低点和最高点，全程向量化
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if x_range is None:
+        x_range = (x.min(), x.max()) if len(x) else (0.0, 1.0)
+    x0, x1 = x_range
+    inside = (x >= x0) & (x <= x1)
+    x, y = x[inside], y[inside]
+    if len(x) <= 2 * n_buckets:
+        return x, y
+
+    span = (x1 - x0) or 1.0
+    bucket = np.minimum(((x - x0) / span * n_buckets).astype(np.int64), n_buckets - 1)
+    # 先按桶、再按温度排序，每个桶的第一个是最低点，最后一个是最高点
+    order = np.lexsort((y, bucket))
+    sorted_bucket = bucket[order]
+    starts = np.flatnonzero(np.r_[True, sorted_bucket[1:] != sorted_bucket[:-1]])
+    ends = np.r_[starts[1:], len(order)] - 1
+    keep = np.unique(np.concatenate([order[starts], order[ends]]))
+    return x[keep], y[keep]
+
+
+class LodCache:
+    # 按 (视图范围, 像素宽度) 缓存抽稀结果，视图不变时直接复用，LRU 淘汰
+    def __init__(self, max_entries=CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.x = np.zeros(0)
+        self.y = np.zeros(0)
+        self.cache = OrderedDict()
+
+    def set_data(self, x, y):
+        # 数据变化后缓存全部失效
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.cache.clear()
+
+    def reduce(self, x0, x1, pixels):
+        pixels = max(int(pixels), 1)
+        key = (float(x0), float(x1), pixels)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        result = minmax_decimate(self.x, self.y, pixels, (x0, x1))
+        self.cache[key] = result
+        if len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+        return result
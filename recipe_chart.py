@@ -0,0 +1,181 @@
+# 作者：Zack
+# 日期：2026/10/18
+# 升温曲线预览：折线和温度/速率标注都是常驻的元素，输入变化时用 set_data/set_paths/set_offsets 原地更新，
+# 再用 blit 只重绘这些动态元素。标注按文字缓存为字形路径，每组标注是一个 PathCollection，一次绘制
+# （逐个绘制 Text 的字体排版比画折线还慢）；标注多于可容纳的数量时按像素间距取舍，重绘时间不随阶段数增长
+
+import numpy as np
+from matplotlib.collections import PathCollection
+from matplotlib.font_manager import FontProperties
+from matplotlib.path import Path
+from matplotlib.textpath import TextPath
+from matplotlib.transforms import Affine2D
+from chart_fonts import setup_fonts
+
+Y_LIMIT = 2000  # 纵轴默认上限 (°C)
+HEADROOM = 0.05  # 横轴两端预留的余量
+SHRINK = 0.5  # 总时长缩短到横轴范围的一半以下时缩小横轴
+LABEL_SIZE = 10  # 标注字号（点）
+LABEL_SPACING = 70  # 标注多于可容纳的数量时，相邻标注的最小水平间距（像素）
+LABEL_CACHE_SIZE = 4096
+TEMP_OFFSET = 20  # 温度标注在折点上方的偏移 (°C)
+RATE_OFFSET = 40  # 速率标注在折点下方的偏移 (°C)
+
+
+def curve_points(recipe):
+    # 由配方数据计算折线和需要标注的折点：返回 (x, y, 温度, 速率, 温度标注的折点, 速率标注的折点)
+    # 忽略温度和时间都为 0 的阶段；温度与上一个标注的阶段相同时不重复标注，只标注升温阶段的速率
+    n = len(recipe)
+    temps, times, rates = recipe.temps[:n], recipe.times[:n], recipe.rates[:n]
+    keep = ~np.isnan(temps) & ~np.isnan(times) & ((temps != 0) | (times != 0))
+    T, dt, rate = temps[keep], times[keep], rates[keep]
+    x = np.r_[0.0, np.cumsum(dt)]
+    y = np.r_[recipe.room_temp, T]
+    marked = np.flatnonzero((T != 0) & (dt != 0))
+    if len(marked):
+        marked = marked[np.r_[True, T[marked[1:]] != T[marked[:-1]]]]
+    rising = np.flatnonzero(np.nan_to_num(rate) > 0)
+    return x, y, T, rate, marked + 1, rising + 1
+
+
+def thin_labels(px, points, spacing):
+    # 从左到右保留与上一个保留的标注相距至少 spacing 像素的折点
+    kept = []
+    last = -np.inf
+    for i in points:
+        if px[i] - last >= spacing:
+            kept.append(i)
+            last = px[i]
+    return kept
+
+
+class LabelPaths:
+    # 文字 -> 对齐后的字形路径（单位为点，原点为标注位置），缓存满时清空
+    def __init__(self, size=LABEL_SIZE, max_entries=LABEL_CACHE_SIZE):
+        self.prop = FontProperties(size=size)
+        self.max_entries = max_entries
+        self.paths = {}
+
+    def get(self, text, va):
+        # 水平居中；va 为 'bottom' 时文字在原点上方，'top' 时在下方
+        key = (text, va)
+        path = self.paths.get(key)
+        if path is None:
+            if len(self.paths) >= self.max_entries:
+                self.paths.clear()
+            path = TextPath((0, 0), text, prop=self.prop)
+            box = path.get_extents()
+            shift = (-(box.x0 + box.x1) / 2, -box.y0 if va == 'bottom' else -box.y1)
+            path = Path(path.vertices + shift, path.codes)
+            self.paths[key] = path
+        return path
+
+
+class RecipeChart:
+    def __init__(self, figure, canvas):
+        self.figure = figure
+        self.canvas = canvas
+
+        setup_fonts()  # 中文字体（解析结果跨会话缓存）
+
+        self.ax = figure.add_subplot(111)
+        ax = self.ax
+        # 动态元素：折线和两组标注；标注的位置为数据坐标，字形路径按点换算为像素
+        self.line, = ax.plot([], [], marker='o', linestyle='-', color='r', animated=True)
+        self.label_paths = LabelPaths()
+        points_to_pixels = Affine2D().scale(1 / 72) + figure.dpi_scale_trans
+        self.temp_labels, self.rate_labels = (
+            PathCollection([], offsets=np.zeros((0, 2)), offset_transform=ax.transData, transform=points_to_pixels,
+                           facecolors='black', edgecolors='none', animated=True) for _ in range(2))
+        for labels in (self.temp_labels, self.rate_labels):
+            ax.add_collection(labels, autolim=False)
+        self.points = None  # curve_points 的结果
+        self.x_span = 0.0  # 当前横轴对应的总时长
+
+        ax.set_xlim(0, 1)
+        ax.set_ylim(0, Y_LIMIT)
+        ax.set_title("工艺配方升温曲线")
+        ax.set_xlabel("时间 (分钟)")
+        ax.set_ylabel("温度 (°C)")
+        ax.grid(True, linestyle='--', alpha=0.7)
+
+        self.background = None
+        canvas.mpl_connect('draw_event', self.on_draw)
+
+    def set_recipe(self, recipe):
+        self.points = curve_points(recipe)
+        x, y = self.points[:2]
+        self.line.set_data(x, y)
+
+    def reset(self):
+        # 清除曲线（不重绘），图表放回图表池时调用
+        self.points = None
+        self.line.set_data([], [])
+        self.layout_labels()
+        self.x_span = 0.0
+        self.background = None
+
+    def attach(self, canvas):
+        # 从图表池取出后接到新窗口的画布上（draw_event 回调保存在 Figure 上，不需要重新连接）
+        self.canvas = canvas
+        self.background = None
+
+    def rescale(self):
+        # 总时长超出横轴或缩短很多、温度超出纵轴时调整范围（需要整体重绘）
+        if self.points is None or len(self.points[0]) < 2:
+            return
+        x, y = self.points[:2]
+        total = x[-1]
+        if total > 0 and (total > self.x_span or total < self.x_span * SHRINK):
+            self.x_span = total
+            self.ax.set_xlim(-HEADROOM * total, (1 + HEADROOM) * total)
+            self.background = None
+        y0, y1 = min(0.0, y.min()), max(Y_LIMIT, y.max() + 2 * TEMP_OFFSET)
+        if (y0, y1) != tuple(self.ax.get_ylim()):
+            self.ax.set_ylim(y0, y1)
+            self.background = None
+
+    def place(self, labels, items, va):
+        # 把 [(x, y, 文字), ...] 设置到一组标注上
+        labels.set_paths([self.label_paths.get(text, va) for _, _, text in items])
+        labels.set_offsets(np.array([(xi, yi) for xi, yi, _ in items]).reshape(-1, 2))
+        labels.set_visible(len(items) > 0)
+
+    def layout_labels(self):
+        # 按当前坐标范围和坐标轴宽度决定显示哪些标注
+        if self.points is None:
+            self.place(self.temp_labels, [], 'bottom')
+            self.place(self.rate_labels, [], 'top')
+            return
+        x, y, T, rate, marked, rising = self.points
+        capacity = max(1, int(self.ax.bbox.width // LABEL_SPACING))
+        if len(marked) > capacity or len(rising) > capacity:
+            px = self.ax.transData.transform(np.column_stack([x, y]))[:, 0]
+            if len(marked) > capacity:
+                marked = thin_labels(px, marked, LABEL_SPACING)
+            if len(rising) > capacity:
+                rising = thin_labels(px, rising, LABEL_SPACING)
+        self.place(self.temp_labels, [(x[i], y[i] + TEMP_OFFSET, f"{T[i - 1]}°C") for i in marked], 'bottom')
+        self.place(self.rate_labels, [(x[i], y[i] - RATE_OFFSET, f"{rate[i - 1]:.1f}°C/min") for i in rising], 'top')
+
+    def refresh(self):
+        # 坐标范围变化时整体重绘（draw_event 中重新缓存背景），否则只 blit 折线和标注
+        self.rescale()
+        if self.background is None:
+            self.canvas.draw_idle()
+            return
+        self.layout_labels()
+        self.canvas.restore_region(self.background)
+        self.draw_animated()
+        self.canvas.blit(self.figure.bbox)
+
+    def on_draw(self, event):
+        # 每次完整重绘（包括窗口缩放）后缓存不含动态元素的背景，再画上动态元素
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.layout_labels()
+        self.draw_animated()
+
+    def draw_animated(self):
+        for artist in (self.line, self.temp_labels, self.rate_labels):
+            if artist.get_visible():
+                self.ax.draw_artist(artist)
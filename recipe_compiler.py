@@ -0,0 +1,121 @@
+# 作者：Zack
+# 日期：2026/10/18
+# 设定值表编译：把工艺配方（各阶段的目标温度和时间）转换为按固定时间步长（默认 1 秒）的温度设定值序列，
+# 按累计时间用 np.interp 线性插值；长时间的程序可按固定大小逐块生成（生成器），不需要把整段放在内存中
+
+import argparse
+import sys
+import numpy as np
+from recipe_model import DEFAULT_ROOM_TEMP, RecipeModel, parse_value
+from recipe_store import DEFAULT_PATH, RecipeStore, read_recipe_file
+
+SETPOINT_STEP = 1.0  # 设定值的时间步长（秒）
+CHUNK_SIZE = 3600  # 逐块生成时每块的设定值数（步长 1 秒时为 1 小时）
+
+
+def recipe_stages(stages, room_temp=DEFAULT_ROOM_TEMP):
+    # 输入框文字 [(温度, 时间), ...] -> (温度列表, 时间列表)，与预览曲线使用相同的阶段
+    recipe = RecipeModel(room_temp)
+    for temp, time in stages:
+        recipe.add_stage(parse_value(temp), parse_value(time))
+    return recipe.curve_stages()
+
+
+def breakpoints(room_temp, temps, times):
+    # 折点 (累计时间 秒, 温度)，返回 (时间, 温度, 错误信息)：从室温开始，每个阶段在其时间（分钟）内线性变化到
+    # 目标温度；时间为 0 的阶段是阶跃，np.interp 在重复的时间点上取后一个值，即从该时刻起为新的温度
+    times = np.asarray(times, dtype=float)
+    if len(times) == 0:
+        return None, None, "没有有效的阶段"
+    if np.any(times < 0):
+        return None, None, "阶段时间不能为负数"
+    t_break = np.r_[0.0, np.cumsum(times) * 60.0]
+    T_break = np.r_[float(room_temp), np.asarray(temps, dtype=float)]
+    return t_break, T_break, None
+
+
+def setpoint_count(t_break, step=SETPOINT_STEP):
+    # 从 0 到程序结束（含结束时刻）的设定值个数
+    return int(np.floor(t_break[-1] / step + 1e-9)) + 1
+
+
+def compile_setpoints(t_break, T_break, step=SETPOINT_STEP):
+    # 整段设定值 (时间 秒, 温度)
+    t = np.arange(setpoint_count(t_break, step)) * step
+    return t, np.interp(t, t_break, T_break)
+
+
+def stream_setpoints(t_break, T_break, step=SETPOINT_STEP, chunk=CHUNK_SIZE):
+    # 逐块生成 (时间 秒, 温度)，每块 chunk 个（最后一块可能较少），每块只对该时间段插值
+    n = setpoint_count(t_break, step)
+    offsets = np.arange(chunk)
+    for start in range(0, n, chunk):
+        t = (start + offsets[:min(chunk, n - start)]) * step
+        yield t, np.interp(t, t_break, T_break)
+
+
+def write_setpoints(f, chunks, decimals=2):
+    # 逐块写成 CSV（时间 秒, 设定值），返回写入的行数
+    f.write("time_s,setpoint\n")
+    count = 0
+    for t, T in chunks:
+        np.savetxt(f, np.column_stack([t, T]), fmt=("%g", f"%.{decimals}f"), delimiter=",")
+        count += len(t)
+    return count
+
+
+def export_setpoints(path, room_temp, temps, times, step=SETPOINT_STEP, chunk=CHUNK_SIZE):
+    # 配方 -> 设定值 CSV 文件（逐块生成和写入），返回 (行数, 错误信息)；可在后台任务中执行
+    t_break, T_break, error_msg = breakpoints(room_temp, temps, times)
+    if error_msg:
+        return 0, error_msg
+    try:
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            return write_setpoints(f, stream_setpoints(t_break, T_break, step, chunk)), None
+    except OSError as error:
+        return 0, str(error)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="把工艺配方编译为固定步长的温度设定值表（CSV）")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--recipe", help="配方库中的配方名称")
+    source.add_argument("--file", help="JSON 配方文件")
+    parser.add_argument("--db", default=DEFAULT_PATH, help="配方库文件")
+    parser.add_argument("--step", type=float, default=SETPOINT_STEP, help="时间步长（秒）")
+    parser.add_argument("--chunk", type=int, default=CHUNK_SIZE, help="每次生成和写入的设定值数")
+    parser.add_argument("-o", "--output", help="输出 CSV 文件（默认输出到标准输出）")
+    args = parser.parse_args(argv)
+    if args.step <= 0 or args.chunk <= 0:
+        parser.error("步长和分块大小必须为正数")
+
+    if args.recipe is not None:
+        store = RecipeStore(args.db)
+        recipe = store.load(args.recipe)
+        store.close()
+        error_msg = None if recipe is not None else "配方库中没有该配方"
+    else:
+        recipe, error_msg = read_recipe_file(args.file)
+    if error_msg:
+        print(error_msg, file=sys.stderr)
+        return 1
+    room_temp = recipe.get("room_temp")
+    room_temp = DEFAULT_ROOM_TEMP if room_temp is None else room_temp
+    temps, times = recipe_stages(recipe["stages"], room_temp)
+
+    if args.output is None:
+        t_break, T_break, error_msg = breakpoints(room_temp, temps, times)
+        if not error_msg:
+            write_setpoints(sys.stdout, stream_setpoints(t_break, T_break, args.step, args.chunk))
+    else:
+        count, error_msg = export_setpoints(args.output, room_temp, temps, times, args.step, args.chunk)
+        if not error_msg:
+            print(f"{count} 个设定值已写入 {args.output}", file=sys.stderr)
+    if error_msg:
+        print(error_msg, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+# 作者：Zack
+# 日期：2026/10/18
+# 工艺配方数据模型（与控件无关）：各阶段的温度和时间保存在 NumPy 数组中，未填写或无法解析的值为 nan
+# 升温速率依赖上一个有效阶段的温度，修改某一阶段后只从该阶段开始重新计算，到其后第一个有效阶段为止；
+# update() 返回速率实际变化的阶段，界面只更新这些标签
+
+import math
+import numpy as np
+
+DEFAULT_ROOM_TEMP = 25.0  # 室温输入无效时使用
+MIN_CAPACITY = 8
+
+
+def parse_value(text):
+    # 输入框的内容 -> 浮点数，空白或无法解析时为 nan
+    try:
+        return float(text)
+    except ValueError:
+        return np.nan
+
+
+def same_value(a, b):
+    return a == b or (a != a and b != b)
+
+
+def same_rate(a, b):
+    # 显示的文字相同：0.0 与 -0.0 显示为 "0.00" 和 "-0.00"，需要区分
+    return same_value(a, b) and math.copysign(1.0, a) == math.copysign(1.0, b)
+
+
+class RecipeModel:
+    def __init__(self, room_temp=DEFAULT_ROOM_TEMP, stages=0):
+        self.room_temp = float(room_temp)
+        self.count = 0
+        self.temps = np.full(0, np.nan)
+        self.times = np.full(0, np.nan)
+        self.rates = np.full(0, np.nan)  # 升温速率 (°C/分钟)，无效阶段为 nan
+        self.ends = np.zeros(0)  # 各阶段结束时的累计时间（分钟），未填写的时间按 0 计
+        self.dirty = None  # 待重新计算的阶段范围 (最早, 最晚)
+        self.reserve(stages)
+        for _ in range(stages):
+            self.add_stage()
+
+    def reserve(self, capacity):
+        # 容量不足时按倍数扩大数组
+        if capacity <= len(self.temps):
+            return
+        capacity = max(capacity, 2 * len(self.temps), MIN_CAPACITY)
+        for name, fill in (("temps", np.nan), ("times", np.nan), ("rates", np.nan), ("ends", 0.0)):
+            old = getattr(self, name)
+            new = np.full(capacity, fill)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def __len__(self):
+        return self.count
+
+    def mark(self, lo, hi):
+        if self.dirty is not None:
+            lo, hi = min(lo, self.dirty[0]), max(hi, self.dirty[1])
+        self.dirty = (lo, hi)
+
+    def add_stage(self, temp=np.nan, time=np.nan):
+        self.reserve(self.count + 1)
+        i = self.count
+        self.count += 1
+        self.temps[i], self.times[i], self.rates[i] = temp, time, np.nan
+        self.mark(i, i)
+        return i
+
+    def remove_stage(self):
+        # 删除最后一个阶段，前面的阶段不受影响
+        if self.count == 0:
+            return
+        self.count -= 1
+        i = self.count
+        self.temps[i] = self.times[i] = self.rates[i] = np.nan
+        if self.dirty is not None:
+            lo, hi = self.dirty
+            self.dirty = None if lo >= self.count else (lo, min(hi, self.count - 1))
+
+    def clear(self):
+        # 删除全部阶段（保留已分配的数组）
+        self.temps[:] = self.times[:] = self.rates[:] = np.nan
+        self.ends[:] = 0.0
+        self.count = 0
+        self.dirty = None
+
+    def set_room_temp(self, room_temp):
+        if same_value(room_temp, self.room_temp):
+            return False
+        self.room_temp = float(room_temp)
+        self.mark(0, -1)  # 只影响第一个有效阶段
+        return True
+
+    def set_stage(self, i, temp, time):
+        # 值没有变化时不标记重新计算，返回是否有变化
+        if same_value(temp, self.temps[i]) and same_value(time, self.times[i]):
+            return False
+        self.temps[i], self.times[i] = temp, time
+        self.mark(i, i)
+        return True
+
+    def active(self, lo=0, hi=None):
+        # 参与速率计算的阶段：温度和时间都有效且时间不为 0
+        hi = self.count if hi is None else hi
+        temps, times = self.temps[lo:hi], self.times[lo:hi]
+        return ~np.isnan(temps) & ~np.isnan(times) & (times != 0)
+
+    def previous_temp(self, i):
+        # 阶段 i 之前最后一个有效阶段的温度（没有时为室温）
+        found = np.flatnonzero(self.active(0, i))
+        return self.room_temp if len(found) == 0 else float(self.temps[found[-1]])
+
+    def update(self):
+        # 重新计算标记范围内的累计时间和速率，返回速率有变化的阶段序号
+        if self.dirty is None:
+            return []
+        lo, hi = self.dirty
+        self.dirty = None
+        n = self.count
+        lo = max(lo, 0)
+        if lo >= n:
+            return []
+
+        start = self.ends[lo - 1] if lo else 0.0
+        self.ends[lo:n] = start + np.cumsum(np.nan_to_num(self.times[lo:n]))
+
+        prev = self.previous_temp(lo)
+        changed = []
+        temps, times, rates = self.temps, self.times, self.rates
+        for i in range(lo, n):
+            temp, time = float(temps[i]), float(times[i])
+            active = temp == temp and time == time and time != 0
+            rate = (temp - prev) / time if active else np.nan
+            if not same_rate(rate, rates[i]):
+                rates[i] = rate
+                changed.append(i)
+            if active:
+                # 最后一个修改的阶段之后的第一个有效阶段温度不变，再往后的速率不受影响
+                if i > hi:
+                    break
+                prev = temp
+        return changed
+
+    def rate_text(self, i):
+        rate = self.rates[i]
+        return "" if rate != rate else f"{rate:.2f}"
+
+    def rate_texts(self):
+        return [self.rate_text(i) for i in range(self.count)]
+
+    def total_time(self):
+        return float(self.ends[self.count - 1]) if self.count else 0.0
+
+    def curve_stages(self):
+        # 生成曲线用的阶段：温度和时间都有效，忽略温度和时间都为 0 的阶段
+        temps, times = self.temps[:self.count], self.times[:self.count]
+        keep = ~np.isnan(temps) & ~np.isnan(times) & ((temps != 0) | (times != 0))
+        return temps[keep].tolist(), times[keep].tolist()
@@ -0,0 +1,196 @@
+# 作者：Zack
+# 日期：2026/10/18
+# 工艺配方库：配方保存在本地 SQLite 数据库中。摘要（名称、产品、炉号、阶段数、最高温度、总时长）单独一张表，
+# 按名称、产品、最高温度、总时长建索引；各阶段的数据放在另一张表，只在打开配方时按主键读取
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime
+from recipe_model import DEFAULT_ROOM_TEMP, parse_value
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".recipes.sqlite3")
+COLUMNS = ("name", "product", "furnace", "room_temp", "stages", "peak_temp", "duration", "updated")
+PAGE_SIZE = 200  # 列表每次读取的配方数
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recipes (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    product TEXT,
+    furnace TEXT,
+    room_temp REAL,
+    stages INTEGER,
+    peak_temp REAL,
+    duration REAL,
+    updated TEXT
+);
+CREATE TABLE IF NOT EXISTS recipe_stages (
+    recipe_id INTEGER PRIMARY KEY REFERENCES recipes (id) ON DELETE CASCADE,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS recipes_product ON recipes (product, name);
+CREATE INDEX IF NOT EXISTS recipes_peak ON recipes (peak_temp);
+CREATE INDEX IF NOT EXISTS recipes_duration ON recipes (duration);
+"""
+
+
+def summarize(stages):
+    # 阶段 [(温度文字, 时间文字), ...] -> (最高温度, 总时长)，只统计温度和时间都有效的阶段
+    valid = [(temp, time) for temp, time in ((parse_value(a), parse_value(b)) for a, b in stages)
+             if temp == temp and time == time]
+    if not valid:
+        return None, 0.0
+    return max(temp for temp, _ in valid), sum(time for _, time in valid)
+
+
+class RecipeStore:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def write(self, name, stages, product=None, furnace=None, room_temp=DEFAULT_ROOM_TEMP):
+        # 写入一个配方（不提交），同名配方被覆盖；stages 为各阶段输入框中的文字，原样保存
+        stages = [(str(temp), str(time)) for temp, time in stages]
+        peak_temp, duration = summarize(stages)
+        values = (name, product or None, furnace or None, room_temp, len(stages), peak_temp, duration,
+                  datetime.now().isoformat(timespec="seconds"))
+        recipe_id = self.conn.execute(
+            f"INSERT INTO recipes ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))}) "
+            "ON CONFLICT (name) DO UPDATE SET "
+            + ", ".join(f"{c} = excluded.{c}" for c in COLUMNS[1:])
+            + " RETURNING id",
+            values,
+        ).fetchone()[0]
+        self.conn.execute("INSERT OR REPLACE INTO recipe_stages (recipe_id, data) VALUES (?, ?)",
+                          (recipe_id, json.dumps(stages, ensure_ascii=False)))
+        return recipe_id
+
+    def save(self, name, stages, product=None, furnace=None, room_temp=DEFAULT_ROOM_TEMP):
+        with self.conn:
+            return self.write(name, stages, product, furnace, room_temp)
+
+    def save_many(self, recipes):
+        # 批量导入（一个事务）：recipes 为字典 {name, stages, product, furnace, room_temp}
+        with self.conn:
+            for recipe in recipes:
+                self.write(recipe["name"], recipe["stages"], recipe.get("product"), recipe.get("furnace"),
+                           recipe.get("room_temp", DEFAULT_ROOM_TEMP))
+
+    def query(self, name=None, product=None, furnace=None, peak=(None, None), duration=(None, None),
+              after=None, limit=PAGE_SIZE):
+        # 按名称前缀、产品、炉号、最高温度范围、总时长范围查询摘要（不读阶段数据），按名称排序；
+        # after 为上一页最后一个名称（按名称分页，翻页不需要跳过前面的行）
+        where, args = [], []
+        if name:
+            where.append("name >= ? AND name < ?")
+            args += [name, name + "\U0010ffff"]
+        for column, value in (("product", product), ("furnace", furnace)):
+            if value:
+                where.append(f"{column} = ?")
+                args.append(value)
+        for column, (lo, hi) in (("peak_temp", peak), ("duration", duration)):
+            if lo is not None:
+                where.append(f"{column} >= ?")
+                args.append(lo)
+            if hi is not None:
+                where.append(f"{column} <= ?")
+                args.append(hi)
+        if after is not None:
+            where.append("name > ?")
+            args.append(after)
+        sql = f"SELECT {', '.join(COLUMNS)} FROM recipes"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY name"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(int(limit))
+        return [dict(zip(COLUMNS, row)) for row in self.conn.execute(sql, args)]
+
+    def load(self, name):
+        # 读取一个配方（摘要和各阶段），不存在时返回 None
+        row = self.conn.execute(
+            f"SELECT {', '.join(COLUMNS)}, data FROM recipes JOIN recipe_stages ON recipe_id = id WHERE name = ?",
+            (name,),
+        ).fetchone()
+        if row is None:
+            return None
+        recipe = dict(zip(COLUMNS, row))
+        recipe["stages"] = [tuple(stage) for stage in json.loads(row[-1])]
+        return recipe
+
+    def delete(self, name):
+        with self.conn:
+            self.conn.execute("DELETE FROM recipes WHERE name = ?", (name,))
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM recipes").fetchone()[0]
+
+    def products(self):
+        return [row[0] for row in self.conn.execute(
+            "SELECT DISTINCT product FROM recipes WHERE product IS NOT NULL ORDER BY product")]
+
+
+def read_recipe_file(path):
+    # JSON 文件：{"name", "product", "furnace", "room_temp", "stages": [[温度, 时间], ...]}，返回 (配方, 错误信息)
+    try:
+        with open(path, encoding="utf-8") as f:
+            recipe = json.load(f)
+    except (OSError, ValueError) as error:
+        return None, f"无法读取: {error}"
+    if not isinstance(recipe, dict) or not isinstance(recipe.get("stages"), list):
+        return None, "缺少阶段数据"
+    if any(not isinstance(stage, list) or len(stage) != 2 for stage in recipe["stages"]):
+        return None, "阶段格式应为 [温度, 时间]"
+    recipe.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+    return recipe, None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="工艺配方库：导入 JSON 配方文件或查询配方")
+    parser.add_argument("--db", default=DEFAULT_PATH, help="配方库文件")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("import", help="导入 JSON 配方文件（同名配方被覆盖）")
+    add.add_argument("files", nargs="+")
+    show = sub.add_parser("list", help="按条件列出配方")
+    show.add_argument("--name", help="名称前缀")
+    show.add_argument("--product")
+    show.add_argument("--furnace")
+    show.add_argument("--peak", nargs=2, type=float, metavar=("MIN", "MAX"), default=(None, None),
+                      help="最高温度范围 (℃)")
+    show.add_argument("--duration", nargs=2, type=float, metavar=("MIN", "MAX"), default=(None, None),
+                      help="总时长范围（分钟）")
+    show.add_argument("--limit", type=int, default=PAGE_SIZE)
+    args = parser.parse_args(argv)
+
+    store = RecipeStore(args.db)
+    status = 0
+    if args.command == "import":
+        recipes = []
+        for path in args.files:
+            recipe, error_msg = read_recipe_file(path)
+            if error_msg:
+                print(f"{path}: {error_msg}", file=sys.stderr)
+                status = 1
+            else:
+                recipes.append(recipe)
+        store.save_many(recipes)
+    else:
+        for recipe in store.query(args.name, args.product, args.furnace, args.peak, args.duration, limit=args.limit):
+            peak = "" if recipe["peak_temp"] is None else f"{recipe['peak_temp']:g}"
+            print(f"{recipe['name']}\t{recipe['product'] or ''}\t{recipe['furnace'] or ''}\t{recipe['stages']}\t"
+                  f"{peak}\t{recipe['duration']:g}")
+    store.close()
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+# 作者：Zack
+# 日期：2026/10/18
+# 有界的测量历史：最近一段保留全部原始读数，更早的读数逐级聚合为每分钟、每小时的 最小/平均/最大 值
+# 每一级都是预先分配的 NumPy 环形缓冲，内存固定；缓冲采用镜像写入（每个值同时写在 i 和 i + 容量 处），
+# 任意时刻各级的数据在内存中都是连续的一段，直接返回数组视图；需要整条序列时只拼接长度有上限的几段
+
+import numpy as np
+
+RECENT_POINTS = 20000  # 保留原始分辨率的最近读数数
+MINUTE_BINS = 7 * 24 * 60  # 每分钟聚合保留一周
+HOUR_BINS = 366 * 24  # 每小时聚合保留一年，更早的数据丢弃
+# 聚合记录的各列
+T_MEAN_TIME, T_MIN, T_MEAN, T_MAX, T_COUNT = range(5)
+
+
+class Ring:
+    # 镜像环形缓冲：width 列，每列的有效数据为 buffer[列, start:start + count]
+    def __init__(self, capacity, width):
+        self.capacity = int(capacity)
+        self.buffer = np.zeros((width, 2 * self.capacity))
+        self.start = 0
+        self.count = 0
+
+    def clear(self):
+        self.start = 0
+        self.count = 0
+
+    def view(self):
+        return self.buffer[:, self.start:self.start + self.count]
+
+    def push(self, cols):
+        # 追加若干列数据 (width, m)，返回被挤出的最旧数据 (width, k)
+        m = cols.shape[1]
+        cap = self.capacity
+        if m >= cap:
+            evicted = np.concatenate([self.view(), cols[:, :m - cap]], axis=1)
+            self.buffer[:, :cap] = cols[:, m - cap:]
+            self.buffer[:, cap:] = cols[:, m - cap:]
+            self.start, self.count = 0, cap
+            return evicted
+        overflow = max(0, self.count + m - cap)
+        evicted = self.view()[:, :overflow].copy()
+        self.start = (self.start + overflow) % cap
+        self.count -= overflow
+        pos = (self.start + self.count + np.arange(m)) % cap
+        self.buffer[:, pos] = cols
+        self.buffer[:, pos + cap] = cols
+        self.count += m
+        return evicted
+
+    def push_one(self, values):
+        # 追加一列（实时读数的快速路径），返回被挤出的一列或 None
+        cap = self.capacity
+        evicted = None
+        if self.count == cap:
+            evicted = self.buffer[:, self.start].copy()
+            self.start = (self.start + 1) % cap
+            self.count -= 1
+        pos = (self.start + self.count) % cap
+        self.buffer[:, pos] = values
+        self.buffer[:, pos + cap] = values
+        self.count += 1
+        return evicted
+
+    def set_last(self, values):
+        pos = (self.start + self.count - 1) % self.capacity
+        self.buffer[:, pos] = values
+        self.buffer[:, pos + self.capacity] = values
+
+    def pop_last(self):
+        # 取出最新的一列（聚合时与同一时间段的新数据合并）
+        self.count -= 1
+        return self.buffer[:, self.start + self.count].copy()
+
+
+def combine(rows, keys):
+    # 把按时间排列的聚合记录 (5, m) 按时间段 keys 合并：平均值按读数数加权，最小/最大值取极值
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    n = np.add.reduceat(rows[T_COUNT], starts)
+    out = np.empty((5, len(starts)))
+    out[T_MEAN_TIME] = np.add.reduceat(rows[T_MEAN_TIME] * rows[T_COUNT], starts) / n
+    out[T_MIN] = np.minimum.reduceat(rows[T_MIN], starts)
+    out[T_MEAN] = np.add.reduceat(rows[T_MEAN] * rows[T_COUNT], starts) / n
+    out[T_MAX] = np.maximum.reduceat(rows[T_MAX], starts)
+    out[T_COUNT] = n
+    return out, keys[starts]
+
+
+class Tier:
+    # 一级聚合：width 分钟一个时间段，最新的时间段在新数据到来时继续累加
+    def __init__(self, capacity, width):
+        self.ring = Ring(capacity, 5)
+        self.width = float(width)
+        self.last_key = None
+
+    def clear(self):
+        self.ring.clear()
+        self.last_key = None
+
+    def add(self, rows):
+        # 加入聚合记录 (5, m)，返回挤出本级的记录
+        if rows.shape[1] == 0:
+            return rows
+        keys = np.floor(rows[T_MEAN_TIME] / self.width)
+        if self.ring.count and keys[0] == self.last_key:
+            last = self.ring.pop_last()
+            rows = np.concatenate([last[:, None], rows], axis=1)
+            keys = np.r_[self.last_key, keys]
+        bins, bin_keys = combine(rows, keys)
+        self.last_key = bin_keys[-1]
+        return self.ring.push(bins)
+
+    def add_one(self, row):
+        # 加入一条聚合记录（快速路径），与最新时间段合并时原地更新，返回挤出本级的记录或 None
+        key = np.floor(row[T_MEAN_TIME] / self.width)
+        ring = self.ring
+        if ring.count and key == self.last_key:
+            t, T_min, T_mean, T_max, n = ring.buffer[:, ring.start + ring.count - 1]
+            total = n + row[T_COUNT]
+            ring.set_last((
+                (t * n + row[T_MEAN_TIME] * row[T_COUNT]) / total,
+                min(T_min, row[T_MIN]),
+                (T_mean * n + row[T_MEAN] * row[T_COUNT]) / total,
+                max(T_max, row[T_MAX]),
+                total,
+            ))
+            return None
+        self.last_key = key
+        return ring.push_one(row)
+
+
+class RingHistory:
+    def __init__(self, recent=RECENT_POINTS, minute_bins=MINUTE_BINS, hour_bins=HOUR_BINS):
+        self.recent_ring = Ring(recent, 2)
+        self.tiers = [Tier(minute_bins, 1), Tier(hour_bins, 60)]
+        self.total = 0  # 累计追加的读数数
+
+    def clear(self):
+        self.recent_ring.clear()
+        for tier in self.tiers:
+            tier.clear()
+        self.total = 0
+
+    def append(self, t, T):
+        # 追加一个读数：O(1)，不分配新数组
+        self.total += 1
+        evicted = self.recent_ring.push_one((t, T))
+        if evicted is None:
+            return
+        row = (evicted[0], evicted[1], evicted[1], evicted[1], 1.0)
+        for tier in self.tiers:
+            row = tier.add_one(row)  # 超出最后一级容量的记录丢弃
+            if row is None:
+                return
+
+    def extend(self, t, T):
+        # 追加一批读数（按时间顺序），挤出最近窗口的读数逐级聚合
+        t = np.asarray(t, dtype=float).ravel()
+        T = np.asarray(T, dtype=float).ravel()
+        self.total += len(t)
+        evicted = self.recent_ring.push(np.vstack([t, T]))
+        if evicted.shape[1] == 0:
+            return
+        te, Te = evicted
+        rows = np.vstack([te, Te, Te, Te, np.ones_like(te)])
+        for tier in self.tiers:
+            rows = tier.add(rows)
+
+    def recent(self):
+        # 最近的原始读数 (t, T)，均为连续的视图
+        t, T = self.recent_ring.view()
+        return t, T
+
+    def series(self):
+        # 拟合用的时间序列：聚合段取平均值，按时间顺序拼接（长度有上限；返回新数组，可交给后台任务）
+        hours, minutes = self.tiers[1].ring.view(), self.tiers[0].ring.view()
+        t, T = self.recent()
+        return (np.concatenate([hours[T_MEAN_TIME], minutes[T_MEAN_TIME], t]),
+                np.concatenate([hours[T_MEAN], minutes[T_MEAN], T]))
+
+    def envelope(self):
+        # 绘图用的点：聚合段画最低点和最高点（保留尖峰和波动范围），最近一段画原始读数
+        parts_t, parts_T = [], []
+        for tier in reversed(self.tiers):
+            rows = tier.ring.view()
+            parts_t.append(np.repeat(rows[T_MEAN_TIME], 2))
+            parts_T.append(np.column_stack([rows[T_MIN], rows[T_MAX]]).ravel())
+        t, T = self.recent()
+        return np.concatenate(parts_t + [t]), np.concatenate(parts_T + [T])
+
+    def __len__(self):
+        # 绘图点数
+        return self.recent_ring.count + 2 * sum(tier.ring.count for tier in self.tiers)
@@ -0,0 +1,195 @@
+# 作者：Zack
+# 日期：2026/10/18
+# 冷却记录归档：多条运行记录保存在一个二进制文件中，温度为 float32（可有多个通道），时间为相对上一读数的
+# 整数毫秒差。每条记录是一个块：定长的记录头（读数数、通道数、开始时间）+ JSON 元数据（炉号、开始时间等）
+# + 时间 + 温度，依次追加，文件大小与记录数成正比。读取时整个文件用 np.memmap 映射，
+# 打开多 GB 的归档只读各记录头，单条记录的温度是映射上的零拷贝视图，只有实际访问的页才会读入内存
+
+import argparse
+import json
+import os
+import sys
+import numpy as np
+from log_import import load_log
+
+ARCHIVE_EXT = ".cra"
+MAGIC = b"CLARCH02"
+HEADER_BYTES = 32  # MAGIC + 记录数 (u8) + 已写入数据的结束位置 (u8) + 保留 (u8)
+RECORD = np.dtype([("meta_length", "<u4"), ("n", "<u4"), ("channels", "<u4"), ("reserved", "<u4"),
+                   ("start_ms", "<i8")])  # 每条记录块开头的定长记录头
+ALIGN = 8
+MAX_DELTA_MS = np.iinfo(np.int32).max
+
+
+def align(offset):
+    return -(-offset // ALIGN) * ALIGN
+
+
+def read_header(f):
+    # 返回 (记录数, 已写入数据的结束位置)，不是归档时返回 (None, None)
+    header = f.read(HEADER_BYTES)
+    if len(header) < HEADER_BYTES or header[:8] != MAGIC:
+        return None, None
+    count, end, _ = np.frombuffer(header[8:], dtype="<u8")
+    return int(count), int(end)
+
+
+def write_header(f, count, end):
+    f.seek(0)
+    f.write(MAGIC + np.array([count, end, 0], dtype="<u8").tobytes())
+
+
+def read_index(path):
+    # 依次读取各记录头，返回运行记录列表（字典），文件不是归档时返回 None
+    with open(path, "rb") as f:
+        count, _ = read_header(f)
+        if count is None:
+            return None
+        runs = []
+        offset = HEADER_BYTES
+        for _ in range(count):
+            f.seek(offset)
+            record = np.frombuffer(f.read(RECORD.itemsize), dtype=RECORD)[0]
+            info = json.loads(f.read(int(record["meta_length"])).decode("utf-8"))
+            n, channels = int(record["n"]), int(record["channels"])
+            times = align(offset + RECORD.itemsize + int(record["meta_length"]))
+            temps = align(times + 4 * n)
+            runs.append({
+                "furnace": info["furnace"],
+                "start": info["start"],
+                "start_ms": int(record["start_ms"]),
+                "n": n,
+                "channels": channels,
+                "times": times,
+                "temps": temps,
+                "meta": info["meta"],
+            })
+            offset = align(temps + 4 * n * channels)
+        return runs
+
+
+def append_run(path, stamps, temps, furnace=None, **meta):
+    # 追加一条记录（文件不存在时新建），返回 (记录序号, 错误信息)
+    # 新的记录块写在已写入数据之后，最后才更新文件头的记录数，写入中断时原有记录仍然有效
+    stamps = np.asarray(stamps).astype("datetime64[ms]")
+    temps = np.asarray(temps, dtype="<f4")
+    if len(stamps) < 1 or len(temps) != len(stamps):
+        return None, "时间与温度数据长度不一致"
+    ms = stamps.astype(np.int64)
+    deltas = np.diff(ms, prepend=ms[0])
+    if np.any(np.abs(deltas) > MAX_DELTA_MS):
+        return None, "相邻读数的时间间隔过大"
+
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        with open(path, "wb") as f:
+            write_header(f, 0, HEADER_BYTES)
+
+    with open(path, "r+b") as f:
+        count, end = read_header(f)
+        if count is None:
+            return None, "不是冷却记录归档文件"
+        info = json.dumps({"furnace": furnace, "start": str(stamps[0].astype("datetime64[s]")), "meta": meta},
+                          ensure_ascii=False).encode("utf-8")
+        record = np.zeros(1, dtype=RECORD)
+        record["meta_length"] = len(info)
+        record["n"] = len(stamps)
+        record["channels"] = 1 if temps.ndim == 1 else temps.shape[1]
+        record["start_ms"] = ms[0]
+        times_offset = align(end + RECORD.itemsize + len(info))
+        temps_offset = align(times_offset + 4 * len(deltas))
+
+        # 从上次写入的结束位置开始写（覆盖中断的写入留下的数据）
+        f.seek(end)
+        f.write(record.tobytes())
+        f.write(info)
+        f.write(bytes(times_offset - f.tell()))
+        f.write(deltas.astype("<i4").tobytes())
+        f.write(bytes(temps_offset - f.tell()))
+        f.write(np.ascontiguousarray(temps).tobytes())
+        f.write(bytes(align(f.tell()) - f.tell()))
+        end = f.tell()
+        f.truncate()
+        f.flush()
+        write_header(f, count + 1, end)
+    return count, None
+
+
+class RunArchive:
+    def __init__(self, path):
+        self.path = path
+        self.runs = read_index(path)
+        if self.runs is None:
+            raise ValueError("不是冷却记录归档文件")
+        # 只建立映射，不读取数据
+        self.data = np.memmap(path, dtype=np.uint8, mode="r")
+
+    def __len__(self):
+        return len(self.runs)
+
+    def close(self):
+        self.data._mmap.close()
+        self.data = None
+
+    def find(self, furnace=None, since=None, until=None):
+        # 按炉号和开始时间范围 [since, until) 查找记录序号（只查索引）
+        since = None if since is None else np.datetime64(since, "ms")
+        until = None if until is None else np.datetime64(until, "ms")
+        found = []
+        for i, run in enumerate(self.runs):
+            start = np.datetime64(run["start_ms"], "ms")
+            if furnace is not None and run["furnace"] != furnace:
+                continue
+            if (since is not None and start < since) or (until is not None and start >= until):
+                continue
+            found.append(i)
+        return found
+
+    def temperatures(self, i):
+        # 温度的零拷贝视图：(读数数,) 或 (读数数, 通道数) 的 float32
+        run = self.runs[i]
+        count = run["n"] * run["channels"]
+        view = self.data[run["temps"]:run["temps"] + 4 * count].view("<f4")
+        return view if run["channels"] == 1 else view.reshape(run["n"], run["channels"])
+
+    def timestamps(self, i):
+        # 由时间差累加还原 datetime64[ms]（只读取这一条记录的时间块）
+        run = self.runs[i]
+        deltas = self.data[run["times"]:run["times"] + 4 * run["n"]].view("<i4")
+        return (run["start_ms"] + np.cumsum(deltas, dtype=np.int64)).astype("datetime64[ms]")
+
+    def run(self, i):
+        return self.timestamps(i), self.temperatures(i)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="冷却记录归档：把日志文件加入归档或列出归档中的记录")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="把日志文件（每行 时间 温度…）加入归档")
+    add.add_argument("archive", help=f"归档文件（{ARCHIVE_EXT}）")
+    add.add_argument("logs", nargs="+", help="日志文件，每个文件一条记录")
+    add.add_argument("--furnace", help="炉号")
+    show = sub.add_parser("list", help="列出归档中的记录")
+    show.add_argument("archive")
+    args = parser.parse_args(argv)
+
+    if args.command == "add":
+        status = 0
+        for path in args.logs:
+            stamps, temps, error_msg = load_log(path, "timestamp", ncol=None)
+            if not error_msg and len(stamps) == 0:
+                error_msg = "至少需要两个数据点"
+            if not error_msg:
+                _, error_msg = append_run(args.archive, stamps, temps, args.furnace, source=os.path.basename(path))
+            if error_msg:
+                print(f"{path}: {error_msg}", file=sys.stderr)
+                status = 1
+        return status
+
+    archive = RunArchive(args.archive)
+    for i, run in enumerate(archive.runs):
+        print(f"{i}\t{run['furnace'] or ''}\t{run['start']}\t{run['n']}\t{run['channels']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+# 作者：Zack
+# 日期：2026/10/18
+# 历史运行记录：每次拟合的结果（炉号、装炉量、开始温度、k、T0 等）保存在本地 SQLite 数据库中，
+# 按 (炉号, 开始时间) 和开始时间建索引，按炉子和日期查询只走索引；同一次运行重复计算时覆盖原记录
+
+import os
+import sqlite3
+from datetime import datetime
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cooling_runs.sqlite3")
+COLUMNS = ("furnace", "started", "load", "T_start", "T_env", "k", "T0", "points", "log_rmse", "updated")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    furnace TEXT NOT NULL,
+    started TEXT NOT NULL,
+    load REAL,
+    T_start REAL,
+    T_env REAL,
+    k REAL,
+    T0 REAL,
+    points INTEGER,
+    log_rmse REAL,
+    updated TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS runs_furnace_started ON runs (furnace, started);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started);
+"""
+
+
+def time_text(value):
+    # 开始时间统一存为 ISO 文本（到秒），字符串顺序即时间顺序，范围查询可直接走索引
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat(timespec="seconds")
+    return str(value)
+
+
+class RunStore:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def record(self, furnace, started, load, T_start, T_env, k, T0, points, log_rmse):
+        # 新增或覆盖一次运行的记录（同一炉子、同一开始时间视为同一次运行）
+        values = (str(furnace), time_text(started), load, T_start, T_env, k, T0, points, log_rmse,
+                  datetime.now().isoformat(timespec="seconds"))
+        with self.conn:
+            self.conn.execute(
+                f"INSERT INTO runs ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))}) "
+                "ON CONFLICT (furnace, started) DO UPDATE SET "
+                + ", ".join(f"{c} = excluded.{c}" for c in COLUMNS[2:]),
+                values,
+            )
+
+    def query(self, furnace=None, since=None, until=None, limit=None):
+        # 按炉号和开始时间范围 [since, until) 查询，最近的在前；返回字典列表（可传给后台任务）
+        where, args = [], []
+        if furnace is not None:
+            where.append("furnace = ?")
+            args.append(str(furnace))
+        if since is not None:
+            where.append("started >= ?")
+            args.append(time_text(since))
+        if until is not None:
+            where.append("started < ?")
+            args.append(time_text(until))
+        sql = f"SELECT {', '.join(COLUMNS)} FROM runs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY started DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(int(limit))
+        return [dict(zip(COLUMNS, row)) for row in self.conn.execute(sql, args)]
+
+    def delete(self, furnace, started):
+        with self.conn:
+            self.conn.execute("DELETE FROM runs WHERE furnace = ? AND started = ?", (str(furnace), time_text(started)))
+
+    def furnaces(self):
+        return [row[0] for row in self.conn.execute("SELECT DISTINCT furnace FROM runs ORDER BY furnace")]
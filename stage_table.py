@@ -0,0 +1,177 @@
+# 作者：Zack
+# 日期：2026/10/18
+# 虚拟化的阶段表格：只为可见的若干行创建控件，滚动时复用这些控件显示其他阶段；
+# 输入框的文字保存在列表中，数值保存在配方数据模型中，控件数量和建表时间与阶段数无关
+
+import tkinter as tk
+from tkinter import ttk
+from recipe_model import parse_value
+
+VISIBLE_ROWS = 12  # 同时显示的阶段数（即创建的行数）
+WHEEL_ROWS = 3  # 鼠标滚轮每格滚动的行数
+HEADERS = ["阶段", "温度 (°C)", "时间 (分钟)", "升温速率 (°C/分钟)"]
+STAGE, TEMP, TIME, RATE = range(4)
+
+
+def set_text(widget, text):
+    # 只在文字变化时修改控件
+    if isinstance(widget, ttk.Entry):
+        if widget.get() != text:
+            widget.delete(0, tk.END)
+            widget.insert(0, text)
+    elif widget.cget("text") != text:
+        widget.config(text=text)
+
+
+class StageTable:
+    def __init__(self, master, recipe, font, rows=VISIBLE_ROWS, on_edit=None):
+        # on_edit() 在用户修改某一阶段后调用（配方数据已更新，速率尚未重新计算）
+        self.recipe = recipe
+        self.on_edit = on_edit
+        self.temp_texts = []
+        self.time_texts = []
+        self.first = 0  # 第一行显示的阶段序号
+
+        self.frame = ttk.Frame(master)
+        for col, header in enumerate(HEADERS):
+            ttk.Label(self.frame, text=header, font=font).grid(row=0, column=col, padx=5, pady=5)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.on_scroll)
+        self.scrollbar.grid(row=1, column=len(HEADERS), rowspan=rows, sticky="ns")
+
+        self.rows = []
+        for r in range(rows):
+            widgets = (ttk.Label(self.frame, text="", font=font),
+                       ttk.Entry(self.frame, width=10, font=font),
+                       ttk.Entry(self.frame, width=10, font=font),
+                       ttk.Label(self.frame, text="", font=font))
+            for col, widget in enumerate(widgets):
+                widget.grid(row=r + 1, column=col, padx=5, pady=5)
+                for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+                    widget.bind(sequence, self.on_wheel)
+            for col in (TEMP, TIME):
+                entry = widgets[col]
+                entry.bind("<KeyRelease>", lambda event, r=r: self.row_edited(r))
+                entry.bind("<Up>", lambda event, r=r, col=col: self.move_focus(r, col, -1))
+                entry.bind("<Down>", lambda event, r=r, col=col: self.move_focus(r, col, 1))
+                entry.bind("<Return>", lambda event, r=r, col=col: self.move_focus(r, col, 1))
+            self.rows.append(widgets)
+        self.frame.bind("<MouseWheel>", self.on_wheel)
+        self.show()
+
+    def __len__(self):
+        return len(self.temp_texts)
+
+    def stage(self, i):
+        return self.temp_texts[i], self.time_texts[i]
+
+    def stages(self):
+        # 全部阶段的输入文字 [(温度, 时间), ...]（保存配方用）
+        return list(zip(self.temp_texts, self.time_texts))
+
+    def show(self):
+        # 把当前滚动位置的阶段填入各行控件，没有阶段的行隐藏
+        count = len(self)
+        for r, widgets in enumerate(self.rows):
+            i = self.first + r
+            if i >= count:
+                for widget in widgets:
+                    widget.grid_remove()
+                continue
+            set_text(widgets[STAGE], str(i + 1))
+            set_text(widgets[TEMP], self.temp_texts[i])
+            set_text(widgets[TIME], self.time_texts[i])
+            set_text(widgets[RATE], self.recipe.rate_text(i))
+            for widget in widgets:
+                widget.grid()
+        if count <= len(self.rows):
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.first / count, (self.first + len(self.rows)) / count)
+
+    def show_rates(self, stages):
+        # 速率重新计算后只更新可见的、数值有变化的阶段
+        for i in stages:
+            r = i - self.first
+            if 0 <= r < len(self.rows):
+                set_text(self.rows[r][RATE], self.recipe.rate_text(i))
+
+    def scroll_to(self, first):
+        first = max(0, min(first, len(self) - len(self.rows)))
+        if first != self.first:
+            self.first = first
+            self.show()
+
+    def on_scroll(self, *args):
+        # 滚动条命令：("moveto", 位置) 或 ("scroll", 步数, "units"/"pages")
+        if args[0] == "moveto":
+            self.scroll_to(round(float(args[1]) * len(self)))
+        else:
+            step = int(args[1]) * (len(self.rows) if args[2] == "pages" else 1)
+            self.scroll_to(self.first + step)
+
+    def on_wheel(self, event):
+        # Windows/macOS 为 <MouseWheel>（delta 的正负为方向），Linux 为 <Button-4>/<Button-5>
+        up = event.num == 4 or getattr(event, "delta", 0) > 0
+        self.scroll_to(self.first + (-WHEEL_ROWS if up else WHEEL_ROWS))
+        return "break"
+
+    def move_focus(self, r, col, step):
+        # 上下方向键/回车在同一列移动，超出可见范围时滚动
+        i = self.first + r + step
+        if not 0 <= i < len(self):
+            return "break"
+        if i < self.first:
+            self.scroll_to(i)
+        elif i >= self.first + len(self.rows):
+            self.scroll_to(i - len(self.rows) + 1)
+        entry = self.rows[i - self.first][col]
+        entry.focus_set()
+        entry.icursor(tk.END)
+        return "break"
+
+    def row_edited(self, r):
+        i = self.first + r
+        if i >= len(self):
+            return
+        widgets = self.rows[r]
+        temp, time = widgets[TEMP].get(), widgets[TIME].get()
+        self.temp_texts[i], self.time_texts[i] = temp, time
+        if self.recipe.set_stage(i, parse_value(temp), parse_value(time)) and self.on_edit is not None:
+            self.on_edit()
+
+    def add_stage(self, temp="", time=""):
+        self.temp_texts.append(temp)
+        self.time_texts.append(time)
+        self.recipe.add_stage(parse_value(temp), parse_value(time))
+        self.show()
+
+    def remove_stage(self):
+        # 删除最后一个阶段
+        if not self.temp_texts:
+            return
+        self.temp_texts.pop()
+        self.time_texts.pop()
+        self.recipe.remove_stage()
+        self.first = max(0, min(self.first, len(self) - len(self.rows)))
+        self.show()
+
+    def set_stage(self, i, temp, time):
+        self.temp_texts[i], self.time_texts[i] = temp, time
+        self.recipe.set_stage(i, parse_value(temp), parse_value(time))
+        if 0 <= i - self.first < len(self.rows):
+            self.show()
+
+    def load(self, stages):
+        # 替换全部阶段 [(温度文字, 时间文字), ...]，只刷新一次可见的行
+        self.temp_texts = [temp for temp, _ in stages]
+        self.time_texts = [time for _, time in stages]
+        self.recipe.clear()
+        self.recipe.reserve(len(stages))
+        for temp, time in stages:
+            self.recipe.add_stage(parse_value(temp), parse_value(time))
+        self.first = 0
+        self.show()
+
+    def clear_values(self):
+        # 清空所有阶段的温度和时间（阶段数不变）
+        self.load([("", "")] * len(self))
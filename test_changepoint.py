@@ -0,0 +1,28 @@
+# 作者：Zack
+# 日期：2026/10/18
+# 冷却阶段检测的测试：孤立的尖峰不产生阶段，真实的阶段变化仍能检测到
+
+import numpy as np
+from changepoint import detect_phases
+
+
+def cooling_curve(n=2000, k=0.0008, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(float(n))
+    return t, 20 + 900 * np.exp(-k * t) + rng.normal(0, 0.3, n)
+
+
+def test_spike_does_not_create_phase():
+    t, T = cooling_curve()
+    for i in (10, 1000, 1990):
+        spiked = T.copy()
+        spiked[i] += 300
+        assert detect_phases(t, spiked, 20) == ([], None)
+
+
+def test_real_phase_change_detected():
+    t, T = cooling_curve()
+    T[1200:] = 20 + (T[1199] - 20) * np.exp(-0.003 * (t[1200:] - 1199))
+    breaks, error_msg = detect_phases(t, T, 20)
+    assert error_msg is None
+    assert breaks == [1199]
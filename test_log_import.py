@@ -0,0 +1,23 @@
+# 作者：Zack
+# 日期：2026/10/18
+# 日志导入的测试：逐行检查字段数，字段数不对的行报错并给出行号，空行跳过
+
+from log_import import load_log, parse_text
+
+
+def test_mixed_field_counts_rejected():
+    assert parse_text("0 1921 5\n9\n23 1881", "auto") == (None, None, "第 1 行: 每行必须包含两个数字（时间 温度）")
+    assert parse_text("0 1921\n9\n23 1881 5", "auto")[2] == "第 2 行: 每行必须包含两个数字（时间 温度）"
+
+
+def test_blank_lines_skipped():
+    t, T, error_msg = parse_text("0 1921\n  \n\r\n\t\n9 1900\r\n23 1881\n", "auto")
+    assert error_msg is None
+    assert t.tolist() == [0, 9, 23]
+    assert T.tolist() == [1921, 1900, 1881]
+
+
+def test_file_line_numbers_across_blocks(tmp_path):
+    path = tmp_path / "log.txt"
+    path.write_text("# 注释\n时间 温度\n" + "".join(f"{i} {900 - i}\n" for i in range(1000)) + "5\n")
+    assert load_log(path, chunk_bytes=1000)[2] == "第 1003 行: 每行必须包含两个数字（时间 温度）"
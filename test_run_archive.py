@@ -0,0 +1,53 @@
+# 作者：Zack
+# 日期：2026/10/18
+# 冷却记录归档的测试：文件大小与记录数成正比，追加后各记录的数据不变
+
+import numpy as np
+from run_archive import HEADER_BYTES, RunArchive, append_run
+
+
+def sample_run(i, n=5, channels=1):
+    stamps = np.datetime64("2026-01-01T00:00", "ms") + np.arange(n) * np.timedelta64(60000 + i, "ms")
+    temps = 900 - np.arange(n * channels, dtype=float).reshape(n, channels) - i
+    return stamps, temps[:, 0] if channels == 1 else temps
+
+
+def test_size_linear_in_runs(tmp_path):
+    path = tmp_path / "runs.cra"
+    sizes = []
+    for i in range(400):
+        append_run(path, *sample_run(i), furnace="1号炉")
+        sizes.append(path.stat().st_size)
+    growth = np.diff(np.r_[HEADER_BYTES, sizes])
+    assert np.all(growth == growth[0])
+
+
+def test_runs_round_trip(tmp_path):
+    path = tmp_path / "runs.cra"
+    runs = [sample_run(i, n=3 + i, channels=1 + i % 3) for i in range(6)]
+    for i, (stamps, temps) in enumerate(runs):
+        assert append_run(path, stamps, temps, furnace=f"{i}号炉", load=i) == (i, None)
+    archive = RunArchive(path)
+    assert len(archive) == len(runs)
+    for i, (stamps, temps) in enumerate(runs):
+        got_stamps, got_temps = archive.run(i)
+        assert np.array_equal(got_stamps, stamps)
+        assert np.array_equal(got_temps, temps.astype(np.float32))
+        assert archive.runs[i]["furnace"] == f"{i}号炉"
+        assert archive.runs[i]["meta"] == {"load": i}
+    assert archive.find(furnace="2号炉") == [2]
+    archive.close()
+
+
+def test_interrupted_append_keeps_runs(tmp_path):
+    path = tmp_path / "runs.cra"
+    append_run(path, *sample_run(0))
+    size = path.stat().st_size
+    with open(path, "ab") as f:
+        f.write(b"\xff" * 100)  # 写入中断：数据已写入，文件头未更新
+    append_run(path, *sample_run(1))
+    archive = RunArchive(path)
+    assert len(archive) == 2
+    assert np.array_equal(archive.run(1)[0], sample_run(1)[0])
+    assert path.stat().st_size == 2 * size - HEADER_BYTES
+    archive.close()
@@ -0,0 +1,163 @@
+# 作者：Zack
+# 日期：2026/10/18
+# 时间戳解析：整列向量化地把 ISO 时间、时:分(:秒) 和 Unix 时间戳转换为 numpy datetime64[ms]
+# 只有 时:分 的日志会自动检测跨零点（时间倒退超过半天视为进入第二天）
+
+import numpy as np
+
+KIND_ISO = "iso"
+KIND_CLOCK = "clock"
+KIND_EPOCH = "epoch"
+KIND_NUMBER = "number"
+
+ROLLOVER_SECONDS = 12 * 3600
+EPOCH_MS_THRESHOLD = 1e11  # 大于该值的时间戳按毫秒处理
+EPOCH_MIN_SECONDS = 1e8  # 自动判断时，小于该值的数字视为相对分钟数；按时间戳解析时小于该值（1973 年以前）视为无效
+
+ONE_MINUTE = np.timedelta64(60000, "ms")
+
+
+def looks_like_date(token):
+    # 形如 2025-03-13 的日期
+    return len(token) >= 10 and token[4:5] == b"-" and token[:4].isdigit()
+
+
+def detect_kind(token, allow_number=True):
+    # 根据第一个时间值判断整列格式；allow_number=False 时纯数字一律视为 Unix 时间戳
+    if looks_like_date(token):
+        return KIND_ISO
+    if b":" in token:
+        return KIND_CLOCK
+    try:
+        value = float(token)
+    except ValueError:
+        return KIND_NUMBER  # 交给后续整列转换报错
+    if allow_number and value < EPOCH_MIN_SECONDS:
+        return KIND_NUMBER
+    return KIND_EPOCH
+
+
+def as_bytes(column):
+    column = np.asarray(column)
+    if column.dtype.kind == "U":
+        column = column.astype("S")
+    return column
+
+
+def clock_to_seconds(column):
+    # 时:分 / 时:分:秒 / 时:分:秒.毫秒 -> 当天秒数（float）
+    # 按字符位置逐列扫描定长字节矩阵，循环次数只与字符串宽度有关，与行数无关
+    column = as_bytes(column)
+    n = len(column)
+    width = column.dtype.itemsize
+    chars = np.ascontiguousarray(column).view(np.uint8).reshape(n, width)
+    rows = np.arange(n)
+
+    fields = np.zeros((n, 3))
+    value = np.zeros(n)
+    frac = np.zeros(n)
+    scale = np.ones(n)
+    field = np.zeros(n, dtype=np.int64)
+    digits = np.zeros(n, dtype=np.int64)
+    in_frac = np.zeros(n, dtype=bool)
+    invalid = np.zeros(n, dtype=bool)
+
+    for j in range(width):
+        c = chars[:, j]
+        is_digit = (c >= 48) & (c <= 57)
+        is_colon = c == 58
+        is_dot = c == 46
+        invalid |= ~(is_digit | is_colon | is_dot | (c == 0))
+
+        d = c.astype(float) - 48
+        whole = is_digit & ~in_frac
+        value = np.where(whole, value * 10 + d, value)
+        part = is_digit & in_frac
+        scale = np.where(part, scale / 10, scale)
+        frac = np.where(part, frac + d * scale, frac)
+        digits += is_digit
+
+        # 冒号结束一个字段
+        invalid |= is_colon & ((digits == 0) | (field >= 2) | in_frac)
+        done = np.flatnonzero(is_colon & ~invalid)
+        fields[done, field[done]] = value[done]
+        field[done] += 1
+        value[done] = 0
+        digits[done] = 0
+
+        # 小数点只允许出现在秒字段
+        invalid |= is_dot & ((field != 2) | in_frac | (digits == 0))
+        in_frac |= is_dot
+
+    invalid |= (digits == 0) | (field == 0)
+    field = np.minimum(field, 2)
+    fields[rows, field] = value + frac
+    hours, minutes, seconds = fields[:, 0], fields[:, 1], fields[:, 2]
+    invalid |= (hours >= 24) | (minutes >= 60) | (seconds >= 60)
+    if np.any(invalid):
+        raise ValueError("时间格式必须为 时:分 或 时:分:秒")
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def unwrap_days(seconds, previous=None):
+    # 当天秒数 -> 从起始日零点起的累计秒数；时间倒退超过半天视为跨过零点
+    # previous 为上一段数据最后一个点的累计秒数，用于分块/追加数据时保持连续
+    seconds = np.asarray(seconds, dtype=float)
+    if len(seconds) == 0:
+        return seconds
+    days = np.zeros(len(seconds))
+    days[1:] = np.cumsum(np.diff(seconds) < -ROLLOVER_SECONDS)
+    if previous is not None:
+        day0 = np.floor(previous / 86400)
+        if seconds[0] + day0 * 86400 < previous - ROLLOVER_SECONDS:
+            day0 += 1
+        days += day0
+    return seconds + days * 86400
+
+
+def iso_to_datetime64(column):
+    # ISO 8601：2025-03-13T17:52、2025-03-13 17:52:30 等
+    return np.asarray(column).astype("U").astype("datetime64[ms]")
+
+
+def epoch_to_datetime64(column):
+    # Unix 时间戳（秒，或大于 1e11 时按毫秒）；过小的数字（如相对分钟数）不是时间戳，与其他无效输入一样报错
+    values = np.asarray(column).astype(float)
+    if not np.all((values >= EPOCH_MIN_SECONDS) & np.isfinite(values)):
+        raise ValueError("无法识别的时间格式")
+    ms = np.where(values > EPOCH_MS_THRESHOLD, values, values * 1000)
+    return np.round(ms).astype(np.int64).astype("datetime64[ms]")
+
+
+def seconds_to_datetime64(seconds, base_date):
+    # 累计秒数 + 起始日期 -> datetime64[ms]
+    base = np.datetime64(base_date, "D").astype("datetime64[ms]")
+    return base + np.round(np.asarray(seconds) * 1000).astype(np.int64).astype("timedelta64[ms]")
+
+
+def parse_timestamps(column, base_date, kind=None, after=None):
+    # 解析一整列时间值，返回 datetime64[ms] 数组
+    # base_date 用于只有 时:分 的数据；after 为前一段数据最后一个时间，用于跨零点续接
+    column = as_bytes(column)
+    if len(column) == 0:
+        return np.zeros(0, dtype="datetime64[ms]")
+    if kind is None:
+        kind = detect_kind(column[0], allow_number=False)
+    if kind == KIND_ISO:
+        return iso_to_datetime64(column)
+    if kind == KIND_EPOCH:
+        return epoch_to_datetime64(column)
+    if kind == KIND_CLOCK:
+        previous = None
+        if after is not None:
+            base = np.datetime64(base_date, "D")
+            previous = (np.datetime64(after, "ms") - base) / np.timedelta64(1, "s")
+        return seconds_to_datetime64(unwrap_days(clock_to_seconds(column), previous), base_date)
+    raise ValueError(f"不支持的时间格式: {kind}")
+
+
+def elapsed_minutes(stamps, origin=None):
+    # datetime64 数组 -> 相对 origin（默认第一个点）的分钟数
+    if origin is None:
+        origin = stamps[0]
+    return (stamps - np.datetime64(origin, "ms")) / ONE_MINUTE